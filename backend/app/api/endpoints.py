@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Query, Depends, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Query, Depends, BackgroundTasks, Response
 from typing import List, Dict, Any
 from app.services.market_data import market_data_service
 
@@ -40,17 +40,20 @@ async def get_asset_price(symbol: str, days: int = 30):
         raise e
 
 @router.get("/asset/{symbol}/patterns", response_model=List[Dict[str, Any]])
-async def get_asset_patterns(symbol: str):
-    from app.services.analysis import analysis_service
-    try:
-        return await analysis_service.detect_patterns(symbol)
-    except Exception as e:
-        print(f"Error detecting patterns for {symbol}: {e}")
-        # Mock Fallback
-        return [
-            {"name": "Bull Flag", "type": "Bullish", "description": "Strong uptrend followed by consolidation.", "reliability": "High", "timeframe": "Daily", "stop_loss": 1450, "target_price": 1600, "timestamp": "2025-11-25T10:00:00"},
-            {"name": "Double Bottom", "type": "Bullish", "description": "Reversal pattern indicating support.", "reliability": "Medium", "timeframe": "4h", "stop_loss": 1480, "target_price": 1550, "timestamp": "2025-11-25T11:30:00"}
-        ]
+async def get_asset_patterns(response: Response, symbol: str):
+    """
+    Patterns from the symbol's latest stored scan. Never-scanned symbols and ones with newer
+    bars are detected on demand; scans past PATTERN_SCAN_TTL are refreshed in the background.
+    """
+    from app.services.pattern_store import pattern_store
+    scan = await pattern_store.get_fresh(symbol)
+    if scan is None:
+        raise HTTPException(status_code=404, detail="Price data not found")
+
+    response.headers["X-Patterns-Scanned-At"] = scan["scanned_at"]
+    if scan["bar_time"]:
+        response.headers["X-Patterns-Bar-Time"] = str(scan["bar_time"])
+    return scan["patterns"]
 
 @router.get("/patterns/recent", response_model=List[Dict[str, Any]])
 async def get_recent_patterns():
@@ -71,22 +74,18 @@ async def get_brain_status():
     return learning_service.get_brain_status()
 
 @router.get("/asset/{symbol}/predict", response_model=Dict[str, Any])
-async def get_asset_prediction(symbol: str, days: int = 7):
+async def get_asset_prediction(response: Response, symbol: str, days: int = Query(7, ge=1, le=365)):
     from app.services.analysis import analysis_service
-    from app.services.market_data import market_data_service
-    from app.services.news import news_service
     
+    timings: Dict[str, float] = {}
     try:
-        # Fetch required data
-        price_history = await market_data_service.get_price_history(symbol, days=30)
-        news = news_service.get_news(symbol)
-        
-        return await analysis_service.predict_future(price_history, news, symbol)
+        # Price, news, TradingView and fundamentals are fetched concurrently
+        return await analysis_service.predict_symbol(symbol, horizon_days=days, history_days=30, timings=timings)
     except Exception as e:
         print(f"Error generating prediction for {symbol}: {e}")
         # Mock Fallback for MVP if AI fails (e.g. missing key)
         import datetime
-        future_date = (datetime.datetime.now() + datetime.timedelta(days=7)).strftime("%Y-%m-%d")
+        future_date = (datetime.datetime.now() + datetime.timedelta(days=days)).strftime("%Y-%m-%d")
         return {
             "symbol": symbol,
             "current_price": 2500.0,
@@ -96,6 +95,9 @@ async def get_asset_prediction(symbol: str, days: int = 7):
             "signal": "BUY",
             "reasoning": "Technical indicators suggest a strong uptrend. (AI Model unavailable, using fallback)"
         }
+    finally:
+        # Per-stage durations for debugging, e.g. "price;dur=412.3, llm;dur=1830.0"
+        response.headers["Server-Timing"] = ", ".join(f"{stage};dur={ms:.1f}" for stage, ms in timings.items())
 
 @router.get("/users/me/watchlist", response_model=List[Dict[str, Any]])
 async def get_user_watchlist():
@@ -107,6 +109,26 @@ async def get_user_watchlist():
         {"symbol": "TCS.NS", "name": "Tata Consultancy Services", "price": 3500.0, "change": -0.5}
     ]
 
+@router.get("/llm/stats", response_model=Dict[str, Any])
+async def get_llm_stats():
+    from app.services.llm import llm_service
+    return llm_service.get_provider_stats()
+
+@router.get("/llm/cache/stats", response_model=Dict[str, Any])
+async def get_llm_cache_stats():
+    from app.services.llm_cache import llm_cache
+    return llm_cache.get_stats()
+
+@router.get("/analysis/cache/stats", response_model=Dict[str, Any])
+async def get_analysis_cache_stats():
+    from app.services.analysis_cache import analysis_cache
+    return analysis_cache.get_stats()
+
+@router.get("/system/breakers", response_model=Dict[str, Any])
+async def get_circuit_breakers():
+    from app.services.circuit_breaker import circuit_breakers
+    return circuit_breakers.get_stats()
+
 @router.get("/logs", response_model=List[Dict[str, Any]])
 async def get_system_logs(limit: int = 50, level: str = None):
     from app.services.logger import logger_service
@@ -133,9 +155,39 @@ async def get_log_stats():
     return stats
 
 @router.get("/news", response_model=List[Dict[str, Any]])
-async def get_unified_news():
+async def get_unified_news(response: Response):
+    """
+    Get the latest stored news. Reads only from the local store; stale symbols
+    are refreshed in the background and show up on a later call.
+    """
+    from app.services.news import news_service
+    news_service.trigger_refresh_if_stale()
+    last_refreshed = news_service.get_last_refreshed()
+    if last_refreshed:
+        response.headers["X-News-Last-Refreshed"] = last_refreshed
+    return news_service.get_news()
+
+@router.get("/news/search", response_model=List[Dict[str, Any]])
+async def search_news(q: str = Query(..., min_length=1), symbol: str = None, limit: int = Query(20, ge=1, le=100), offset: int = Query(0, ge=0)):
+    """
+    Full-text search over stored news headlines and summaries, ranked by relevance.
+    """
+    from app.services.news import news_service
+    return news_service.search_news(q, symbol=symbol, limit=limit, offset=offset)
+
+@router.post("/news/summarize")
+async def summarize_news(background_tasks: BackgroundTasks, limit: int = Query(200, ge=1, le=5000)):
+    """
+    Trigger batched AI summarization of unsummarized news in the background.
+    """
     from app.services.news import news_service
-    return news_service.fetch_latest_news()
+    background_tasks.add_task(news_service.summarize_pending, limit)
+    return {"status": "Summarization started in background"}
+
+@router.get("/news/summarize/stats", response_model=Dict[str, Any])
+async def get_news_summary_stats():
+    from app.services.news import news_service
+    return news_service.get_summary_stats()
 
 @router.get("/api/asset/{symbol}/news", response_model=List[Dict[str, Any]])
 async def get_asset_news(symbol: str):
@@ -148,21 +200,23 @@ async def get_asset_news_alias(symbol: str):
     Get news for a specific asset.
     """
     from app.services.news import news_service
-    # Trigger a fetch if we don't have news (optional, but good for demo)
-    # For now, just return what's in DB to be fast
+    # Return what's in DB to be fast; refresh this symbol in the background if stale
+    news_service.trigger_refresh_if_stale([symbol])
     return news_service.get_news(symbol)
 
 @router.get("/asset/{symbol}/technicals", response_model=Dict[str, Any])
-async def get_asset_technicals(symbol: str):
+async def get_asset_technicals(symbol: str, interval: str = "1d"):
     """
     Get technical analysis from TradingView.
     """
-    from app.services.tradingview import tradingview_service
+    from app.services.tradingview import tradingview_service, INTERVALS
     import asyncio
-    
+
+    if interval not in INTERVALS:
+        raise HTTPException(status_code=400, detail=f"interval must be one of {', '.join(INTERVALS)}")
     # Run in thread pool to avoid blocking
-    analysis = await asyncio.to_thread(tradingview_service.get_technical_analysis, symbol)
-    
+    analysis = await asyncio.to_thread(tradingview_service.get_technical_analysis, symbol, interval=interval)
+
     if not analysis:
         # Return neutral fallback if TV fails
         return {
@@ -172,6 +226,231 @@ async def get_asset_technicals(symbol: str):
         }
     return analysis
 
+@router.get("/technicals", response_model=Dict[str, Any])
+async def get_technicals(symbols: str, intervals: str = "1d"):
+    """
+    TradingView analysis for many symbols and timeframes, e.g. symbols=AAPL,TCS.NS&intervals=1h,1d,1W.
+    Returns {symbol: {interval: analysis or null}}; cache misses cost one upstream
+    request per screener and interval.
+    """
+    from app.services.tradingview import tradingview_service
+    import asyncio
+    symbol_list = [s.strip() for s in symbols.split(",") if s.strip()]
+    interval_list = [i.strip() for i in intervals.split(",") if i.strip()]
+    try:
+        return await asyncio.to_thread(tradingview_service.get_many, symbol_list, interval_list)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/technicals/cache/stats", response_model=Dict[str, Any])
+async def get_technicals_cache_stats():
+    from app.services.tradingview import tradingview_service
+    return tradingview_service.get_stats()
+
+@router.get("/asset/{symbol}/indicators", response_model=Dict[str, Any])
+async def get_asset_indicators(symbol: str):
+    """
+    Latest streaming indicator values from the local bar store.
+    """
+    from app.services.bar_store import bar_store
+    values = bar_store.get_indicators(symbol)
+    if not values:
+        raise HTTPException(status_code=404, detail=f"No stored bars for {symbol}")
+    return values
+
+@router.get("/asset/{symbol}/fundamentals", response_model=Dict[str, Any])
+async def get_asset_fundamentals(symbol: str):
+    """
+    Stored fundamentals for a symbol. Unknown or stale symbols are queued for a
+    background fetch and show up on a later call.
+    """
+    from app.services.fundamentals import fundamentals_service
+    return fundamentals_service.get(symbol)
+
+@router.get("/fundamentals/stats", response_model=Dict[str, Any])
+async def get_fundamentals_stats():
+    from app.services.fundamentals import fundamentals_service
+    return fundamentals_service.get_stats()
+
+@router.get("/asset/{symbol}/risk", response_model=Dict[str, Any])
+async def get_asset_risk(symbol: str):
+    """
+    Beta, drawdown, volatility, tail and VaR metrics from the symbol's stored bars.
+    """
+    from app.services.risk import risk_engine
+    metrics = risk_engine.metrics(symbol)
+    if not metrics:
+        raise HTTPException(status_code=404, detail=f"Not enough stored bars for {symbol}")
+    return {"symbol": symbol, **metrics}
+
+@router.get("/screener", response_model=Dict[str, Any])
+async def get_screener(
+    sort: str = "composite",
+    descending: bool = True,
+    min_graham: float = None,
+    min_lynch: float = None,
+    min_buffett: float = None,
+    min_taleb: float = None,
+    min_housel: float = None,
+    min_composite: float = None,
+    type: str = None,
+    sector: str = None,
+    min_coverage: float = Query(0.0, ge=0.0, le=1.0),
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0)
+):
+    """
+    Graham, Lynch, Buffett, Taleb and Housel scores for every asset with stored fundamentals,
+    filtered by minimum scores and sorted by one strategy (or the composite).
+    """
+    from app.services.screener import strategy_screener
+    min_scores = {
+        "graham": min_graham, "lynch": min_lynch, "buffett": min_buffett,
+        "taleb": min_taleb, "housel": min_housel, "composite": min_composite
+    }
+    try:
+        return strategy_screener.screen(sort, descending, min_scores, type, sector, min_coverage, limit, offset)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/asset/{symbol}/backtest", response_model=Dict[str, Any])
+async def get_asset_backtest(symbol: str, horizons: str = None, include_chart: bool = True):
+    """
+    Success rates of every pattern and signal rule over the symbol's stored bars.
+    horizons is a comma-separated list of bar counts (default BACKTEST_HORIZONS).
+    """
+    import asyncio
+    from app.services.backtest import backtest_engine
+    result = await asyncio.to_thread(backtest_engine.run, symbol, _parse_horizons(horizons), include_chart)
+    if not result["bars"]:
+        raise HTTPException(status_code=404, detail=f"No stored bars for {symbol}")
+    return result
+
+@router.get("/backtest", response_model=Dict[str, Any])
+async def get_backtest(symbols: str, horizons: str = None, include_chart: bool = True):
+    """
+    Pattern success rates pooled across a comma-separated list of symbols.
+    """
+    import asyncio
+    from app.services.backtest import backtest_engine
+    symbol_list = [s.strip() for s in symbols.split(",") if s.strip()]
+    return await asyncio.to_thread(backtest_engine.run_many, symbol_list, _parse_horizons(horizons), include_chart)
+
+def _parse_horizons(horizons: str = None) -> List[int]:
+    if not horizons:
+        return None
+    try:
+        parsed = [int(h) for h in horizons.split(",") if h.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="horizons must be comma-separated integers")
+    if any(h < 1 or h > 250 for h in parsed):
+        raise HTTPException(status_code=400, detail="horizons must be between 1 and 250 bars")
+    return parsed
+
+@router.get("/universe", response_model=List[Dict[str, Any]])
+async def get_universe(symbols: str = None, sort: str = "change_pct", descending: bool = True, limit: int = Query(100, ge=1, le=1000)):
+    """
+    Cross-sectional indicators for many symbols from the local bar store.
+    symbols is a comma-separated list; all stored symbols if omitted.
+    """
+    from app.services.universe import universe_service
+    symbol_list = [s.strip() for s in symbols.split(",") if s.strip()] if symbols else None
+    rows = universe_service.snapshot(symbol_list)
+    if rows and sort not in rows[0]:
+        raise HTTPException(status_code=400, detail=f"Unknown sort field: {sort}")
+    # Symbols missing the metric go last either way
+    present = [row for row in rows if row[sort] is not None]
+    missing = [row for row in rows if row[sort] is None]
+    present.sort(key=lambda row: row[sort], reverse=descending)
+    return (present + missing)[:limit]
+
+@router.get("/watchlists", response_model=List[Dict[str, Any]])
+async def get_watchlists():
+    from app.services.asset_service import asset_service
+    return asset_service.get_watchlists()
+
+@router.post("/watchlists", response_model=Dict[str, Any])
+async def create_watchlist(name: str = Query(..., min_length=1)):
+    from app.services.asset_service import asset_service
+    return {"id": asset_service.create_watchlist(name), "name": name}
+
+@router.get("/watchlists/{watchlist_id}", response_model=List[Dict[str, Any]])
+async def get_watchlist(watchlist_id: str):
+    from app.services.asset_service import asset_service
+    return asset_service.get_watchlist(watchlist_id)
+
+@router.post("/watchlists/{watchlist_id}/items", response_model=Dict[str, Any])
+async def add_watchlist_item(watchlist_id: str, symbol: str, weight: float = Query(None, ge=0)):
+    """
+    Adds a symbol to a watchlist, or sets its portfolio weight if it is already there.
+    Weights are relative; they are normalized when the portfolio risk is computed.
+    """
+    from app.services.asset_service import asset_service
+    asset = asset_service.get_asset_by_symbol(symbol)
+    if not asset:
+        raise HTTPException(status_code=404, detail=f"Unknown asset {symbol}")
+    asset_service.add_to_watchlist(watchlist_id, asset["id"], weight)
+    return {"watchlist_id": watchlist_id, "symbol": symbol, "weight": weight}
+
+@router.delete("/watchlists/{watchlist_id}/items/{symbol}", response_model=Dict[str, Any])
+async def remove_watchlist_item(watchlist_id: str, symbol: str):
+    from app.services.asset_service import asset_service
+    asset = asset_service.get_asset_by_symbol(symbol)
+    if not asset:
+        raise HTTPException(status_code=404, detail=f"Unknown asset {symbol}")
+    asset_service.remove_from_watchlist(watchlist_id, asset["id"])
+    return {"watchlist_id": watchlist_id, "symbol": symbol, "removed": True}
+
+@router.get("/watchlists/{watchlist_id}/risk", response_model=Dict[str, Any])
+async def get_watchlist_risk(
+    watchlist_id: str,
+    lookback: int = Query(252, ge=30, le=2520),
+    confidence: float = Query(0.95, gt=0.5, lt=1.0),
+    horizon_days: int = Query(1, ge=1, le=60)
+):
+    """
+    Correlation and covariance matrices, volatility, VaR and diversification ratio of a
+    watchlist held at its stored weights (equal weight where none is set).
+    """
+    import asyncio
+    from app.services.asset_service import asset_service
+    from app.services.portfolio import portfolio_risk_engine
+    items = asset_service.get_watchlist(watchlist_id)
+    if not items:
+        raise HTTPException(status_code=404, detail=f"Watchlist {watchlist_id} is empty or does not exist")
+    symbols = [item["symbol"] for item in items]
+    weights = [item["weight"] for item in items]
+    try:
+        result = await asyncio.to_thread(portfolio_risk_engine.analyze, symbols, weights, lookback, confidence, horizon_days)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"watchlist_id": watchlist_id, **result}
+
+@router.get("/portfolio/risk", response_model=Dict[str, Any])
+async def get_portfolio_risk(
+    symbols: str,
+    weights: str = None,
+    lookback: int = Query(252, ge=30, le=2520),
+    confidence: float = Query(0.95, gt=0.5, lt=1.0),
+    horizon_days: int = Query(1, ge=1, le=60)
+):
+    """
+    Portfolio risk for an ad-hoc comma-separated list of symbols and optional matching weights.
+    """
+    import asyncio
+    from app.services.portfolio import portfolio_risk_engine
+    symbol_list = [s.strip() for s in symbols.split(",") if s.strip()]
+    try:
+        weight_list = [float(w) for w in weights.split(",")] if weights else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="weights must be comma-separated numbers")
+    if weight_list and len(weight_list) != len(symbol_list):
+        raise HTTPException(status_code=400, detail="weights must match symbols one to one")
+    try:
+        return await asyncio.to_thread(portfolio_risk_engine.analyze, symbol_list, weight_list, lookback, confidence, horizon_days)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.post("/admin/ingest")
 async def ingest_data(background_tasks: BackgroundTasks):
     """
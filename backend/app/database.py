@@ -65,6 +65,39 @@ class Database:
             )
         """)
         
+        # Streaming indicator state per asset, advanced as bars are appended to price_timeseries
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS indicator_state (
+                asset_id TEXT PRIMARY KEY,
+                last_timestamp TEXT,
+                state TEXT,
+                updated_at TEXT,
+                FOREIGN KEY(asset_id) REFERENCES assets(id)
+            )
+        """)
+        
+        # Fundamentals, one row per (symbol, field) so each field expires on its own TTL
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS fundamentals (
+                symbol TEXT,
+                field TEXT,
+                value REAL,
+                source TEXT,
+                fetched_at TEXT,
+                PRIMARY KEY (symbol, field)
+            )
+        """)
+        
+        # Latest pattern scan per symbol, written by the background scanner
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS pattern_scans (
+                symbol TEXT PRIMARY KEY,
+                patterns TEXT,
+                bar_time TEXT,
+                scanned_at TEXT
+            )
+        """)
+
         # Watchlists Table
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS watchlists (
@@ -80,12 +113,21 @@ class Database:
                 watchlist_id TEXT,
                 asset_id TEXT,
                 added_at TEXT,
+                weight REAL,
                 PRIMARY KEY (watchlist_id, asset_id),
                 FOREIGN KEY(watchlist_id) REFERENCES watchlists(id),
                 FOREIGN KEY(asset_id) REFERENCES assets(id)
             )
         """)
         
+        # Position weight per watchlist item (NULL = equal weight), added after the table shipped
+        if self.db_url:
+            cursor.execute("ALTER TABLE watchlist_items ADD COLUMN IF NOT EXISTS weight REAL")
+        else:
+            cursor.execute("PRAGMA table_info(watchlist_items)")
+            if "weight" not in [col[1] for col in cursor.fetchall()]:
+                cursor.execute("ALTER TABLE watchlist_items ADD COLUMN weight REAL")
+        
         conn.commit()
         conn.close()
 
@@ -117,6 +159,25 @@ class Database:
         finally:
             conn.close()
 
+    def executemany(self, query: str, params_list: List[tuple]):
+        """
+        Execute a write query for many parameter tuples in one transaction.
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            
+            if self.db_url:
+                query = query.replace('?', '%s')
+            
+            cursor.executemany(query, params_list)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise e
+        finally:
+            conn.close()
+
     def execute_one(self, query: str, params: tuple = ()):
         """
         Execute a query and return one result.
@@ -1,32 +1,42 @@
-import random
-from typing import List, Dict, Any
+import os
+import time
+import asyncio
+from typing import List, Dict, Any, Awaitable
 from datetime import datetime, timedelta
-import pandas as pd
 from app.services.llm import llm_service
 from app.services.learning import learning_service
+from app.services.patterns import pattern_engine
+from app.services.backtest import backtest_engine, BACKTEST_PRIMARY_HORIZON
+from app.services.simulation import monte_carlo_engine, SIMULATION_HORIZONS, SIMULATION_LOOKBACK_BARS, SIMULATION_PATHS, SIMULATION_METHOD, SIMULATION_SEED
+from app.services.bar_store import bar_store
+from app.services.fundamentals import fundamentals_service
+from app.services.risk import risk_engine
+from app.services import indicators
+from app.services.analysis_cache import analysis_cache
 from app.services.strategies.graham import graham_strategy
 from app.services.strategies.lynch import lynch_strategy
 from app.services.strategies.buffett import buffett_strategy
 from app.services.strategies.taleb import taleb_strategy
 from app.services.strategies.housel import housel_strategy
 
+# Ask the LLM for a second opinion on top of the local pattern engine
+PATTERN_AI_SECOND_OPINION = os.getenv("PATTERN_AI_SECOND_OPINION", "false").lower() in ("1", "true", "yes")
+
+async def _timed(timings: Dict[str, float], stage: str, awaitable: Awaitable) -> Any:
+    started = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        timings[stage] = (time.perf_counter() - started) * 1000
+
+async def _ready(value: Any) -> Any:
+    return value
+
 class AnalysisService:
     def calculate_rsi(self, prices: List[float], period: int = 14) -> float:
         if len(prices) < period + 1:
             return 50.0  # Default neutral
-        
-        deltas = [prices[i] - prices[i-1] for i in range(1, len(prices))]
-        gains = [d for d in deltas if d > 0]
-        losses = [-d for d in deltas if d < 0]
-        
-        avg_gain = sum(gains) / period if gains else 0
-        avg_loss = sum(losses) / period if losses else 0
-        
-        if avg_loss == 0:
-            return 100.0
-        
-        rs = avg_gain / avg_loss
-        return 100 - (100 / (1 + rs))
+        return float(indicators.rsi(prices, period)[-1])
 
     async def detect_patterns(self, price_history: List[Dict[str, Any]], symbol: str = "Asset") -> List[Dict[str, Any]]:
         patterns = []
@@ -38,9 +48,62 @@ class AnalysisService:
         # 0. Validate past patterns
         learning_service.validate_patterns(symbol, current_price)
 
-        # 1. Get algorithmic patterns (RSI, SMA) as a baseline
-        closes = [p["close"] for p in price_history]
-        current_rsi = self.calculate_rsi(closes)
+        # 1. Indicator signals (RSI, SMA) and deterministic chart/candlestick patterns, once per bar
+        patterns = self._local_patterns(symbol, price_history)
+
+        # 2. Optional AI second opinion
+        if PATTERN_AI_SECOND_OPINION:
+            try:
+                ai_patterns = await llm_service.detect_patterns(symbol, price_history)
+                patterns = self._merge_second_opinion(symbol, patterns, ai_patterns, price_history)
+            except Exception as e:
+                print(f"Error getting AI patterns: {e}")
+
+        return patterns
+
+    async def detect_patterns_batch(self, histories: Dict[str, List[Dict[str, Any]]]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        detect_patterns for many symbols at once, with the optional AI step packed into a few batched LLM requests.
+        """
+        results: Dict[str, List[Dict[str, Any]]] = {symbol: [] for symbol in histories}
+        eligible = {symbol: history for symbol, history in histories.items() if len(history) >= 20}
+
+        for symbol, history in eligible.items():
+            learning_service.validate_patterns(symbol, history[-1]["close"])
+            results[symbol] = self._local_patterns(symbol, history)
+
+        if not PATTERN_AI_SECOND_OPINION:
+            return results
+
+        try:
+            ai_results = await llm_service.detect_patterns_batch(eligible)
+        except Exception as e:
+            print(f"Error getting batched AI patterns: {e}")
+            ai_results = {}
+
+        for symbol, ai_patterns in ai_results.items():
+            if symbol in eligible:
+                results[symbol] = self._merge_second_opinion(symbol, results[symbol], ai_patterns, eligible[symbol])
+        return results
+
+    def _indicators(self, symbol: str, price_history: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return analysis_cache.get_or_compute("indicators", symbol, price_history, lambda: indicators.snapshot(price_history))
+
+    def _local_patterns(self, symbol: str, price_history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Algorithmic patterns for the latest bar, computed and recorded once per new bar.
+        """
+        def compute():
+            patterns = self._algorithmic_patterns(price_history, symbol)
+            self._record_patterns(symbol, [p for p in patterns if p.get("source") == "engine"], price_history)
+            return patterns
+
+        return analysis_cache.get_or_compute("patterns", symbol, price_history, compute)
+
+    def _algorithmic_patterns(self, price_history: List[Dict[str, Any]], symbol: str = "Asset") -> List[Dict[str, Any]]:
+        patterns = []
+        values = self._indicators(symbol, price_history)
+        current_rsi = values["rsi"] if values["rsi"] is not None else 50.0
         
         if current_rsi > 70:
             patterns.append({
@@ -60,11 +123,9 @@ class AnalysisService:
             })
             
         # Simple SMA Crossover (Golden Cross / Death Cross)
-        if len(closes) > 50:
-            sma20 = pd.Series(closes).rolling(window=20).mean().iloc[-1]
-            sma50 = pd.Series(closes).rolling(window=50).mean().iloc[-1]
-            prev_sma20 = pd.Series(closes).rolling(window=20).mean().iloc[-2]
-            prev_sma50 = pd.Series(closes).rolling(window=50).mean().iloc[-2]
+        if values["prev_sma50"] is not None:
+            sma20, sma50 = values["sma20"], values["sma50"]
+            prev_sma20, prev_sma50 = values["prev_sma20"], values["prev_sma50"]
             
             if prev_sma20 < prev_sma50 and sma20 > sma50:
                 patterns.append({
@@ -83,95 +144,123 @@ class AnalysisService:
                     "timestamp": price_history[-1]["time"]
                 })
 
-        # 2. Get AI-detected patterns
-        try:
-            ai_patterns = await llm_service.detect_patterns(symbol, price_history)
-            # Add timestamp and save to learning service
-            for p in ai_patterns:
-                if "timestamp" not in p:
-                    p["timestamp"] = price_history[-1]["time"]
-                
-                # Inject performance stats if available
+        patterns.extend(pattern_engine.detect(price_history))
+        return patterns
+
+    def _merge_second_opinion(self, symbol: str, patterns: List[Dict[str, Any]], ai_patterns: List[Dict[str, Any]], price_history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Marks engine patterns the LLM agrees with and appends the ones only the LLM saw.
+        """
+        by_name = {p["name"].lower(): p for p in patterns if p.get("source") == "engine"}
+        ai_only = []
+        for p in ai_patterns:
+            match = by_name.get(p["name"].lower())
+            if match and match["type"] == p["type"]:
+                match["ai_confirmed"] = True
+            else:
+                p["source"] = "ai"
+                ai_only.append(p)
+
+        return patterns + self._record_patterns(symbol, ai_only, price_history)
+
+    def _record_patterns(self, symbol: str, patterns: List[Dict[str, Any]], price_history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Stamps patterns, adds historical success rates and saves them for later validation.
+        """
+        current_price = price_history[-1]["close"]
+        for p in patterns:
+            if "timestamp" not in p:
+                p["timestamp"] = price_history[-1]["time"]
+            
+            # Inject performance stats: backtested on this symbol's stored bars, else live-validated
+            backtest = backtest_engine.pattern_success(symbol, p["name"])
+            if backtest:
+                p["description"] += f" (Backtest: {backtest['success_rate']}% of {backtest['resolved']} hit target within {BACKTEST_PRIMARY_HORIZON} bars)"
+            else:
                 stats = learning_service.get_pattern_performance(p["name"])
                 if stats["total"] > 0:
                     p["description"] += f" (Hist. Success: {stats['success_rate']}%)"
-                
-                patterns.append(p)
-                
-                # Save for future validation
-                p_to_save = p.copy()
-                p_to_save["entry_price"] = current_price
-                learning_service.save_pattern_event(symbol, p_to_save)
-                
-        except Exception as e:
-            print(f"Error getting AI patterns: {e}")
+            
+            # Save for future validation
+            p_to_save = p.copy()
+            p_to_save["entry_price"] = current_price
+            learning_service.save_pattern_event(symbol, p_to_save)
 
         return patterns
 
-    async def predict_future(self, price_history: List[Dict[str, Any]], news: List[Dict[str, Any]] = [], symbol: str = "Asset") -> Dict[str, Any]:
-        if not price_history:
-            return {}
-            
-        current_price = price_history[-1]["close"]
-        
-        # 1. Validate past predictions
-        learning_service.validate_predictions(symbol, current_price)
-        
-        # 2. Get learning context
-        context = learning_service.get_learning_context(symbol)
+    async def predict_symbol(self, symbol: str, horizon_days: int = 7, history_days: int = 30, timings: Dict[str, float] = None) -> Dict[str, Any]:
+        """
+        predict_future with its inputs fetched concurrently. Price history, news and TradingView
+        start together while fundamentals are read from the local store; the learning context
+        follows the price and the LLM call starts as soon as its inputs are in. Stage durations (ms) are written to timings.
+        """
+        from app.services.market_data import market_data_service
+        from app.services.news import news_service
+        timings = timings if timings is not None else {}
+        started = time.perf_counter()
+
+        price_task = asyncio.create_task(_timed(timings, "price", market_data_service.get_price_history(symbol, days=history_days)))
+        news_task = asyncio.create_task(_timed(timings, "news", asyncio.to_thread(news_service.get_news, symbol)))
+        try:
+            return await self._predict(symbol, horizon_days, price_task, news_task, timings)
+        finally:
+            timings["total"] = (time.perf_counter() - started) * 1000
+
+    async def predict_future(self, price_history: List[Dict[str, Any]], news: List[Dict[str, Any]] = [], symbol: str = "Asset", horizon_days: int = 7) -> Dict[str, Any]:
+        return await self._predict(symbol, horizon_days, asyncio.create_task(_ready(price_history)), asyncio.create_task(_ready(news)), {})
 
-        # 3. Get Technical Analysis (TradingView)
+    async def _predict(self, symbol: str, horizon_days: int, price_task: asyncio.Task, news_task: asyncio.Task, timings: Dict[str, float]) -> Dict[str, Any]:
         from app.services.tradingview import tradingview_service
-        import asyncio
-        # Run in thread pool to avoid blocking
-        technicals = await asyncio.to_thread(tradingview_service.get_technical_analysis, symbol)
-        
-        # 4. Use LLM for smart analysis with context and technicals
-        ai_analysis = await llm_service.analyze_market(symbol, price_history, news, technicals, learning_context=context)
-        
-        # Mock prediction logic for price targets (LLM usually bad at exact numbers without tools)
-        recent_return = (current_price - price_history[-5]["close"]) / price_history[-5]["close"]
-        drift = recent_return * 0.5 
-        
-        predicted_change = drift + random.uniform(-0.05, 0.05)
-        predicted_price = current_price * (1 + predicted_change)
+        # Inputs that only need the symbol start right away
+        technicals_task = asyncio.create_task(_timed(timings, "technicals", asyncio.to_thread(tradingview_service.get_technical_analysis, symbol)))
+        # One indexed SELECT; it stays on the loop so a miss can schedule its fetch there
+        fundamentals_started = time.perf_counter()
+        fundamentals = fundamentals_service.get(symbol)
+        timings["fundamentals"] = (time.perf_counter() - fundamentals_started) * 1000
+        tasks = [price_task, news_task, technicals_task]
+
+        try:
+            price_history = await price_task
+            if not price_history:
+                return {}
+            return await self._predict_from(symbol, horizon_days, price_history, news_task, technicals_task, fundamentals, tasks, timings)
+        finally:
+            # Nothing keeps running once the prediction is returned or has failed
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _predict_from(self, symbol: str, horizon_days: int, price_history: List[Dict[str, Any]], news_task: asyncio.Task, technicals_task: asyncio.Task, fundamentals: Dict[str, Any], tasks: List[asyncio.Task], timings: Dict[str, float]) -> Dict[str, Any]:
+        current_price = price_history[-1]["close"]
         
-        volatility = random.uniform(0.02, 0.08)
-        lower_bound = predicted_price * (1 - volatility)
-        upper_bound = predicted_price * (1 + volatility)
+        # 1-2. Validate past predictions, then build the learning context from them. Stays on the
+        # event loop: learning_service shares its memory lists and file between requests
+        learning_started = time.perf_counter()
+        context = self._learning_context(symbol, current_price)
+        timings["learning"] = (time.perf_counter() - learning_started) * 1000
 
-        # 5. Apply Investment Strategies (Graham, Lynch, Buffett, Taleb, Housel)
-        # Mock fundamental data for now (would come from API)
-        fundamental_data = {
-            "pe_ratio": 12.5,
-            "pb_ratio": 1.2,
-            "current_ratio": 2.5,
-            "debt_to_equity": 0.4,
-            "earnings_growth": 18.0, # Lynch sweet spot
-            "dividend_yield": 1.5,
-            "institutional_ownership": 25.0, # Low ownership (hidden gem)
-            "roe": 22.0, # Buffett Moat
-            "gross_margin": 45.0, # High margin
-            "fcf_yield": 6.0,
-            "beta": 1.2, # Taleb Volatility
-            "max_drawdown": -12.0, # Taleb Drawdown
-            "insider_ownership": 12.0, # Taleb Skin in the Game
-            "recent_gain_pct": 15.0 # Housel FOMO check
-        }
+        # 3. News and technical analysis (TradingView), already in flight
+        news, technicals = await asyncio.gather(news_task, technicals_task)
         
-        # Mock technicals for Housel
-        technicals_data = {
-            "rsi": ai_analysis.get("technicals", {}).get("rsi", 50)
-        }
+        # 4. Use LLM for smart analysis with context and technicals; local work overlaps with it
+        llm_task = asyncio.create_task(_timed(timings, "llm", llm_service.analyze_market(symbol, price_history, news, technicals, learning_context=context)))
+        tasks.append(llm_task)
+        # Projection and strategy scoring run in a worker thread so the event loop is free to
+        # send the LLM request and read its response meanwhile
+        local_started = time.perf_counter()
+        projection, risk, strategies = await asyncio.to_thread(self._local_analysis, symbol, price_history, horizon_days, fundamentals["data"])
+        timings["local"] = (time.perf_counter() - local_started) * 1000
+
+        # Price targets from a Monte Carlo projection (LLM usually bad at exact numbers without tools)
+        band = projection["horizons"][str(horizon_days)]["percentiles"]
+        predicted_price = band["p50"]
+        predicted_change = float(predicted_price / current_price - 1)
+        lower_bound, upper_bound = band["p5"], band["p95"]
         
-        graham_result = graham_strategy.evaluate(fundamental_data)
-        lynch_result = lynch_strategy.evaluate(fundamental_data)
-        buffett_result = buffett_strategy.evaluate(fundamental_data)
-        taleb_result = taleb_strategy.evaluate(fundamental_data)
-        housel_result = housel_strategy.evaluate(fundamental_data, technicals_data)
+        ai_analysis = await llm_task
         
         prediction_result = {
-            "horizon_days": 7,
+            "horizon_days": horizon_days,
             "current_price": current_price,
             "predicted_price": round(predicted_price, 2),
             "predicted_change_pct": round(predicted_change * 100, 2),
@@ -181,11 +270,10 @@ class AnalysisService:
             "confidence": ai_analysis.get("confidence", 0.5),
             "reasoning": ai_analysis.get("reasoning", "Analysis based on technical indicators."),
             "accuracy": learning_service.get_accuracy_score(symbol),
-            "graham_analysis": graham_result,
-            "lynch_analysis": lynch_result,
-            "buffett_analysis": buffett_result,
-            "taleb_analysis": taleb_result,
-            "housel_analysis": housel_result,
+            "projection": projection,
+            "fundamentals": {key: fundamentals[key] for key in ("source", "as_of", "stale")},
+            "risk": risk,
+            **strategies,
             "timestamp": datetime.now().isoformat()
         }
         
@@ -194,4 +282,56 @@ class AnalysisService:
         
         return prediction_result
 
+    def _local_analysis(self, symbol: str, price_history: List[Dict[str, Any]], horizon_days: int, fundamentals: Dict[str, Any]) -> tuple:
+        """
+        (projection, risk metrics, strategy results) for a prediction; no network calls.
+        """
+        projection = self._project(symbol, price_history, horizon_days)
+
+        # 5. Apply Investment Strategies (Graham, Lynch, Buffett, Taleb, Housel)
+        # Fundamentals come from the local store; missing fields fall back to each strategy's defaults.
+        # Beta, drawdown and recent gain measured from stored bars take precedence over reported ones
+        risk = risk_engine.metrics(symbol)
+        fundamental_data = {**fundamentals, **risk_engine.strategy_inputs(risk)}
+
+        # Locally computed indicators for Housel
+        values = self._indicators(symbol, price_history)
+        technicals_data = {
+            "rsi": values["rsi"] if values["rsi"] is not None else 50.0
+        }
+
+        strategies = analysis_cache.get_or_compute(
+            "strategies", symbol, price_history,
+            lambda: self._evaluate_strategies(fundamental_data, technicals_data),
+            params={"fundamentals": fundamental_data, "technicals": technicals_data}
+        )
+        return projection, risk, strategies
+
+    def _learning_context(self, symbol: str, current_price: float) -> str:
+        learning_service.validate_predictions(symbol, current_price)
+        return learning_service.get_learning_context(symbol)
+
+    def _project(self, symbol: str, price_history: List[Dict[str, Any]], horizon_days: int) -> Dict[str, Any]:
+        """
+        Monte Carlo projection for the requested and standard horizons, from the longer of
+        the stored bars and the given history; cached until the next bar.
+        """
+        stored = bar_store.get_bars(symbol, limit=SIMULATION_LOOKBACK_BARS + 1)
+        history = stored if len(stored) > len(price_history) and stored[-1]["time"] == price_history[-1]["time"] else price_history
+        horizons = sorted(set(SIMULATION_HORIZONS) | {horizon_days})
+        return analysis_cache.get_or_compute(
+            "projection", symbol, history,
+            lambda: monte_carlo_engine.project(history, horizons),
+            params={"horizons": horizons, "paths": SIMULATION_PATHS, "method": SIMULATION_METHOD, "seed": SIMULATION_SEED}
+        )
+
+    def _evaluate_strategies(self, fundamental_data: Dict[str, Any], technicals_data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "graham_analysis": graham_strategy.evaluate(fundamental_data),
+            "lynch_analysis": lynch_strategy.evaluate(fundamental_data),
+            "buffett_analysis": buffett_strategy.evaluate(fundamental_data),
+            "taleb_analysis": taleb_strategy.evaluate(fundamental_data),
+            "housel_analysis": housel_strategy.evaluate(fundamental_data, technicals_data)
+        }
+
 analysis_service = AnalysisService()
@@ -0,0 +1,73 @@
+import os
+import copy
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+from app.services.bar_store import bar_store, BAR_INTERVAL
+
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "2048"))
+
+class AnalysisCache:
+    """
+    In-process cache of derived results (indicators, patterns, strategy scores) keyed by
+    (kind, symbol, interval, last bar time, params). Nothing is recomputed until a new bar
+    arrives; the bar store drops a symbol's entries whenever its bars change. Safe to use
+    from worker threads; compute() runs outside the lock.
+    """
+
+    def __init__(self, max_entries: int = ANALYSIS_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0}
+        bar_store.subscribe(self.invalidate)
+
+    def _key(self, kind: str, symbol: str, price_history: List[Dict[str, Any]], params: Optional[Dict[str, Any]], interval: str) -> tuple:
+        last = price_history[-1] if price_history else {}
+        # The window length and last close are part of the key: the same symbol is analysed over
+        # different windows, and callers without a real symbol share the "Asset" default
+        params_key = hashlib.sha1(json.dumps(params or {}, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+        return (kind, symbol, interval, last.get("time"), last.get("close"), len(price_history), params_key)
+
+    def get_or_compute(self, kind: str, symbol: str, price_history: List[Dict[str, Any]], compute: Callable[[], Any], params: Optional[Dict[str, Any]] = None, interval: str = BAR_INTERVAL) -> Any:
+        key = self._key(kind, symbol, price_history, params, interval)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                # Callers annotate results in place; never hand out the cached object
+                return copy.deepcopy(self._entries[key])
+            self.stats["misses"] += 1
+
+        result = compute()
+        with self._lock:
+            self._entries[key] = copy.deepcopy(result)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+        return result
+
+    def invalidate(self, symbol: str):
+        with self._lock:
+            stale = [key for key in self._entries if key[1] == symbol]
+            for key in stale:
+                del self._entries[key]
+        if stale:
+            self.stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0
+        }
+
+analysis_cache = AnalysisCache()
@@ -97,23 +97,33 @@ class AssetService:
         conn.close()
         return watchlist_id
 
-    def add_to_watchlist(self, watchlist_id: str, asset_id: str):
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("INSERT OR IGNORE INTO watchlist_items (watchlist_id, asset_id, added_at) VALUES (?, ?, ?)", (watchlist_id, asset_id, datetime.now().isoformat()))
-        conn.commit()
-        conn.close()
+    def add_to_watchlist(self, watchlist_id: str, asset_id: str, weight: Optional[float] = None):
+        """
+        Adds an asset to a watchlist, or updates its weight if it is already there. Re-adding
+        without a weight keeps the stored one.
+        """
+        db.execute("""
+            INSERT INTO watchlist_items (watchlist_id, asset_id, added_at, weight) VALUES (?, ?, ?, ?)
+            ON CONFLICT (watchlist_id, asset_id) DO UPDATE SET weight = COALESCE(excluded.weight, watchlist_items.weight)
+        """, (watchlist_id, asset_id, datetime.now().isoformat(), weight))
+
+    def remove_from_watchlist(self, watchlist_id: str, asset_id: str):
+        db.execute("DELETE FROM watchlist_items WHERE watchlist_id = ? AND asset_id = ?", (watchlist_id, asset_id))
+
+    def get_watchlists(self) -> List[Dict[str, Any]]:
+        return db.execute("""
+            SELECT w.id, w.name, w.created_at, COUNT(wi.asset_id) AS items FROM watchlists w
+            LEFT JOIN watchlist_items wi ON wi.watchlist_id = w.id
+            GROUP BY w.id, w.name, w.created_at
+            ORDER BY w.created_at
+        """)
 
     def get_watchlist(self, watchlist_id: str) -> List[Dict[str, Any]]:
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT a.* FROM assets a
+        return db.execute("""
+            SELECT a.*, wi.weight, wi.added_at FROM assets a
             JOIN watchlist_items wi ON a.id = wi.asset_id
             WHERE wi.watchlist_id = ?
+            ORDER BY wi.added_at
         """, (watchlist_id,))
-        rows = cursor.fetchall()
-        conn.close()
-        return [dict(row) for row in rows]
 
 asset_service = AssetService()
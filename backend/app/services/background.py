@@ -0,0 +1,32 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Optional
+
+# Running tasks; the event loop itself only keeps weak references to them
+_tasks: set = set()
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def _start(factory: Callable[[], Awaitable[Any]]):
+    task = asyncio.ensure_future(factory())
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+def spawn(factory: Callable[[], Awaitable[Any]]) -> bool:
+    """
+    Runs factory() as a fire-and-forget task on the application's event loop. Works from
+    the loop itself and from worker threads (asyncio.to_thread), which are handed over
+    with call_soon_threadsafe. Returns False when no loop is running (scripts).
+    """
+    global _loop
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+
+    if loop is not None:
+        _loop = loop
+        _start(factory)
+        return True
+    if _loop is not None and _loop.is_running():
+        _loop.call_soon_threadsafe(_start, factory)
+        return True
+    return False
@@ -0,0 +1,304 @@
+import os
+import time
+import asyncio
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+from app.services import indicators
+from app.services.bar_store import bar_store
+from app.services.background import spawn
+from app.services.logger import logger_service
+from app.services.patterns import pattern_engine, to_arrays, PATTERN_CHART_LOOKBACK, PATTERN_REWARD_RISK, ATR_PERIOD
+
+# Bars after entry within which target or stop must be hit
+BACKTEST_HORIZONS = [int(h) for h in os.getenv("BACKTEST_HORIZONS", "5,10,20").split(",") if h.strip()]
+# Horizon quoted as a pattern's historical success rate
+BACKTEST_PRIMARY_HORIZON = int(os.getenv("BACKTEST_PRIMARY_HORIZON", "10"))
+# Indicator signals have no structural stop; risk this many ATRs instead
+BACKTEST_SIGNAL_ATR_STOP = float(os.getenv("BACKTEST_SIGNAL_ATR_STOP", "1.5"))
+# Minimum seconds between background recomputes of one symbol's pattern stats
+BACKTEST_REFRESH_INTERVAL = int(os.getenv("BACKTEST_REFRESH_INTERVAL", "300"))
+BACKTEST_REFRESH_CONCURRENCY = int(os.getenv("BACKTEST_REFRESH_CONCURRENCY", "2"))
+BACKTEST_CACHE_MAX_ENTRIES = int(os.getenv("BACKTEST_CACHE_MAX_ENTRIES", "256"))
+# Horizons kept precomputed for pattern_success
+PRECOMPUTED_HORIZONS = sorted(set(BACKTEST_HORIZONS) | {BACKTEST_PRIMARY_HORIZON})
+
+# Outcome codes
+OPEN, SUCCESS, FAILURE, EXPIRED = 0, 1, 2, 3
+
+def _onset(mask: np.ndarray) -> np.ndarray:
+    """
+    First bar of each run of True, so a condition that persists counts once.
+    """
+    previous = np.concatenate(([False], mask[:-1]))
+    return mask & ~previous
+
+class BacktestEngine:
+    """
+    Replays stored bars and evaluates every pattern and signal rule over the full history.
+    Each occurrence enters at its bar's close; the following bars' highs and lows decide
+    whether the target or the stop was hit first. Resolution is vectorized over all
+    occurrences and horizons at once. A bar touching both levels counts as a stop-out.
+
+    Full runs are cached until the symbol's bars change. Pattern success rates quoted on
+    the request path are read from stats recomputed in the background after new bars.
+    """
+
+    def __init__(self):
+        self._runs: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # symbol -> {"computed": monotonic time, "horizons": summary} for pattern_success
+        self._latest: Dict[str, Dict[str, Any]] = {}
+        # Symbols whose bars changed since their stats were computed, and ones being computed
+        self._changed: set = set()
+        self._running: set = set()
+        self._slots = asyncio.Semaphore(BACKTEST_REFRESH_CONCURRENCY)
+        bar_store.subscribe(self._on_bars_changed)
+
+    def _on_bars_changed(self, symbol: str):
+        # May run in a worker thread; the recompute is handed to the event loop
+        with self._lock:
+            for key in [k for k in self._runs if k[0] == symbol]:
+                del self._runs[key]
+        self._changed.add(symbol)
+        # Only symbols whose stats are being quoted are kept up to date
+        if symbol in self._latest:
+            spawn(lambda: self._refresh(symbol))
+
+    def events(self, open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray, include_chart: bool = True) -> Dict[str, Dict[str, np.ndarray]]:
+        """
+        Occurrences per pattern name: bar index, direction, stop and target.
+        """
+        atr = indicators.atr(high, low, close, ATR_PERIOD)
+        ready = ~np.isnan(atr)
+        events: Dict[str, Dict[str, np.ndarray]] = {}
+
+        def add(name: str, mask: np.ndarray, bullish: np.ndarray, stop: np.ndarray, target: np.ndarray):
+            index = np.flatnonzero(mask & ready)
+            if len(index):
+                events[name] = {"index": index, "bullish": bullish[index], "stop": stop[index], "target": target[index]}
+
+        for name, level in pattern_engine.candlestick_levels(open_, high, low, close, atr).items():
+            add(name, level["mask"], level["bullish"], level["stop"], level["target"])
+
+        # Indicator signals, as raised by AnalysisService._algorithmic_patterns
+        rsi = indicators.rsi(close)
+        sma20, sma50 = indicators.sma(close, 20), indicators.sma(close, 50)
+        prev20, prev50 = np.concatenate(([np.nan], sma20[:-1])), np.concatenate(([np.nan], sma50[:-1]))
+        bull_stop = close - BACKTEST_SIGNAL_ATR_STOP * atr
+        bear_stop = close + BACKTEST_SIGNAL_ATR_STOP * atr
+        with np.errstate(invalid="ignore"):
+            signals = {
+                "RSI Oversold": (_onset(rsi < 30), True),
+                "RSI Overbought": (_onset(rsi > 70), False),
+                "Golden Cross": ((prev20 < prev50) & (sma20 > sma50), True),
+                "Death Cross": ((prev20 > prev50) & (sma20 < sma50), False),
+            }
+        for name, (mask, bullish) in signals.items():
+            stop = bull_stop if bullish else bear_stop
+            add(name, mask, np.full(len(close), bullish), stop, close + PATTERN_REWARD_RISK * (close - stop))
+
+        if include_chart:
+            for name, event in self._chart_events(high, low, close, atr).items():
+                events[name] = event
+        return events
+
+    def _chart_events(self, high: np.ndarray, low: np.ndarray, close: np.ndarray, atr: np.ndarray) -> Dict[str, Dict[str, np.ndarray]]:
+        """
+        Chart patterns are fitted on a trailing window, so they are replayed bar by bar;
+        a pattern still present on the next bar is the same occurrence.
+        """
+        found: Dict[str, Dict[str, list]] = {}
+        active: set = set()
+        for i in range(ATR_PERIOD, len(close)):
+            start = max(0, i + 1 - PATTERN_CHART_LOOKBACK)
+            patterns = pattern_engine.chart_patterns(None, high[start:i + 1], low[start:i + 1], close[start:i + 1], atr[i])
+            names = set()
+            for p in patterns:
+                names.add(p["name"])
+                if p["name"] in active:
+                    continue
+                event = found.setdefault(p["name"], {"index": [], "bullish": [], "stop": [], "target": []})
+                event["index"].append(i)
+                event["bullish"].append(p["type"] == "Bullish")
+                event["stop"].append(p["stop_loss"])
+                event["target"].append(p["target_price"])
+            active = names
+        return {name: {key: np.array(values) for key, values in event.items()} for name, event in found.items()}
+
+    def resolve(self, high: np.ndarray, low: np.ndarray, close: np.ndarray, event: Dict[str, np.ndarray], horizon: int) -> Dict[str, np.ndarray]:
+        """
+        Outcome, exit bar offset and return (%) of each occurrence within horizon bars.
+        """
+        index, bullish = event["index"], event["bullish"]
+        stop, target = event["stop"][:, None], event["target"][:, None]
+        n = len(close)
+
+        forward = index[:, None] + 1 + np.arange(horizon)
+        in_range = forward < n
+        forward = np.minimum(forward, n - 1)
+        highs, lows = high[forward], low[forward]
+
+        hit_target = np.where(bullish[:, None], highs >= target, lows <= target) & in_range
+        hit_stop = np.where(bullish[:, None], lows <= stop, highs >= stop) & in_range
+        first_target = np.where(hit_target.any(axis=1), hit_target.argmax(axis=1), horizon)
+        first_stop = np.where(hit_stop.any(axis=1), hit_stop.argmax(axis=1), horizon)
+
+        complete = index + horizon < n
+        outcome = np.full(len(index), OPEN)
+        outcome[complete] = EXPIRED
+        outcome[first_target < first_stop] = SUCCESS
+        outcome[(first_stop <= first_target) & (first_stop < horizon)] = FAILURE
+
+        entry = close[index]
+        exit_price = np.where(outcome == SUCCESS, event["target"], np.where(outcome == FAILURE, event["stop"], close[forward[:, -1]]))
+        direction = np.where(bullish, 1.0, -1.0)
+        returns = direction * (exit_price / entry - 1) * 100
+        bars_held = np.where(outcome == SUCCESS, first_target + 1, np.where(outcome == FAILURE, first_stop + 1, horizon))
+        return {"outcome": outcome, "returns": returns, "bars_held": bars_held}
+
+    def run_arrays(self, open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray, horizons: Optional[List[int]] = None, include_chart: bool = True) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        {horizon: {pattern name: counts and sums}} for one price series.
+        """
+        horizons = horizons or BACKTEST_HORIZONS
+        events = self.events(open_, high, low, close, include_chart)
+        results: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for horizon in horizons:
+            by_name = {}
+            for name, event in events.items():
+                resolved = self.resolve(high, low, close, event, horizon)
+                outcome, closed = resolved["outcome"], resolved["outcome"] != OPEN
+                by_name[name] = {
+                    "type": "Bullish" if event["bullish"].mean() >= 0.5 else "Bearish",
+                    "occurrences": int(len(outcome)),
+                    "success": int((outcome == SUCCESS).sum()),
+                    "failure": int((outcome == FAILURE).sum()),
+                    "expired": int((outcome == EXPIRED).sum()),
+                    "open": int((outcome == OPEN).sum()),
+                    "return_sum": float(resolved["returns"][closed].sum()),
+                    "bars_held_sum": int(resolved["bars_held"][closed].sum())
+                }
+            results[str(horizon)] = by_name
+        return results
+
+    def run(self, symbol: str, horizons: Optional[List[int]] = None, include_chart: bool = True) -> Dict[str, Any]:
+        """
+        Backtest over all stored bars of a symbol, cached until its bars change.
+        """
+        horizons = horizons or BACKTEST_HORIZONS
+        raw, bars = self._raw(symbol, horizons, include_chart)
+        if not bars:
+            return {"symbol": symbol, "bars": 0, "horizons": {}}
+        return {"symbol": symbol, **bars, "horizons": self._summarize(raw)}
+
+    def _raw(self, symbol: str, horizons: List[int], include_chart: bool):
+        """
+        (raw stats, {"bars", "from", "to"}) for a symbol; a cache hit loads no bars.
+        """
+        key = (symbol, tuple(horizons), include_chart)
+        with self._lock:
+            if key in self._runs:
+                self._runs.move_to_end(key)
+                cached = self._runs[key]
+                return cached["raw"], cached["bars"]
+
+        bars = bar_store.get_bars(symbol)
+        if not bars:
+            return {}, None
+        open_, high, low, close = to_arrays(bars)
+        raw = self.run_arrays(open_, high, low, close, horizons, include_chart)
+        span = {"bars": len(bars), "from": bars[0]["time"], "to": bars[-1]["time"]}
+        with self._lock:
+            self._runs[key] = {"raw": raw, "bars": span}
+            while len(self._runs) > BACKTEST_CACHE_MAX_ENTRIES:
+                self._runs.popitem(last=False)
+        return raw, span
+
+    def run_many(self, symbols: List[str], horizons: Optional[List[int]] = None, include_chart: bool = True) -> Dict[str, Any]:
+        """
+        Pooled pattern statistics across symbols.
+        """
+        horizons = horizons or BACKTEST_HORIZONS
+        pooled: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        tested = []
+        for symbol in symbols:
+            raw, bars = self._raw(symbol, horizons, include_chart)
+            if not bars:
+                continue
+            tested.append(symbol)
+            for horizon, by_name in raw.items():
+                for name, stats in by_name.items():
+                    total = pooled.setdefault(horizon, {}).setdefault(name, {**stats, "bullish": 0, "occurrences": 0, "success": 0, "failure": 0, "expired": 0, "open": 0, "return_sum": 0.0, "bars_held_sum": 0})
+                    for key in ("occurrences", "success", "failure", "expired", "open", "return_sum", "bars_held_sum"):
+                        total[key] += stats[key]
+                    total["bullish"] += stats["occurrences"] if stats["type"] == "Bullish" else 0
+
+        for by_name in pooled.values():
+            for stats in by_name.values():
+                stats["type"] = "Bullish" if stats.pop("bullish") * 2 >= stats["occurrences"] else "Bearish"
+        return {"symbols": tested, "horizons": self._summarize(pooled)}
+
+    def pattern_success(self, symbol: str, name: str, horizon: int = BACKTEST_PRIMARY_HORIZON) -> Optional[Dict[str, Any]]:
+        """
+        Backtested stats of one pattern on a symbol's own history, if it ever closed an occurrence.
+        Only reads precomputed stats; a symbol without them (or with newer bars) is queued for
+        a background recompute and quoted on a later call.
+        """
+        latest = self._latest.get(symbol)
+        if latest is None or symbol in self._changed:
+            self.request(symbol)
+        if latest is None:
+            return None
+        stats = latest["horizons"].get(str(horizon), {}).get(name)
+        if not stats or not stats["resolved"]:
+            return None
+        return stats
+
+    def request(self, symbol: str):
+        """
+        Queues a background recompute of a symbol's pattern stats without waiting for it.
+        """
+        spawn(lambda: self._refresh(symbol))
+
+    async def _refresh(self, symbol: str):
+        # Runs on the event loop only, so the bookkeeping sets need no lock
+        latest = self._latest.get(symbol)
+        if symbol in self._running:
+            return
+        if latest is not None and (symbol not in self._changed or time.monotonic() - latest["computed"] < BACKTEST_REFRESH_INTERVAL):
+            return
+
+        self._running.add(symbol)
+        self._changed.discard(symbol)
+        try:
+            async with self._slots:
+                result = await asyncio.to_thread(self.run, symbol, PRECOMPUTED_HORIZONS)
+            self._latest[symbol] = {"computed": time.monotonic(), "horizons": result["horizons"]}
+        except Exception as e:
+            logger_service.log("ERROR", "BACKTEST", f"Background backtest failed for {symbol}", {"error": str(e)})
+        finally:
+            self._running.discard(symbol)
+
+    def _summarize(self, raw: Dict[str, Dict[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        summary = {}
+        for horizon, by_name in raw.items():
+            summary[horizon] = {}
+            for name, stats in sorted(by_name.items()):
+                resolved = stats["success"] + stats["failure"] + stats["expired"]
+                summary[horizon][name] = {
+                    "type": stats["type"],
+                    "occurrences": stats["occurrences"],
+                    "resolved": resolved,
+                    "success": stats["success"],
+                    "failure": stats["failure"],
+                    "expired": stats["expired"],
+                    "open": stats["open"],
+                    "success_rate": round(stats["success"] / resolved * 100, 1) if resolved else 0.0,
+                    "avg_return_pct": round(stats["return_sum"] / resolved, 3) if resolved else 0.0,
+                    "avg_bars_held": round(stats["bars_held_sum"] / resolved, 2) if resolved else 0.0
+                }
+        return summary
+
+backtest_engine = BacktestEngine()
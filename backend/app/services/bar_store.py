@@ -0,0 +1,203 @@
+import json
+import uuid
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Callable
+from app.database import db
+from app.services.streaming_indicators import IndicatorState, bar_values
+
+# price_timeseries holds daily bars
+BAR_INTERVAL = "1d"
+
+class BarStore:
+    """
+    Local store of daily OHLCV bars (price_timeseries) with per-symbol streaming indicator
+    state (indicator_state). Appending bars advances the indicators in O(1) per new bar;
+    the state is persisted next to the bars so it survives restarts.
+    """
+
+    def __init__(self):
+        self._asset_ids: Dict[str, str] = {}
+        self._states: Dict[str, IndicatorState] = {}
+        self._first_timestamps: Dict[str, str] = {}
+        self._listeners: List[Callable[[str], None]] = []
+
+    def subscribe(self, listener: Callable[[str], None]):
+        """
+        Registers listener(symbol), called whenever a symbol's stored bars change.
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, symbol: str):
+        for listener in self._listeners:
+            listener(symbol)
+
+    def _asset_id(self, symbol: str, create: bool = True) -> Optional[str]:
+        if symbol in self._asset_ids:
+            return self._asset_ids[symbol]
+
+        row = db.execute_one("SELECT id FROM assets WHERE symbol = ?", (symbol,))
+        if row:
+            asset_id = row["id"]
+        elif create:
+            # Symbols looked up ad hoc get an inactive asset row so they don't show up in listings
+            asset_id = str(uuid.uuid4())
+            asset_type = "Crypto" if "-USD" in symbol else "Index" if symbol.startswith("^") else "Stock"
+            db.execute(
+                "INSERT INTO assets (id, symbol, name, type, exchange, is_active, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (asset_id, symbol, symbol, asset_type, "Unknown", False, datetime.now().isoformat())
+            )
+        else:
+            return None
+
+        self._asset_ids[symbol] = asset_id
+        return asset_id
+
+    def append(self, symbol: str, bars: List[Dict[str, Any]]) -> int:
+        """
+        Upserts bars for a symbol and advances its indicator state.
+        Returns how many bars were new or changed at or after the last stored bar.
+        Listeners are notified only when stored bars actually changed.
+        """
+        bars = sorted((b for b in bars if b.get("close")), key=lambda b: b["time"])
+        if not bars:
+            return 0
+
+        asset_id = self._asset_id(symbol)
+        state = self._load_state(symbol, asset_id)
+        last = state.last_timestamp
+
+        fresh = [b for b in bars if last is None or b["time"] > last or (b["time"] == last and bar_values(b) != state.last_bar)]
+        first = self._first_timestamp(symbol, asset_id)
+        backfill = first is not None and bars[0]["time"] < first
+
+        if backfill:
+            # Older history arrived; store it all and replay so the indicators reflect it
+            self._upsert(asset_id, bars)
+            self._first_timestamps[symbol] = bars[0]["time"]
+            self.rebuild_state(symbol)
+            self._notify(symbol)
+            return len(fresh)
+
+        if not fresh:
+            # Re-fetch of bars we already have
+            return 0
+
+        self._upsert(asset_id, bars if last is None else fresh)
+        if first is None:
+            self._first_timestamps[symbol] = bars[0]["time"]
+        for bar in fresh:
+            state.update(bar)
+        self._save_state(asset_id, state)
+        self._notify(symbol)
+        return len(fresh)
+
+    def _upsert(self, asset_id: str, bars: List[Dict[str, Any]]):
+        db.executemany("""
+            INSERT INTO price_timeseries (asset_id, timestamp, open, high, low, close, volume)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (asset_id, timestamp) DO UPDATE SET
+                open = excluded.open, high = excluded.high, low = excluded.low,
+                close = excluded.close, volume = excluded.volume
+        """, [(asset_id, b["time"], b["open"], b["high"], b["low"], b["close"], int(b.get("volume") or 0)) for b in bars])
+
+    def _first_timestamp(self, symbol: str, asset_id: str) -> Optional[str]:
+        if symbol not in self._first_timestamps:
+            row = db.execute_one("SELECT MIN(timestamp) AS first FROM price_timeseries WHERE asset_id = ?", (asset_id,))
+            if not row or row["first"] is None:
+                return None
+            self._first_timestamps[symbol] = row["first"]
+        return self._first_timestamps[symbol]
+
+    def get_bars(self, symbol: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Stored bars for a symbol, oldest first; the most recent `limit` if given.
+        """
+        asset_id = self._asset_id(symbol, create=False)
+        if not asset_id:
+            return []
+
+        query = "SELECT timestamp, open, high, low, close, volume FROM price_timeseries WHERE asset_id = ? ORDER BY timestamp DESC"
+        params: tuple = (asset_id,)
+        if limit:
+            query += " LIMIT ?"
+            params += (limit,)
+        rows = db.execute(query, params)
+        return [
+            {"time": r["timestamp"], "open": r["open"], "high": r["high"], "low": r["low"], "close": r["close"], "volume": r["volume"]}
+            for r in reversed(rows)
+        ]
+
+    def get_recent_bars_many(self, symbols: Optional[List[str]] = None, bars: int = 120) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        The latest `bars` bars of many symbols (all stored symbols if None) in one query, oldest first.
+        """
+        where, params = "", ()
+        if symbols is not None:
+            if not symbols:
+                return {}
+            where = f"WHERE a.symbol IN ({', '.join('?' for _ in symbols)})"
+            params = tuple(symbols)
+
+        rows = db.execute(f"""
+            SELECT symbol, timestamp, open, high, low, close, volume FROM (
+                SELECT a.symbol, p.timestamp, p.open, p.high, p.low, p.close, p.volume,
+                       ROW_NUMBER() OVER (PARTITION BY p.asset_id ORDER BY p.timestamp DESC) AS rn
+                FROM price_timeseries p JOIN assets a ON a.id = p.asset_id
+                {where}
+            ) recent
+            WHERE rn <= ?
+            ORDER BY symbol, timestamp
+        """, params + (bars,))
+
+        result: Dict[str, List[Dict[str, Any]]] = {}
+        for r in rows:
+            result.setdefault(r["symbol"], []).append(
+                {"time": r["timestamp"], "open": r["open"], "high": r["high"], "low": r["low"], "close": r["close"], "volume": r["volume"]}
+            )
+        return result
+
+    def get_last_timestamp(self, symbol: str) -> Optional[str]:
+        asset_id = self._asset_id(symbol, create=False)
+        if not asset_id:
+            return None
+        return self._load_state(symbol, asset_id).last_timestamp
+
+    def get_indicators(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """
+        Latest streaming indicator values for a symbol, or None if no bars are stored.
+        """
+        asset_id = self._asset_id(symbol, create=False)
+        if not asset_id:
+            return None
+        state = self._load_state(symbol, asset_id)
+        if state.last_timestamp is None:
+            return None
+        return {"symbol": symbol, "interval": BAR_INTERVAL, "last_timestamp": state.last_timestamp, "bars": state.bars, **state.values()}
+
+    def rebuild_state(self, symbol: str):
+        """
+        Recomputes a symbol's indicator state from all of its stored bars.
+        """
+        asset_id = self._asset_id(symbol, create=False)
+        if not asset_id:
+            return
+        state = IndicatorState()
+        for bar in self.get_bars(symbol):
+            state.update(bar)
+        self._states[symbol] = state
+        self._save_state(asset_id, state)
+
+    def _load_state(self, symbol: str, asset_id: str) -> IndicatorState:
+        if symbol not in self._states:
+            row = db.execute_one("SELECT state FROM indicator_state WHERE asset_id = ?", (asset_id,))
+            self._states[symbol] = IndicatorState.from_dict(json.loads(row["state"])) if row else IndicatorState()
+        return self._states[symbol]
+
+    def _save_state(self, asset_id: str, state: IndicatorState):
+        db.execute("""
+            INSERT INTO indicator_state (asset_id, last_timestamp, state, updated_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT (asset_id) DO UPDATE SET
+                last_timestamp = excluded.last_timestamp, state = excluded.state, updated_at = excluded.updated_at
+        """, (asset_id, state.last_timestamp, json.dumps(state.to_dict()), datetime.now().isoformat()))
+
+bar_store = BarStore()
@@ -0,0 +1,174 @@
+import os
+import time
+import asyncio
+import threading
+from typing import Any, Callable, Dict
+
+from app.services.logger import logger_service
+
+CLOSED = "CLOSED"
+OPEN = "OPEN"
+HALF_OPEN = "HALF_OPEN"
+
+# Defaults; override per breaker with e.g. CB_OPENAI_FAILURE_THRESHOLD / CB_YAHOO_RECOVERY_TIMEOUT
+CB_FAILURE_THRESHOLD = int(os.getenv("CB_FAILURE_THRESHOLD", "5"))
+CB_RECOVERY_TIMEOUT = float(os.getenv("CB_RECOVERY_TIMEOUT", "30"))
+CB_HALF_OPEN_MAX_CALLS = int(os.getenv("CB_HALF_OPEN_MAX_CALLS", "1"))
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose breaker is open."""
+
+    def __init__(self, name: str):
+        super().__init__(f"Circuit '{name}' is open")
+        self.name = name
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker. After failure_threshold consecutive failures the circuit
+    opens and calls are rejected immediately; after recovery_timeout a limited number of
+    half-open probes decide whether it closes again or re-opens.
+    Thread-safe, since sync dependencies are called from worker threads.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = CB_FAILURE_THRESHOLD, recovery_timeout: float = CB_RECOVERY_TIMEOUT, half_open_max_calls: int = CB_HALF_OPEN_MAX_CALLS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.half_open_in_flight = 0
+        self._lock = threading.Lock()
+
+        self.metrics = {state: {"successes": 0, "failures": 0} for state in (CLOSED, HALF_OPEN)}
+        self.metrics["rejected"] = 0
+        self.metrics["times_opened"] = 0
+
+    def _transition(self, state: str):
+        # Caller holds the lock
+        if state == self.state:
+            return
+        previous, self.state = self.state, state
+        if state == OPEN:
+            self.opened_at = time.monotonic()
+            self.metrics["times_opened"] += 1
+        if state != HALF_OPEN:
+            self.half_open_in_flight = 0
+        logger_service.log("WARNING" if state == OPEN else "INFO", "CIRCUIT", f"{self.name}: {previous} -> {state}")
+
+    def is_available(self) -> bool:
+        """
+        Whether a call would currently be let through, without reserving a probe slot.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                return time.monotonic() - self.opened_at >= self.recovery_timeout
+            return self.half_open_in_flight < self.half_open_max_calls
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.recovery_timeout:
+                self._transition(HALF_OPEN)
+
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and self.half_open_in_flight < self.half_open_max_calls:
+                self.half_open_in_flight += 1
+                return True
+
+            self.metrics["rejected"] += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.metrics[HALF_OPEN if self.state == HALF_OPEN else CLOSED]["successes"] += 1
+            self.consecutive_failures = 0
+            self._transition(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.metrics[HALF_OPEN]["failures"] += 1
+                self._transition(OPEN)
+                return
+
+            self.metrics[CLOSED]["failures"] += 1
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.failure_threshold:
+                self._transition(OPEN)
+
+    def release(self):
+        """
+        Gives back a half-open probe slot for a call that ended without an outcome (e.g. cancelled).
+        """
+        with self._lock:
+            if self.state == HALF_OPEN and self.half_open_in_flight > 0:
+                self.half_open_in_flight -= 1
+
+    def call(self, fn: Callable, *args, **kwargs) -> Any:
+        if not self.allow_request():
+            raise CircuitOpenError(self.name)
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    async def call_async(self, factory: Callable) -> Any:
+        """
+        Awaits factory() under the breaker; factory must return a fresh awaitable.
+        """
+        if not self.allow_request():
+            raise CircuitOpenError(self.name)
+        try:
+            result = await factory()
+        except asyncio.CancelledError:
+            self.release()
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            retry_in = max(0.0, self.recovery_timeout - (time.monotonic() - self.opened_at)) if self.state == OPEN else 0.0
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "recovery_timeout": self.recovery_timeout,
+                "retry_in_seconds": round(retry_in, 1),
+                "metrics": {key: (dict(value) if isinstance(value, dict) else value) for key, value in self.metrics.items()}
+            }
+
+class CircuitBreakerRegistry:
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CircuitBreaker:
+        with self._lock:
+            if name not in self._breakers:
+                prefix = f"CB_{name.upper()}_"
+                self._breakers[name] = CircuitBreaker(
+                    name,
+                    failure_threshold=int(os.getenv(prefix + "FAILURE_THRESHOLD", CB_FAILURE_THRESHOLD)),
+                    recovery_timeout=float(os.getenv(prefix + "RECOVERY_TIMEOUT", CB_RECOVERY_TIMEOUT)),
+                    half_open_max_calls=int(os.getenv(prefix + "HALF_OPEN_MAX_CALLS", CB_HALF_OPEN_MAX_CALLS))
+                )
+            return self._breakers[name]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.name: breaker.get_stats() for breaker in breakers}
+
+circuit_breakers = CircuitBreakerRegistry()
@@ -0,0 +1,291 @@
+import os
+import csv
+import json
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional
+import yfinance as yf
+from app.database import db
+from app.services.asset_service import asset_service
+from app.services.logger import logger_service
+from app.services.circuit_breaker import circuit_breakers, CircuitOpenError
+from app.services.background import spawn
+
+# "yahoo" fetches Ticker.info; "file" loads FUNDAMENTALS_FILE (JSON or CSV)
+FUNDAMENTALS_SOURCE = os.getenv("FUNDAMENTALS_SOURCE", "yahoo")
+FUNDAMENTALS_FILE = os.getenv("FUNDAMENTALS_FILE", "data/fundamentals.json")
+
+# Background refresher configuration
+FUNDAMENTALS_REFRESH_INTERVAL = int(os.getenv("FUNDAMENTALS_REFRESH_INTERVAL", "3600"))
+FUNDAMENTALS_BATCH_SIZE = int(os.getenv("FUNDAMENTALS_BATCH_SIZE", "10"))
+# Minimum seconds between two Yahoo requests
+FUNDAMENTALS_REQUEST_INTERVAL = float(os.getenv("FUNDAMENTALS_REQUEST_INTERVAL", "1.0"))
+FUNDAMENTALS_MAX_SYMBOLS = int(os.getenv("FUNDAMENTALS_MAX_SYMBOLS", "200"))
+
+# Ratios with price in them move daily; statement and ownership data change quarterly
+PRICE_TTL = timedelta(hours=int(os.getenv("FUNDAMENTALS_PRICE_TTL_HOURS", "24")))
+STATEMENT_TTL = timedelta(days=int(os.getenv("FUNDAMENTALS_STATEMENT_TTL_DAYS", "30")))
+OWNERSHIP_TTL = timedelta(days=int(os.getenv("FUNDAMENTALS_OWNERSHIP_TTL_DAYS", "7")))
+
+# Strategy field -> (Ticker.info key, scale to the unit the strategies use, TTL)
+FIELDS = {
+    "pe_ratio": ("trailingPE", 1, PRICE_TTL),
+    "pb_ratio": ("priceToBook", 1, PRICE_TTL),
+    "dividend_yield": ("trailingAnnualDividendYield", 100, PRICE_TTL),
+    "recent_gain_pct": ("52WeekChange", 100, PRICE_TTL),
+    "market_cap": ("marketCap", 1, PRICE_TTL),
+    "free_cashflow": ("freeCashflow", 1, STATEMENT_TTL),
+    "current_ratio": ("currentRatio", 1, STATEMENT_TTL),
+    # Yahoo reports debt/equity as a percentage
+    "debt_to_equity": ("debtToEquity", 0.01, STATEMENT_TTL),
+    "earnings_growth": ("earningsGrowth", 100, STATEMENT_TTL),
+    "roe": ("returnOnEquity", 100, STATEMENT_TTL),
+    "gross_margin": ("grossMargins", 100, STATEMENT_TTL),
+    "institutional_ownership": ("heldPercentInstitutions", 100, OWNERSHIP_TTL),
+    "insider_ownership": ("heldPercentInsiders", 100, OWNERSHIP_TTL),
+    "beta": ("beta", 1, OWNERSHIP_TTL),
+}
+# Derived after loading: free cash flow over market cap, in percent
+DERIVED_FIELDS = {"fcf_yield": PRICE_TTL}
+
+def field_ttl(field: str) -> timedelta:
+    if field in FIELDS:
+        return FIELDS[field][2]
+    return DERIVED_FIELDS.get(field, STATEMENT_TTL)
+
+class FundamentalsService:
+    """
+    Local store of per-symbol fundamentals (assets.db fundamentals table).
+    Reads never touch the network: a background loop fetches symbols with expired
+    fields in rate-limited batches, and a read of an unknown symbol only queues it.
+    """
+
+    def __init__(self):
+        self.is_refreshing = False
+        self.refresher_running = False
+        self._pending: set = set()
+        self._last_request = 0.0
+        # Bumped on every write so derived tables (the screener) know to reload
+        self.version = 0
+        self.stats = {"symbols_fetched": 0, "fetch_errors": 0, "fields_written": 0, "cycles": 0}
+
+    def get(self, symbol: str) -> Dict[str, Any]:
+        """
+        Stored fundamentals for a symbol with their age; expired fields are still returned
+        (and listed under "stale") until the refresher replaces them. Unknown or stale
+        symbols are queued for a background fetch.
+        """
+        rows = db.execute("SELECT field, value, source, fetched_at FROM fundamentals WHERE symbol = ?", (symbol,))
+        now = datetime.now()
+        data, stale, sources, fetched = {}, [], set(), []
+        for row in rows:
+            if row["value"] is None:
+                continue
+            data[row["field"]] = row["value"]
+            sources.add(row["source"])
+            fetched.append(row["fetched_at"])
+            if now - datetime.fromisoformat(row["fetched_at"]) > field_ttl(row["field"]):
+                stale.append(row["field"])
+
+        if not rows or stale:
+            self.request(symbol)
+
+        return {
+            "symbol": symbol,
+            "data": data,
+            "stale": sorted(stale),
+            "source": ",".join(sorted(sources)) or None,
+            "as_of": min(fetched) if fetched else None
+        }
+
+    def request(self, symbol: str):
+        """
+        Queues a symbol for an immediate background fetch without waiting for it.
+        Safe to call from worker threads: the queueing itself happens on the event loop.
+        """
+        if FUNDAMENTALS_SOURCE == "file":
+            # The file is reloaded by the refresher loop
+            return
+        if not spawn(lambda: self._request_async(symbol)):
+            # No event loop (scripts); the refresher loop will pick it up
+            self._pending.add(symbol)
+
+    async def _request_async(self, symbol: str):
+        self._pending.add(symbol)
+        # A refresh already running picks the symbol up before it finishes
+        await self.refresh_async([])
+
+    def get_stale_symbols(self, symbols: List[str]) -> List[str]:
+        """
+        Symbols with no stored fundamentals or at least one expired field.
+        """
+        if not symbols:
+            return []
+        placeholders = ", ".join("?" for _ in symbols)
+        rows = db.execute(f"SELECT symbol, field, fetched_at FROM fundamentals WHERE symbol IN ({placeholders})", tuple(symbols))
+
+        now = datetime.now()
+        known, stale = set(), set()
+        for row in rows:
+            known.add(row["symbol"])
+            if now - datetime.fromisoformat(row["fetched_at"]) > field_ttl(row["field"]):
+                stale.add(row["symbol"])
+        return [s for s in symbols if s not in known or s in stale]
+
+    def _tracked_symbols(self) -> List[str]:
+        # Indices and crypto have no company fundamentals
+        return [a["symbol"] for a in asset_service.get_assets(limit=FUNDAMENTALS_MAX_SYMBOLS, asset_type="Stock")]
+
+    async def refresh_async(self, symbols: Optional[List[str]] = None) -> int:
+        """
+        Fetches stale symbols (plus any queued ones) in batches off the event loop.
+        Returns the number of symbols updated.
+        """
+        if self.is_refreshing:
+            return 0
+
+        self.is_refreshing = True
+        updated = 0
+        try:
+            if FUNDAMENTALS_SOURCE == "file":
+                return await asyncio.to_thread(self.load_file, FUNDAMENTALS_FILE)
+
+            requested = list(symbols if symbols is not None else self._tracked_symbols())
+            # Symbols queued while a pass runs are fetched in another pass before returning
+            while requested or self._pending:
+                candidates = list(dict.fromkeys(list(self._pending) + requested))
+                self._pending.clear()
+                requested = []
+                stale = self.get_stale_symbols(candidates)
+                fetched = 0
+                for start in range(0, len(stale), FUNDAMENTALS_BATCH_SIZE):
+                    batch = stale[start:start + FUNDAMENTALS_BATCH_SIZE]
+                    fetched += await asyncio.to_thread(self._fetch_batch, batch)
+                if stale:
+                    logger_service.log("INFO", "FUNDAMENTALS", f"Refreshed fundamentals for {fetched}/{len(stale)} symbols")
+                updated += fetched
+        finally:
+            self.is_refreshing = False
+            self.stats["cycles"] += 1
+        return updated
+
+    def _fetch_batch(self, symbols: List[str]) -> int:
+        rows = []
+        fetched = 0
+        for symbol in symbols:
+            # Spread requests out to stay under Yahoo's rate limit
+            wait = FUNDAMENTALS_REQUEST_INTERVAL - (time.monotonic() - self._last_request)
+            if wait > 0:
+                time.sleep(wait)
+            self._last_request = time.monotonic()
+
+            try:
+                info = circuit_breakers.get("yahoo").call(lambda: yf.Ticker(symbol).info)
+            except CircuitOpenError:
+                # Yahoo is down; leave the rest of the batch stale for the next cycle
+                break
+            except Exception as e:
+                self.stats["fetch_errors"] += 1
+                logger_service.log("WARNING", "FUNDAMENTALS", f"Fundamentals fetch failed for {symbol}", {"error": str(e)})
+                continue
+
+            rows.extend(self._rows(symbol, self.from_info(info or {}), "yahoo"))
+            fetched += 1
+
+        self._write(rows)
+        self.stats["symbols_fetched"] += fetched
+        return fetched
+
+    def from_info(self, info: Dict[str, Any]) -> Dict[str, Optional[float]]:
+        """
+        Maps a Ticker.info dict onto strategy fields. Missing values are kept as None so the
+        field is marked fresh and not refetched every cycle.
+        """
+        values: Dict[str, Optional[float]] = {}
+        for field, (key, scale, _) in FIELDS.items():
+            raw = info.get(key)
+            values[field] = float(raw) * scale if isinstance(raw, (int, float)) and not isinstance(raw, bool) else None
+        return self._derive(values)
+
+    def _derive(self, values: Dict[str, Optional[float]]) -> Dict[str, Optional[float]]:
+        cashflow, market_cap = values.get("free_cashflow"), values.get("market_cap")
+        if "fcf_yield" not in values:
+            values["fcf_yield"] = cashflow / market_cap * 100 if cashflow is not None and market_cap else None
+        return values
+
+    def load_file(self, path: str = FUNDAMENTALS_FILE) -> int:
+        """
+        Imports fundamentals from a local file: JSON {symbol: {field: value}} or CSV with a
+        symbol column and one column per field. Returns the number of symbols loaded.
+        """
+        if not os.path.exists(path):
+            logger_service.log("WARNING", "FUNDAMENTALS", f"Fundamentals file not found: {path}")
+            return 0
+
+        if path.endswith(".csv"):
+            with open(path, newline="") as f:
+                records = {row.pop("symbol"): row for row in csv.DictReader(f)}
+        else:
+            with open(path, "r") as f:
+                records = json.load(f)
+
+        known = set(FIELDS) | set(DERIVED_FIELDS)
+        rows = []
+        for symbol, fields in records.items():
+            values = {}
+            for field, raw in fields.items():
+                if field not in known:
+                    continue
+                try:
+                    values[field] = float(raw) if raw not in (None, "") else None
+                except (TypeError, ValueError):
+                    values[field] = None
+            rows.extend(self._rows(symbol, self._derive(values), "file"))
+
+        self._write(rows)
+        logger_service.log("INFO", "FUNDAMENTALS", f"Loaded fundamentals for {len(records)} symbols from {path}")
+        return len(records)
+
+    def _rows(self, symbol: str, values: Dict[str, Optional[float]], source: str) -> List[tuple]:
+        fetched_at = datetime.now().isoformat()
+        return [(symbol, field, value, source, fetched_at) for field, value in values.items()]
+
+    def _write(self, rows: List[tuple]):
+        if not rows:
+            return
+        db.executemany("""
+            INSERT INTO fundamentals (symbol, field, value, source, fetched_at) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (symbol, field) DO UPDATE SET
+                value = excluded.value, source = excluded.source, fetched_at = excluded.fetched_at
+        """, rows)
+        self.version += 1
+        self.stats["fields_written"] += len(rows)
+
+    async def start_refresher(self, interval: int = FUNDAMENTALS_REFRESH_INTERVAL):
+        """
+        Background loop that keeps the fundamentals store fresh.
+        """
+        if self.refresher_running:
+            return
+
+        self.refresher_running = True
+        logger_service.log("INFO", "FUNDAMENTALS", "Background fundamentals refresher started", {"interval": interval, "source": FUNDAMENTALS_SOURCE})
+
+        while self.refresher_running:
+            try:
+                await self.refresh_async()
+            except Exception as e:
+                logger_service.log("ERROR", "FUNDAMENTALS", "Fundamentals refresh cycle failed", {"error": str(e)})
+
+            await asyncio.sleep(interval)
+
+    def stop_refresher(self):
+        self.refresher_running = False
+        logger_service.log("INFO", "FUNDAMENTALS", "Background fundamentals refresher stopped")
+
+    def get_stats(self) -> Dict[str, Any]:
+        row = db.execute_one("SELECT COUNT(DISTINCT symbol) AS symbols, COUNT(*) AS fields FROM fundamentals")
+        return {**self.stats, "symbols_stored": row["symbols"], "fields_stored": row["fields"], "source": FUNDAMENTALS_SOURCE, "pending": len(self._pending)}
+
+fundamentals_service = FundamentalsService()
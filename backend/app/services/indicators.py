@@ -0,0 +1,189 @@
+import math
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import List, Dict, Any, Optional, Tuple
+
+# Bound on (1 - alpha) ** -block so the block weights stay far from float64 overflow;
+# rounding error per value stays around eps * block * |x| whatever the bound
+_EWM_MAX_GROWTH = 1e100
+
+def as_array(values) -> np.ndarray:
+    return np.asarray(values, dtype=float)
+
+def _ewm(values: np.ndarray, alpha: float, start: int, seed) -> np.ndarray:
+    """
+    y[start] = seed, y[t] = y[t-1] + alpha * (x[t] - y[t-1]) afterwards; NaN before start.
+    Evaluated in closed form over blocks short enough to stay numerically stable.
+    Works along axis 0, so a (time x symbol) matrix is filtered per column in one pass.
+    """
+    out = np.full(values.shape, np.nan)
+    if start >= len(values):
+        return out
+    out[start] = seed
+
+    decay = 1.0 - alpha
+    if decay <= 0:
+        out[start + 1:] = values[start + 1:]
+        return out
+    block = max(1, int(math.log(_EWM_MAX_GROWTH) / -math.log(decay)))
+    last = seed
+    i = start + 1
+    while i < len(values):
+        x = values[i:i + block]
+        powers = (decay ** np.arange(1, len(x) + 1)).reshape((-1,) + (1,) * (values.ndim - 1))
+        # y[k] = decay^k * last + alpha * sum_j decay^(k-j) * x[j]
+        out[i:i + len(x)] = powers * (last + alpha * np.cumsum(x / powers, axis=0))
+        last = out[i + len(x) - 1]
+        i += block
+    return out
+
+def sma(values, period: int) -> np.ndarray:
+    """
+    Simple moving average along axis 0.
+    """
+    values = as_array(values)
+    out = np.full(values.shape, np.nan)
+    if len(values) >= period:
+        sums = np.cumsum(np.concatenate((np.zeros((1,) + values.shape[1:]), values)), axis=0)
+        out[period - 1:] = (sums[period:] - sums[:-period]) / period
+    return out
+
+def ema(values, period: int) -> np.ndarray:
+    """
+    Exponential moving average (alpha = 2 / (period + 1)) seeded with the SMA of the first period values.
+    """
+    values = as_array(values)
+    if len(values) < period:
+        return np.full(values.shape, np.nan)
+    return _ewm(values, 2.0 / (period + 1), period - 1, values[:period].mean(axis=0))
+
+def wilder(values, period: int, start: int = 0) -> np.ndarray:
+    """
+    Wilder's smoothing (alpha = 1 / period) of values[start:], seeded with their first period-bar mean.
+    """
+    values = as_array(values)
+    if len(values) - start < period:
+        return np.full(values.shape, np.nan)
+    return _ewm(values, 1.0 / period, start + period - 1, values[start:start + period].mean(axis=0))
+
+def rsi(closes, period: int = 14) -> np.ndarray:
+    """
+    Wilder's RSI; NaN for the first period bars. Accepts a (time x symbol) matrix.
+    """
+    closes = as_array(closes)
+    deltas = np.diff(closes, axis=0, prepend=closes[:1])
+    avg_gain = wilder(np.clip(deltas, 0, None), period, start=1)
+    avg_loss = wilder(np.clip(-deltas, 0, None), period, start=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = 100 - 100 / (1 + avg_gain / avg_loss)
+    # No losses in the window: RSI is pinned at 100 (50 when price didn't move at all)
+    flat = avg_loss == 0
+    values[flat] = np.where(avg_gain[flat] > 0, 100.0, 50.0)
+    return values
+
+def macd(closes, fast: int = 12, slow: int = 26, signal: int = 9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (macd line, signal line, histogram).
+    """
+    closes = as_array(closes)
+    line = ema(closes, fast) - ema(closes, slow)
+    signal_line = np.full(len(closes), np.nan)
+    if len(closes) >= slow - 1 + signal:
+        signal_line[slow - 1:] = ema(line[slow - 1:], signal)
+    return line, signal_line, line - signal_line
+
+def rolling_std(values, period: int) -> np.ndarray:
+    values = as_array(values)
+    out = np.full(len(values), np.nan)
+    if len(values) >= period:
+        out[period - 1:] = sliding_window_view(values, period).std(axis=1)
+    return out
+
+def bollinger(closes, period: int = 20, width: float = 2.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (middle, upper, lower) bands with population standard deviation.
+    """
+    middle = sma(closes, period)
+    deviation = rolling_std(closes, period)
+    return middle, middle + width * deviation, middle - width * deviation
+
+def true_range(high, low, close) -> np.ndarray:
+    high, low, close = as_array(high), as_array(low), as_array(close)
+    prev_close = np.concatenate(([close[0]], close[:-1])) if len(close) else close
+    return np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+def atr(high, low, close, period: int = 14) -> np.ndarray:
+    return wilder(true_range(high, low, close), period)
+
+def adx(high, low, close, period: int = 14) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (ADX, +DI, -DI) per Wilder.
+    """
+    high, low, close = as_array(high), as_array(low), as_array(close)
+    up = np.diff(high, prepend=high[:1])
+    down = -np.diff(low, prepend=low[:1])
+    plus_dm = np.where((up > down) & (up > 0), up, 0.0)
+    minus_dm = np.where((down > up) & (down > 0), down, 0.0)
+
+    smoothed_tr = wilder(true_range(high, low, close), period, start=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        plus_di = 100 * wilder(plus_dm, period, start=1) / smoothed_tr
+        minus_di = 100 * wilder(minus_dm, period, start=1) / smoothed_tr
+        dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+
+    # DX exists from bar `period`; ADX smooths the next `period` DX values
+    adx_values = wilder(np.nan_to_num(dx), period, start=period) if len(dx) >= 2 * period else np.full(len(dx), np.nan)
+    return adx_values, plus_di, minus_di
+
+def _last(values: np.ndarray, offset: int = 1) -> Optional[float]:
+    if len(values) < offset or np.isnan(values[-offset]):
+        return None
+    return round(float(values[-offset]), 4)
+
+def snapshot(price_history: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Latest value of every indicator for a bar list; None where history is too short.
+    prev_* entries are the previous bar's values, for crossover checks.
+    """
+    if not price_history:
+        return {}
+
+    high = as_array([p["high"] for p in price_history])
+    low = as_array([p["low"] for p in price_history])
+    close = as_array([p["close"] for p in price_history])
+
+    sma20, sma50 = sma(close, 20), sma(close, 50)
+    macd_line, macd_signal, macd_hist = macd(close)
+    bb_middle, bb_upper, bb_lower = bollinger(close)
+    adx_values, plus_di, minus_di = adx(high, low, close)
+
+    return {
+        "rsi": _last(rsi(close)),
+        "sma20": _last(sma20),
+        "sma50": _last(sma50),
+        "prev_sma20": _last(sma20, 2),
+        "prev_sma50": _last(sma50, 2),
+        "ema12": _last(ema(close, 12)),
+        "ema26": _last(ema(close, 26)),
+        "macd": _last(macd_line),
+        "macd_signal": _last(macd_signal),
+        "macd_hist": _last(macd_hist),
+        "bb_middle": _last(bb_middle),
+        "bb_upper": _last(bb_upper),
+        "bb_lower": _last(bb_lower),
+        "atr": _last(atr(high, low, close)),
+        "adx": _last(adx_values),
+        "plus_di": _last(plus_di),
+        "minus_di": _last(minus_di)
+    }
+
+def format_snapshot(values: Dict[str, Any]) -> str:
+    """
+    One-line indicator summary for LLM prompts.
+    """
+    labels = [
+        ("rsi", "RSI14"), ("macd", "MACD"), ("macd_signal", "signal"), ("adx", "ADX14"),
+        ("sma20", "SMA20"), ("sma50", "SMA50"), ("bb_upper", "BB upper"), ("bb_lower", "BB lower"), ("atr", "ATR14")
+    ]
+    parts = [f"{label} {values[key]:g}" for key, label in labels if values.get(key) is not None]
+    return ", ".join(parts) if parts else "Not enough history."
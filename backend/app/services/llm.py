@@ -1,15 +1,42 @@
 import os
 import json
+import time
+import asyncio
 import logging
-from typing import Dict, Any, List
-from openai import OpenAI
+from collections import deque
+from typing import Dict, Any, List, Optional
+from openai import AsyncOpenAI
 import google.generativeai as genai
 from dotenv import load_dotenv
+from app.services.llm_cache import llm_cache
+from app.services.circuit_breaker import circuit_breakers, CircuitOpenError
+from app.services.indicators import snapshot, format_snapshot
+from app.services.analysis_cache import analysis_cache
+from app.services.prompt_encoding import encode_price_series, LLM_PRICE_TOKEN_BUDGET
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+OPENAI_MODEL = "gpt-4o"
+GEMINI_MODEL = "gemini-pro"
+ANALYST_SYSTEM_PROMPT = "You are a financial analyst AI. Output JSON only."
+
+# Hard deadline per provider call (including time queued for a slot), and max in-flight calls per provider
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "20"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+
+# Hedging: if the primary provider hasn't answered by its p95 latency, race the secondary
+LLM_HEDGE = os.getenv("LLM_HEDGE", "false").lower() in ("1", "true", "yes")
+LLM_HEDGE_DEFAULT_DELAY = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY", "4"))
+LLM_LATENCY_SAMPLES = 100
+LLM_MIN_SAMPLES_FOR_P95 = 20
+
+# Symbols packed into one pattern-detection request in batch mode
+LLM_BATCH_SYMBOLS = int(os.getenv("LLM_BATCH_SYMBOLS", "10"))
+
+PATTERN_SYSTEM_PROMPT = "You are a technical analysis expert. Output JSON only."
+
 class LLMService:
     def __init__(self):
         self.openai_key = os.getenv("OPENAI_API_KEY")
@@ -18,7 +45,8 @@ class LLMService:
         self.openai_client = None
         if self.openai_key:
             try:
-                self.openai_client = OpenAI(api_key=self.openai_key)
+                # Retries are ours to decide (fallback/hedge), not the SDK's
+                self.openai_client = AsyncOpenAI(api_key=self.openai_key, timeout=LLM_TIMEOUT_SECONDS, max_retries=0)
                 logger.info("OpenAI client initialized.")
             except Exception as e:
                 logger.error(f"Failed to initialize OpenAI client: {e}")
@@ -26,66 +54,201 @@ class LLMService:
         if self.gemini_key:
             try:
                 genai.configure(api_key=self.gemini_key)
-                self.gemini_model = genai.GenerativeModel('gemini-pro')
+                self.gemini_model = genai.GenerativeModel(GEMINI_MODEL)
                 logger.info("Gemini client initialized.")
             except Exception as e:
                 logger.error(f"Failed to initialize Gemini client: {e}")
 
-    async def _call_openai(self, prompt: str) -> Dict[str, Any]:
-        import asyncio
-        def _sync_call():
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o",
+        self._semaphores = {
+            "openai": asyncio.Semaphore(LLM_MAX_CONCURRENCY),
+            "gemini": asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+        }
+        self._latencies = {
+            "openai": deque(maxlen=LLM_LATENCY_SAMPLES),
+            "gemini": deque(maxlen=LLM_LATENCY_SAMPLES)
+        }
+        self.provider_stats = {
+            provider: {"calls": 0, "errors": 0, "timeouts": 0, "skipped": 0, "in_flight": 0}
+            for provider in ("openai", "gemini")
+        }
+        self.hedge_stats = {"hedged": 0, "secondary_won": 0}
+
+    async def _call_openai(self, prompt: str, system: str = ANALYST_SYSTEM_PROMPT) -> Dict[str, Any]:
+        cache_prompt = f"{system}\n{prompt}"
+        cached = llm_cache.get("openai", OPENAI_MODEL, cache_prompt)
+        if cached is not None:
+            return cached
+
+        async def _call():
+            response = await self.openai_client.chat.completions.create(
+                model=OPENAI_MODEL,
                 messages=[
-                    {"role": "system", "content": "You are a financial analyst AI. Output JSON only."},
+                    {"role": "system", "content": system},
                     {"role": "user", "content": prompt}
                 ],
                 response_format={"type": "json_object"}
             )
             return json.loads(response.choices[0].message.content)
-            
-        return await asyncio.to_thread(_sync_call)
+
+        result = await self._bounded_call("openai", _call)
+        llm_cache.set("openai", OPENAI_MODEL, cache_prompt, result)
+        return result
 
     async def _call_gemini(self, prompt: str) -> Dict[str, Any]:
-        import asyncio
-        def _sync_call():
-            response = self.gemini_model.generate_content(prompt)
+        cached = llm_cache.get("gemini", GEMINI_MODEL, prompt)
+        if cached is not None:
+            return cached
+
+        async def _call():
+            response = await self.gemini_model.generate_content_async(prompt)
             text = response.text.replace("```json", "").replace("```", "").strip()
             return json.loads(text)
-            
-        return await asyncio.to_thread(_sync_call)
 
-    async def analyze_market(self, symbol: str, price_history: List[Dict[str, Any]], news: List[Dict[str, Any]], technicals: Dict[str, Any] = None, learning_context: str = "") -> Dict[str, Any]:
+        result = await self._bounded_call("gemini", _call)
+        llm_cache.set("gemini", GEMINI_MODEL, prompt, result)
+        return result
+
+    async def _bounded_call(self, provider: str, call) -> Any:
         """
-        Analyzes market data and news to generate a buy/sell signal and reasoning.
+        Runs a provider call under its circuit breaker, concurrency limit and hard deadline, recording latency.
+        Raises CircuitOpenError straight away while the provider is known to be down.
         """
-        prompt = self._construct_prompt(symbol, price_history, news, technicals, learning_context)
-        
-        # Try OpenAI first
+        stats = self.provider_stats[provider]
+
+        async def _run():
+            stats["calls"] += 1
+            async with self._semaphores[provider]:
+                stats["in_flight"] += 1
+                started = time.perf_counter()
+                try:
+                    result = await call()
+                finally:
+                    stats["in_flight"] -= 1
+                self._latencies[provider].append(time.perf_counter() - started)
+                return result
+
+        try:
+            return await circuit_breakers.get(provider).call_async(lambda: asyncio.wait_for(_run(), timeout=LLM_TIMEOUT_SECONDS))
+        except CircuitOpenError:
+            stats["skipped"] += 1
+            raise
+        except asyncio.TimeoutError:
+            stats["timeouts"] += 1
+            raise
+        except Exception:
+            stats["errors"] += 1
+            raise
+
+    def _p95_latency(self, provider: str) -> float:
+        samples = sorted(self._latencies[provider])
+        if len(samples) < LLM_MIN_SAMPLES_FOR_P95:
+            return LLM_HEDGE_DEFAULT_DELAY
+        return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+    def _providers(self, prompt: str, system: str) -> List[tuple]:
+        """
+        Available providers in preference order, as (name, zero-arg coroutine factory).
+        """
+        providers = []
         if self.openai_client:
-            try:
-                return await self._call_openai(prompt)
-            except Exception as e:
-                logger.error(f"OpenAI call failed: {e}")
-        
-        # Fallback to Gemini
+            providers.append(("openai", lambda: self._call_openai(prompt, system=system)))
         if self.gemini_key:
+            providers.append(("gemini", lambda: self._call_gemini(prompt)))
+        return providers
+
+    async def _generate(self, prompt: str, system: str = ANALYST_SYSTEM_PROMPT) -> Optional[Any]:
+        """
+        Gets a JSON response from the first provider that answers.
+        Falls back in order, or hedges the second provider in after the first one's p95 latency.
+        Returns None if every provider failed or none is configured.
+        """
+        providers = self._providers(prompt, system)
+        if LLM_HEDGE and len(providers) >= 2:
+            return await self._generate_hedged(providers[0], providers[1])
+
+        for name, factory in providers:
             try:
-                return await self._call_gemini(prompt)
+                return await factory()
+            except CircuitOpenError:
+                continue
             except Exception as e:
-                logger.error(f"Gemini call failed: {e}")
+                logger.error(f"{name} call failed: {e!r}")
+        return None
+
+    async def _generate_hedged(self, primary: tuple, secondary: tuple) -> Optional[Any]:
+        primary_name, primary_factory = primary
+        secondary_name, secondary_factory = secondary
+
+        primary_task = asyncio.create_task(primary_factory())
+        done, _ = await asyncio.wait({primary_task}, timeout=self._p95_latency(primary_name))
+        if done and not primary_task.exception():
+            return primary_task.result()
+
+        if not done:
+            self.hedge_stats["hedged"] += 1
+        elif not isinstance(primary_task.exception(), CircuitOpenError):
+            logger.error(f"{primary_name} call failed: {primary_task.exception()!r}")
+
+        secondary_task = asyncio.create_task(secondary_factory())
+        pending = {secondary_task} if done else {primary_task, secondary_task}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception():
+                        if isinstance(task.exception(), CircuitOpenError):
+                            continue
+                        name = primary_name if task is primary_task else secondary_name
+                        logger.error(f"{name} call failed: {task.exception()!r}")
+                        continue
+                    if task is secondary_task:
+                        self.hedge_stats["secondary_won"] += 1
+                    return task.result()
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def get_provider_stats(self) -> Dict[str, Any]:
+        return {
+            "providers": {
+                provider: {
+                    **stats,
+                    "p95_latency_seconds": round(self._p95_latency(provider), 3),
+                    "samples": len(self._latencies[provider]),
+                    "circuit": circuit_breakers.get(provider).state
+                }
+                for provider, stats in self.provider_stats.items()
+            },
+            "hedging": {"enabled": LLM_HEDGE, **self.hedge_stats},
+            "timeout_seconds": LLM_TIMEOUT_SECONDS,
+            "max_concurrency": LLM_MAX_CONCURRENCY
+        }
+
+    async def analyze_market(self, symbol: str, price_history: List[Dict[str, Any]], news: List[Dict[str, Any]], technicals: Dict[str, Any] = None, learning_context: str = "") -> Dict[str, Any]:
+        """
+        Analyzes market data and news to generate a buy/sell signal and reasoning.
+        """
+        prompt = self._construct_prompt(symbol, price_history, news, technicals, learning_context)
+        
+        # OpenAI first, then Gemini (fallback or hedged)
+        result = await self._generate(prompt)
+        if isinstance(result, dict):
+            return result
 
         # Fallback if both fail or no keys
         return self._mock_analysis(symbol, price_history)
 
     def _construct_prompt(self, symbol: str, price_history: List[Dict[str, Any]], news: List[Dict[str, Any]], technicals: Dict[str, Any], learning_context: str) -> str:
         # Format recent price data (last 5 days)
-        recent_prices = price_history[-5:] if len(price_history) >= 5 else price_history
-        price_str = "\n".join([f"{p['time']}: Close {p['close']}" for p in recent_prices])
+        price_str = encode_price_series(price_history, fields="c", max_rows=5) if price_history else "No price data."
+        indicator_str = "Not enough history."
+        if price_history:
+            indicator_str = format_snapshot(analysis_cache.get_or_compute("indicators", symbol, price_history, lambda: snapshot(price_history)))
         
         # Format recent news (last 3 items)
         recent_news = news[:3] if len(news) >= 3 else news
-        news_str = "\n".join([f"- {n['title']} ({n['publisher']})" for n in recent_news])
+        news_str = "\n".join([f"- {n['title']} ({n['publisher']}) [{n.get('sentiment') or 'Neutral'}]" for n in recent_news])
         
         # Format Technicals
         tech_str = "No technical data available."
@@ -108,8 +271,9 @@ class LLMService:
 
         1. Technical Overview (TradingView Data):
         {tech_str}
+        Computed indicators: {indicator_str}
 
-        2. Recent Price Action (OHLCV):
+        2. Recent Price Action (closes):
         {price_str}
 
         3. Fundamental Context (News):
@@ -156,19 +320,58 @@ class LLMService:
             }
         }
 
+    async def summarize_headlines(self, headlines: List[str]) -> List[Dict[str, Any]]:
+        """
+        Summarizes a batch of news headlines in a single request.
+        Returns one {"summary", "sentiment"} dict per headline, in order, or [] if no provider answered.
+        Headlines the model skipped come back with an empty summary.
+        """
+        numbered = "\n".join([f"{i}. {headline}" for i, headline in enumerate(headlines)])
+        prompt = f"""
+        Summarize each of the following financial news headlines in 1 sentence and give its market sentiment.
+
+        Headlines:
+        {numbered}
+
+        Output a JSON object with one entry per headline, using the headline's number as "index":
+        {{
+            "items": [
+                {{"index": 0, "summary": "One sentence summary.", "sentiment": "Bullish" | "Bearish" | "Neutral"}}
+            ]
+        }}
+        """
+
+        result = await self._generate(prompt)
+        if not isinstance(result, dict):
+            return []
+
+        by_index = {}
+        for item in result.get("items", []):
+            if isinstance(item, dict) and isinstance(item.get("index"), int):
+                by_index[item["index"]] = item
+
+        summaries = []
+        for i in range(len(headlines)):
+            item = by_index.get(i, {})
+            sentiment = item.get("sentiment")
+            summaries.append({
+                "summary": str(item.get("summary") or "").strip(),
+                "sentiment": sentiment if sentiment in ("Bullish", "Bearish", "Neutral") else "Neutral"
+            })
+        return summaries
+
     async def detect_patterns(self, symbol: str, price_history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Uses LLM to detect technical chart patterns from price history.
         """
         # Format data for the prompt (last 30 candles is usually good for short-term patterns)
-        recent_prices = price_history[-30:] if len(price_history) >= 30 else price_history
-        price_str = "\n".join([f"{p['time']}: Open {p['open']}, High {p['high']}, Low {p['low']}, Close {p['close']}" for p in recent_prices])
+        price_str = encode_price_series(price_history, fields="ohlc", max_rows=30)
         
         prompt = f"""
         Analyze the following OHLCV price data for {symbol} and identify any significant technical chart patterns.
         Look for patterns like: Head and Shoulders, Double Top/Bottom, Bull/Bear Flags, Triangles, Wedges, or Candlestick patterns (Doji, Hammer, Engulfing).
         
-        Price Data:
+        Price Data (OHLC as % vs the base close; give stop_loss and target_price as absolute prices):
         {price_str}
         
         Return a JSON list of detected patterns. If no clear patterns are found, return an empty list.
@@ -186,46 +389,96 @@ class LLMService:
         ]
         """
         
-        import asyncio
-        
-        try:
-            # Try OpenAI first
-            if self.openai_client:
-                def _openai_call():
-                    response = self.openai_client.chat.completions.create(
-                        model="gpt-4o",
-                        messages=[
-                            {"role": "system", "content": "You are a technical analysis expert. Output JSON only."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        response_format={"type": "json_object"}
-                    )
-                    return json.loads(response.choices[0].message.content)
-                
-                result = await asyncio.to_thread(_openai_call)
-                
-                # Handle potential wrapper keys like {"patterns": [...]}
-                if isinstance(result, dict) and "patterns" in result:
-                    return result["patterns"]
-                return result if isinstance(result, list) else []
-
-            # Fallback to Gemini
-            elif self.gemini_key:
-                def _gemini_call():
-                    response = self.gemini_model.generate_content(prompt)
-                    text = response.text.replace("```json", "").replace("```", "").strip()
-                    return json.loads(text)
-                    
-                result = await asyncio.to_thread(_gemini_call)
-                
-                if isinstance(result, dict) and "patterns" in result:
-                    return result["patterns"]
-                return result if isinstance(result, list) else []
-                
-        except Exception as e:
-            logger.error(f"LLM Pattern detection failed: {e}")
+        result = await self._generate(prompt, system=PATTERN_SYSTEM_PROMPT)
+
+        # Handle potential wrapper keys like {"patterns": [...]}
+        if isinstance(result, dict) and "patterns" in result:
+            result = result["patterns"]
+        return self._validate_patterns(result)
+
+    async def detect_patterns_batch(self, histories: Dict[str, List[Dict[str, Any]]]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Detects chart patterns for many symbols, packing LLM_BATCH_SYMBOLS compact price
+        summaries into each request. Returns validated patterns per symbol ([] if none or on failure).
+        """
+        symbols = [symbol for symbol, history in histories.items() if history]
+        chunks = [symbols[i:i + LLM_BATCH_SYMBOLS] for i in range(0, len(symbols), LLM_BATCH_SYMBOLS)]
+
+        results: Dict[str, List[Dict[str, Any]]] = {symbol: [] for symbol in histories}
+        for chunk_results in await asyncio.gather(*[self._detect_patterns_chunk(chunk, histories) for chunk in chunks]):
+            results.update(chunk_results)
+        return results
+
+    async def _detect_patterns_chunk(self, symbols: List[str], histories: Dict[str, List[Dict[str, Any]]]) -> Dict[str, List[Dict[str, Any]]]:
+        # Split the price budget across the packed symbols
+        budget = max(60, LLM_PRICE_TOKEN_BUDGET * 2 // len(symbols))
+        summaries = "\n".join([
+            f"## {symbol}\n{encode_price_series(histories[symbol], fields='c', max_rows=20, token_budget=budget)}"
+            for symbol in symbols
+        ])
+        prompt = f"""
+        Identify significant technical chart patterns for each asset below.
+        Look for patterns like: Head and Shoulders, Double Top/Bottom, Bull/Bear Flags, Triangles, Wedges, or Candlestick patterns (Doji, Hammer, Engulfing).
+
+        Each "## SYMBOL" block has a summary line, then closes as % vs the base close (oldest to newest).
+        Give stop_loss and target_price as absolute prices.
+        {summaries}
+
+        Return a JSON object keyed by symbol. Use an empty list for symbols without a clear pattern.
+        {{
+            "results": {{
+                "SYMBOL": [
+                    {{
+                        "name": "Pattern Name",
+                        "type": "Bullish" | "Bearish",
+                        "description": "Brief explanation.",
+                        "reliability": "High" | "Medium" | "Low",
+                        "stop_loss": float (suggested price level),
+                        "target_price": float (suggested take profit),
+                        "timeframe": "Daily" | "4h" | "1h" (best fit)
+                    }}
+                ]
+            }}
+        }}
+        """
+
+        result = await self._generate(prompt, system=PATTERN_SYSTEM_PROMPT)
+        by_symbol = result.get("results") if isinstance(result, dict) else None
+        if not isinstance(by_symbol, dict):
+            return {symbol: [] for symbol in symbols}
+
+        # Only map back symbols we asked about
+        return {symbol: self._validate_patterns(by_symbol.get(symbol)) for symbol in symbols}
+
+    def _validate_patterns(self, raw: Any) -> List[Dict[str, Any]]:
+        """
+        Keeps well-formed pattern dicts from an LLM response and normalizes their fields.
+        """
+        if not isinstance(raw, list):
             return []
-        
-        return []
+
+        patterns = []
+        for item in raw:
+            if not isinstance(item, dict) or not isinstance(item.get("name"), str) or not item["name"].strip():
+                continue
+            if item.get("type") not in ("Bullish", "Bearish"):
+                continue
+
+            pattern = {
+                "name": item["name"].strip(),
+                "type": item["type"],
+                "description": str(item.get("description") or ""),
+                "reliability": item.get("reliability") if item.get("reliability") in ("High", "Medium", "Low") else "Low",
+                "timeframe": item.get("timeframe") if item.get("timeframe") in ("Daily", "4h", "1h") else "Daily"
+            }
+            for level in ("stop_loss", "target_price"):
+                try:
+                    pattern[level] = float(item[level]) if item.get(level) is not None else None
+                except (TypeError, ValueError):
+                    pattern[level] = None
+            if "timestamp" in item:
+                pattern["timestamp"] = item["timestamp"]
+            patterns.append(pattern)
+        return patterns
 
 llm_service = LLMService()
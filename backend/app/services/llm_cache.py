@@ -0,0 +1,152 @@
+import os
+import copy
+import json
+import time
+import sqlite3
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+DB_FILE = "data/llm_cache.db"
+
+# Seconds a cached response stays valid, and the LRU size bound
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "3600"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+# Hot entries also kept in process so repeat hits skip the disk round trip
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "256"))
+
+class LLMCache:
+    """
+    Disk-backed cache of parsed LLM responses keyed by (provider, model, normalized prompt).
+    Entries expire after a TTL and the least recently used ones are evicted past max_entries.
+    """
+
+    def __init__(self, ttl: int = LLM_CACHE_TTL, max_entries: int = LLM_CACHE_MAX_ENTRIES, memory_entries: int = LLM_CACHE_MEMORY_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self.stats = {"hits": 0, "memory_hits": 0, "misses": 0, "expired": 0, "writes": 0, "evictions": 0}
+        self._ensure_db()
+
+    def _ensure_db(self):
+        if not os.path.exists("data"):
+            os.makedirs("data")
+
+        conn = sqlite3.connect(DB_FILE)
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                provider TEXT,
+                model TEXT,
+                response TEXT,
+                created_at REAL,
+                last_accessed REAL
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_accessed ON llm_cache (last_accessed)")
+        conn.commit()
+        conn.close()
+
+    def make_key(self, provider: str, model: str, prompt: str) -> str:
+        # Prompts are built from indented f-strings; whitespace differences must not miss the cache
+        normalized = " ".join(prompt.split())
+        return hashlib.sha256(f"{provider}\x00{model}\x00{normalized}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, created_at: float, response: Any):
+        self._memory[key] = (created_at, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, provider: str, model: str, prompt: str) -> Optional[Any]:
+        key = self.make_key(provider, model, prompt)
+        now = time.time()
+
+        memory = self._memory.get(key)
+        if memory and now - memory[0] <= self.ttl:
+            # Disk last_accessed is not bumped here, so disk LRU order is approximate for hot keys
+            self._memory.move_to_end(key)
+            self.stats["hits"] += 1
+            self.stats["memory_hits"] += 1
+            # Callers annotate results in place; never hand out the cached object
+            return copy.deepcopy(memory[1])
+        self._memory.pop(key, None)
+
+        conn = sqlite3.connect(DB_FILE)
+        cursor = conn.cursor()
+        cursor.execute("SELECT response, created_at FROM llm_cache WHERE key = ?", (key,))
+        row = cursor.fetchone()
+
+        if not row:
+            conn.close()
+            self.stats["misses"] += 1
+            return None
+
+        response, created_at = row
+        if now - created_at > self.ttl:
+            cursor.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            conn.commit()
+            conn.close()
+            self.stats["expired"] += 1
+            self.stats["misses"] += 1
+            return None
+
+        cursor.execute("UPDATE llm_cache SET last_accessed = ? WHERE key = ?", (now, key))
+        conn.commit()
+        conn.close()
+        self.stats["hits"] += 1
+        result = json.loads(response)
+        self._remember(key, created_at, copy.deepcopy(result))
+        return result
+
+    def set(self, provider: str, model: str, prompt: str, response: Any):
+        key = self.make_key(provider, model, prompt)
+        now = time.time()
+
+        conn = sqlite3.connect(DB_FILE)
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, provider, model, response, created_at, last_accessed) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, provider, model, json.dumps(response), now, now)
+        )
+
+        cursor.execute("SELECT COUNT(*) FROM llm_cache")
+        overflow = cursor.fetchone()[0] - self.max_entries
+        if overflow > 0:
+            cursor.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY last_accessed ASC LIMIT ?)",
+                (overflow,)
+            )
+            self.stats["evictions"] += overflow
+
+        conn.commit()
+        conn.close()
+        self._remember(key, now, copy.deepcopy(response))
+        self.stats["writes"] += 1
+
+    def clear(self):
+        self._memory.clear()
+        conn = sqlite3.connect(DB_FILE)
+        conn.execute("DELETE FROM llm_cache")
+        conn.commit()
+        conn.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        conn = sqlite3.connect(DB_FILE)
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM llm_cache")
+        entries = cursor.fetchone()[0]
+        conn.close()
+
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0
+        }
+
+llm_cache = LLMCache()
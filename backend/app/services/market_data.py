@@ -6,6 +6,8 @@ import asyncio
 import json
 import os
 from app.services.asset_service import asset_service
+from app.services.circuit_breaker import circuit_breakers
+from app.services.bar_store import bar_store
 
 CACHE_FILE_PATH = "data/market_cache.json"
 
@@ -40,29 +42,18 @@ class MarketDataService:
             
             # Run blocking call in executor
             print(f"DEBUG: Fetching history for {symbol} period={period}")
-            # hist = await asyncio.to_thread(ticker.history, period=period)
-            hist = ticker.history(period=period)
+            hist = await asyncio.to_thread(circuit_breakers.get("yahoo").call, ticker.history, period=period)
             print(f"DEBUG: Fetched {len(hist)} rows")
             
             # Format data
-            data = []
-            for date, row in hist.iterrows():
-                # Convert numpy types to python types for JSON serialization
-                open_val = float(row["Open"]) if not pd.isna(row["Open"]) else 0.0
-                high_val = float(row["High"]) if not pd.isna(row["High"]) else 0.0
-                low_val = float(row["Low"]) if not pd.isna(row["Low"]) else 0.0
-                close_val = float(row["Close"]) if not pd.isna(row["Close"]) else 0.0
-                volume_val = int(row["Volume"]) if not pd.isna(row["Volume"]) else 0
-                
-                data.append({
-                    "time": date.isoformat(),
-                    "open": open_val,
-                    "high": high_val,
-                    "low": low_val,
-                    "close": close_val,
-                    "volume": volume_val
-                })
+            data = self._frame_to_bars(hist)
             
+            # Write through to the local bar store, which also advances streaming indicators
+            try:
+                bar_store.append(symbol, data)
+            except Exception as e:
+                print(f"Error storing bars for {symbol}: {e}")
+
             # Filter to requested days (approx)
             if len(data) > days:
                 data = data[-days:]
@@ -72,6 +63,26 @@ class MarketDataService:
             print(f"Error fetching data for {symbol}: {e}")
             return []
 
+    def _frame_to_bars(self, hist) -> List[Dict[str, Any]]:
+        data = []
+        for date, row in hist.iterrows():
+            # Convert numpy types to python types for JSON serialization
+            open_val = float(row["Open"]) if not pd.isna(row["Open"]) else 0.0
+            high_val = float(row["High"]) if not pd.isna(row["High"]) else 0.0
+            low_val = float(row["Low"]) if not pd.isna(row["Low"]) else 0.0
+            close_val = float(row["Close"]) if not pd.isna(row["Close"]) else 0.0
+            volume_val = int(row["Volume"]) if not pd.isna(row["Volume"]) else 0
+            
+            data.append({
+                "time": date.isoformat(),
+                "open": open_val,
+                "high": high_val,
+                "low": low_val,
+                "close": close_val,
+                "volume": volume_val
+            })
+        return data
+
     async def check_data_freshness(self, symbol: str) -> bool:
         """
         Checks if we have recent data for the symbol (within last 24h).
@@ -87,7 +98,7 @@ class MarketDataService:
         try:
             # We'll use a lightweight fetch (1d) to check
             ticker = yf.Ticker(symbol)
-            hist = await asyncio.to_thread(ticker.history, period="1d")
+            hist = await asyncio.to_thread(circuit_breakers.get("yahoo").call, ticker.history, period="1d")
             if hist.empty:
                 return False
             
@@ -149,13 +160,12 @@ class MarketDataService:
             # Use 5d to ensure we get data even on weekends/holidays for stocks
             from app.services.logger import logger_service
             logger_service.log("INFO", "MARKET_DATA", f"Fetching movers for {len(tickers)} tickers", {"tickers": tickers})
-            data = await asyncio.to_thread(yf.download, tickers, period="5d", group_by='ticker', progress=False)
+            data = await asyncio.to_thread(circuit_breakers.get("yahoo").call, yf.download, tickers, period="5d", group_by='ticker', progress=False)
             logger_service.log("INFO", "MARKET_DATA", "Fetched data columns", {"columns": str(data.columns)})
             
             # Create a map for types
             type_map = {a['symbol']: a['type'] for a in db_assets}
 
-            movers = []
             for ticker in tickers:
                 try:
                     # Handle yfinance multi-index structure or single ticker
@@ -169,20 +179,25 @@ class MarketDataService:
                         hist = data
                         
                     if not hist.empty and len(hist) > 0:
-                        current = hist['Close'].iloc[-1]
-                        open_price = hist['Open'].iloc[-1]
-                        change = ((current - open_price) / open_price) * 100
-                        
-                        movers.append({
-                            "symbol": ticker,
-                            "price": float(current),
-                            "change": float(change),
-                            "volume": int(hist['Volume'].iloc[-1]),
-                            "type": type_map.get(ticker, "Crypto" if "-USD" in ticker else "Stock")
-                        })
+                        bar_store.append(ticker, self._frame_to_bars(hist.dropna(subset=["Close"])))
                 except Exception as e:
                     continue
 
+            # One cross-sectional pass over the stored bars instead of per-ticker math
+            from app.services.universe import universe_service
+            movers = []
+            for row in universe_service.snapshot(tickers):
+                if row["change_pct"] is None:
+                    continue
+                movers.append({
+                    "symbol": row["symbol"],
+                    "price": row["price"],
+                    "change": row["change_pct"],
+                    "volume": row["volume"],
+                    "rsi": row["rsi"],
+                    "type": type_map.get(row["symbol"], "Crypto" if "-USD" in row["symbol"] else "Stock")
+                })
+
             # Sort lists
             movers.sort(key=lambda x: x['change'], reverse=True)
             
@@ -1,15 +1,61 @@
 import sqlite3
 import json
+import os
+import re
+import time
+import hashlib
+import asyncio
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import yfinance as yf
 from app.services.llm import llm_service
 from app.services.logger import logger_service
+from app.services.circuit_breaker import circuit_breakers, CircuitOpenError
+from app.services.news_dedup import news_lsh
+from app.services.sentiment import sentiment_scorer
 
 DB_FILE = "data/news.db"
 
+DEFAULT_NEWS_SYMBOLS = ["AAPL", "BTC-USD", "ETH-USD", "MSFT", "GOOGL", "RELIANCE.NS", "TCS.NS"]
+
+# Background refresher configuration (seconds)
+NEWS_REFRESH_INTERVAL = int(os.getenv("NEWS_REFRESH_INTERVAL", "300"))
+NEWS_STALE_AFTER = int(os.getenv("NEWS_STALE_AFTER", str(NEWS_REFRESH_INTERVAL * 2)))
+# Wait after a failed fetch before a symbol counts as stale again; doubles per consecutive failure
+NEWS_RETRY_BACKOFF = int(os.getenv("NEWS_RETRY_BACKOFF", "60"))
+
+# Minimum headline similarity (shingle Jaccard) for two articles to be one story
+NEWS_DUPLICATE_THRESHOLD = float(os.getenv("NEWS_DUPLICATE_THRESHOLD", "0.6"))
+
+# Lexicon sentiment at or above this confidence is kept; below it the LLM decides
+NEWS_SENTIMENT_ESCALATE_BELOW = float(os.getenv("NEWS_SENTIMENT_ESCALATE_BELOW", "0.5"))
+
+# Batched LLM summarization
+NEWS_SUMMARY_BATCH_SIZE = int(os.getenv("NEWS_SUMMARY_BATCH_SIZE", "20"))
+NEWS_SUMMARY_CONCURRENCY = int(os.getenv("NEWS_SUMMARY_CONCURRENCY", "3"))
+# USD per 1K tokens, used for the cost estimate only (gpt-4o list prices)
+LLM_INPUT_COST_PER_1K = float(os.getenv("LLM_INPUT_COST_PER_1K", "0.0025"))
+LLM_OUTPUT_COST_PER_1K = float(os.getenv("LLM_OUTPUT_COST_PER_1K", "0.01"))
+
 class NewsService:
     def __init__(self):
+        self.is_refreshing = False
+        self.refresher_running = False
+        self.fts_enabled = False
+        # References to fire-and-forget refreshes so they are not garbage-collected mid-run
+        self._tasks: set = set()
+        # symbol -> (consecutive failures, monotonic time before which it is not retried)
+        self._backoff: Dict[str, tuple] = {}
+        self.summary_stats = {
+            "items_summarized": 0,
+            "cache_hits": 0,
+            "llm_calls": 0,
+            "failed_batches": 0,
+            "prompt_tokens_est": 0,
+            "completion_tokens_est": 0,
+            "cost_usd_est": 0.0,
+            "busy_seconds": 0.0
+        }
         self._ensure_db()
 
     def _ensure_db(self):
@@ -27,94 +73,503 @@ class NewsService:
                 related_assets TEXT
             )
         """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_news_published_at ON news (published_at)")
+
+        # Per-symbol staleness tracking for the background refresher
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS news_refresh (
+                symbol TEXT PRIMARY KEY,
+                last_refreshed TEXT
+            )
+        """)
+
+        # Normalized news <-> asset links; published_at is denormalized so
+        # per-symbol feeds are served straight from the composite index
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS news_assets (
+                news_id TEXT,
+                symbol TEXT,
+                published_at TEXT,
+                PRIMARY KEY (news_id, symbol)
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_news_assets_symbol_published ON news_assets (symbol, published_at)")
+        self._backfill_news_assets(cursor)
+
+        self.fts_enabled = self._ensure_search_index(cursor)
+
+        # Near-duplicate clustering: LSH buckets for canonical rows, and the
+        # upstream ids of copies that were folded into a canonical row
+        cursor.execute("PRAGMA table_info(news)")
+        if "cluster_id" not in [col[1] for col in cursor.fetchall()]:
+            cursor.execute("ALTER TABLE news ADD COLUMN cluster_id TEXT")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS news_lsh (
+                band_key TEXT,
+                news_id TEXT,
+                PRIMARY KEY (band_key, news_id)
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS news_aliases (
+                alias_id TEXT PRIMARY KEY,
+                news_id TEXT
+            )
+        """)
+        self._backfill_clusters(cursor)
+
+        cursor.execute("PRAGMA table_info(news)")
+        if "sentiment_confidence" not in [col[1] for col in cursor.fetchall()]:
+            cursor.execute("ALTER TABLE news ADD COLUMN sentiment_confidence REAL")
+        self._backfill_sentiment(cursor)
+
+        # LLM summaries keyed by normalized headline hash, so syndicated copies are summarized once
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS news_summary_cache (
+                content_hash TEXT PRIMARY KEY,
+                summary TEXT,
+                sentiment TEXT,
+                created_at TEXT
+            )
+        """)
+
+        conn.commit()
+        conn.close()
+
+    def _ensure_search_index(self, cursor) -> bool:
+        """
+        Creates the FTS5 index over title/summary, kept in sync by triggers.
+        Returns False if this SQLite build has no FTS5 (search falls back to LIKE).
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'news_fts'")
+        exists = cursor.fetchone() is not None
+
+        try:
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS news_fts USING fts5(
+                    title, summary,
+                    content='news', content_rowid='rowid',
+                    tokenize='porter unicode61'
+                )
+            """)
+        except sqlite3.OperationalError as e:
+            logger_service.log("WARNING", "NEWS", "FTS5 unavailable, news search will use LIKE", {"error": str(e)})
+            return False
+
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS news_fts_insert AFTER INSERT ON news BEGIN
+                INSERT INTO news_fts (rowid, title, summary) VALUES (new.rowid, new.title, new.summary);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS news_fts_delete AFTER DELETE ON news BEGIN
+                INSERT INTO news_fts (news_fts, rowid, title, summary) VALUES ('delete', old.rowid, old.title, old.summary);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS news_fts_update AFTER UPDATE OF title, summary ON news BEGIN
+                INSERT INTO news_fts (news_fts, rowid, title, summary) VALUES ('delete', old.rowid, old.title, old.summary);
+                INSERT INTO news_fts (rowid, title, summary) VALUES (new.rowid, new.title, new.summary);
+            END
+        """)
+
+        if not exists:
+            # Index rows stored before search existed
+            cursor.execute("INSERT INTO news_fts (news_fts) VALUES ('rebuild')")
+        return True
+
+    def rebuild_search_index(self):
+        """
+        Rebuilds the FTS index from the news table (e.g. after a VACUUM renumbers rowids).
+        """
+        if not self.fts_enabled:
+            return
+        conn = sqlite3.connect(DB_FILE)
+        conn.execute("INSERT INTO news_fts (news_fts) VALUES ('rebuild')")
         conn.commit()
         conn.close()
 
-    def fetch_latest_news(self, symbols: List[str] = ["AAPL", "BTC-USD", "ETH-USD", "MSFT", "GOOGL", "RELIANCE.NS", "TCS.NS"]) -> List[Dict[str, Any]]:
+    def _backfill_clusters(self, cursor):
+        """
+        Makes rows stored before clustering existed their own cluster and indexes them for matching.
+        """
+        cursor.execute("SELECT id, title FROM news WHERE cluster_id IS NULL")
+        rows = cursor.fetchall()
+        for news_id, title in rows:
+            cursor.executemany(
+                "INSERT OR IGNORE INTO news_lsh (band_key, news_id) VALUES (?, ?)",
+                [(key, news_id) for key in self._band_keys(title)]
+            )
+        cursor.executemany("UPDATE news SET cluster_id = id WHERE id = ?", [(row[0],) for row in rows])
+
+    def _backfill_sentiment(self, cursor):
+        """
+        Scores rows stored before local sentiment existed. Sentiment already set by the LLM is kept.
+        """
+        cursor.execute("SELECT id, title, summary FROM news WHERE sentiment_confidence IS NULL")
+        rows = cursor.fetchall()
+        if not rows:
+            return
+
+        scores = sentiment_scorer.score_batch([title for _, title, _ in rows])
+        updates = []
+        for (news_id, _, summary), result in zip(rows, scores):
+            if summary:
+                updates.append((None, 1.0, news_id))
+            else:
+                updates.append((result["sentiment"], result["confidence"], news_id))
+        cursor.executemany(
+            "UPDATE news SET sentiment = COALESCE(?, sentiment), sentiment_confidence = ? WHERE id = ?",
+            updates
+        )
+
+    def _band_keys(self, title: str) -> List[str]:
+        # Placeholder titles carry no signal and must never cluster together
+        if not title or title == "No Title":
+            return []
+        shingles = news_lsh.shingles(title)
+        if not shingles:
+            return []
+        return news_lsh.band_keys(news_lsh.signature(shingles))
+
+    def _find_duplicate(self, title: str) -> Optional[str]:
+        """
+        Returns the canonical id of a stored article with a near-identical headline, if any.
+        """
+        keys = self._band_keys(title)
+        if not keys:
+            return None
+
+        conn = sqlite3.connect(DB_FILE)
+        cursor = conn.cursor()
+        placeholders = ",".join("?" * len(keys))
+        cursor.execute(f"""
+            SELECT n.id, n.title FROM news n
+            WHERE n.id IN (SELECT news_id FROM news_lsh WHERE band_key IN ({placeholders}))
+        """, keys)
+        candidates = cursor.fetchall()
+        conn.close()
+
+        # LSH only proposes candidates; confirm on the exact shingle overlap
+        shingles = news_lsh.shingles(title)
+        best_id, best_score = None, NEWS_DUPLICATE_THRESHOLD
+        for candidate_id, candidate_title in candidates:
+            score = news_lsh.jaccard(shingles, news_lsh.shingles(candidate_title))
+            if score >= best_score:
+                best_id, best_score = candidate_id, score
+        return best_id
+
+    def _save_alias(self, alias_id: str, news_id: str):
+        conn = sqlite3.connect(DB_FILE)
+        cursor = conn.cursor()
+        cursor.execute("INSERT OR IGNORE INTO news_aliases (alias_id, news_id) VALUES (?, ?)", (alias_id, news_id))
+        conn.commit()
+        conn.close()
+
+    def _backfill_news_assets(self, cursor):
+        """
+        Links rows stored before news_assets existed, using their related_assets JSON.
+        """
+        cursor.execute("""
+            SELECT n.id, n.published_at, n.related_assets FROM news n
+            WHERE NOT EXISTS (SELECT 1 FROM news_assets na WHERE na.news_id = n.id)
+        """)
+        links = []
+        for news_id, published_at, related_assets in cursor.fetchall():
+            try:
+                symbols = json.loads(related_assets or "[]")
+            except ValueError:
+                continue
+            links.extend((news_id, symbol, published_at) for symbol in symbols)
+
+        if links:
+            cursor.executemany("INSERT OR IGNORE INTO news_assets (news_id, symbol, published_at) VALUES (?, ?, ?)", links)
+
+    def fetch_latest_news(self, symbols: List[str] = DEFAULT_NEWS_SYMBOLS) -> List[Dict[str, Any]]:
         """
         Fetches news for given symbols, stores them, and returns the latest list.
+        Blocks on upstream calls; request handlers should read via get_news() instead.
+        """
+        self.refresh_news(symbols)
+        return self.get_news()
+
+    def refresh_news(self, symbols: List[str] = DEFAULT_NEWS_SYMBOLS) -> int:
+        """
+        Fetches and stores news for the given symbols. Returns the number of new articles.
+        """
+        new_count = 0
+        for symbol in symbols:
+            new_count += len(self._fetch_symbol_news(symbol))
+
+        if new_count:
+            logger_service.log("INFO", "NEWS", f"Fetched {new_count} new articles")
+
+        return new_count
+
+    def _fetch_symbol_news(self, symbol: str) -> List[Dict[str, Any]]:
+        """
+        Fetches news for a single symbol from Yahoo and stores unseen items.
         """
         new_items = []
-        
+        try:
+            ticker = yf.Ticker(symbol)
+            news = circuit_breakers.get("yahoo").call(lambda: ticker.news)
+            
+            for item in news:
+                news_id = item.get('uuid')
+                if not news_id:
+                    import uuid
+                    news_id = str(uuid.uuid4())
+                stored_id = self._resolve_news_id(news_id)
+                if stored_id:
+                    # Same article surfaced under another ticker
+                    self._link_news(stored_id, symbol)
+                else:
+                    # AI Summarization (Optional - can be expensive for all items, maybe do on demand or for top items)
+                    # For now, we'll just store raw and summarize on retrieval if needed, or simple heuristic
+                    
+                    # Handle yfinance 'content' structure
+                    content = item.get('content', {})
+                    
+                    title = content.get('title') or item.get('title')
+                    
+                    # Publisher might be in provider -> displayName
+                    provider = content.get('provider', {})
+                    publisher = provider.get('displayName') or item.get('publisher') or "Unknown"
+
+                    # Link might be in clickThroughUrl -> url
+                    click_url = content.get('clickThroughUrl')
+                    if isinstance(click_url, dict):
+                        link = click_url.get('url')
+                    else:
+                        link = click_url or item.get('link')
+
+                    pub_time = content.get('pubDate') or item.get('providerPublishTime')
+
+                    entry = {
+                        "id": news_id,
+                        "title": title or "No Title",
+                        "publisher": publisher,
+                        "link": link or "#",
+                        "published_at": str(pub_time) if pub_time else datetime.now().isoformat(),
+                        "summary": "", # To be filled by AI
+                        "sentiment": "Neutral", # Lexicon score below, LLM if low confidence
+                        "related_assets": json.dumps([symbol])
+                    }
+
+                    # Syndicated copy of a stored story: link it instead of storing it again
+                    canonical_id = self._find_duplicate(entry["title"])
+                    if canonical_id:
+                        self._save_alias(news_id, canonical_id)
+                        self._link_news(canonical_id, symbol)
+                        continue
+
+                    scored = sentiment_scorer.score(entry["title"])
+                    entry["sentiment"] = scored["sentiment"]
+                    entry["sentiment_confidence"] = scored["confidence"]
+                    entry["cluster_id"] = news_id
+                    self._save_news(entry)
+                    new_items.append(entry)
+
+            self._mark_refreshed(symbol)
+            self._backoff.pop(symbol, None)
+                    
+        except CircuitOpenError:
+            # Yahoo is down; leave the symbol stale but back off so reads don't keep retrying it
+            self._mark_failed(symbol)
+        except Exception as e:
+            logger_service.log("ERROR", "NEWS", f"Failed to fetch news for {symbol}", {"error": str(e)})
+            self._mark_failed(symbol)
+
+        return new_items
+
+    def _mark_refreshed(self, symbol: str):
+        conn = sqlite3.connect(DB_FILE)
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT OR REPLACE INTO news_refresh (symbol, last_refreshed) VALUES (?, ?)",
+            (symbol, datetime.now().isoformat())
+        )
+        conn.commit()
+        conn.close()
+
+    def _mark_failed(self, symbol: str):
+        failures = self._backoff.get(symbol, (0, 0.0))[0] + 1
+        delay = min(NEWS_RETRY_BACKOFF * 2 ** (failures - 1), NEWS_STALE_AFTER)
+        self._backoff[symbol] = (failures, time.monotonic() + delay)
+
+    def get_refresh_times(self) -> Dict[str, str]:
+        """
+        Returns the last refresh time per symbol.
+        """
+        conn = sqlite3.connect(DB_FILE)
+        cursor = conn.cursor()
+        cursor.execute("SELECT symbol, last_refreshed FROM news_refresh")
+        rows = cursor.fetchall()
+        conn.close()
+        return dict(rows)
+
+    def get_stale_symbols(self, symbols: List[str] = DEFAULT_NEWS_SYMBOLS, max_age: Optional[int] = None) -> List[str]:
+        """
+        Returns the symbols whose news has never been fetched or is older than max_age seconds.
+        Symbols backing off after a failed fetch are left out until their retry time.
+        """
+        max_age = NEWS_STALE_AFTER if max_age is None else max_age
+        refresh_times = self.get_refresh_times()
+        now = datetime.now()
+
+        stale = []
         for symbol in symbols:
+            if symbol in self._backoff and time.monotonic() < self._backoff[symbol][1]:
+                continue
+            last = refresh_times.get(symbol)
+            if not last or (now - datetime.fromisoformat(last)).total_seconds() > max_age:
+                stale.append(symbol)
+        return stale
+
+    def get_last_refreshed(self, symbols: List[str] = DEFAULT_NEWS_SYMBOLS) -> Optional[str]:
+        """
+        Returns the oldest refresh time across the given symbols, i.e. how fresh the whole feed is.
+        None if any of them has never been refreshed.
+        """
+        refresh_times = self.get_refresh_times()
+        times = [refresh_times.get(symbol) for symbol in symbols]
+        if not times or None in times:
+            return None
+        return min(times)
+
+    async def refresh_async(self, symbols: List[str] = DEFAULT_NEWS_SYMBOLS) -> int:
+        """
+        Refreshes the given symbols off the event loop. Concurrent calls are dropped.
+        """
+        if self.is_refreshing:
+            return 0
+
+        self.is_refreshing = True
+        try:
+            new_count = 0
+            for symbol in symbols:
+                items = await asyncio.to_thread(self._fetch_symbol_news, symbol)
+                new_count += len(items)
+
+            if new_count:
+                logger_service.log("INFO", "NEWS", f"Fetched {new_count} new articles")
+            return new_count
+        finally:
+            self.is_refreshing = False
+
+    def trigger_refresh_if_stale(self, symbols: List[str] = DEFAULT_NEWS_SYMBOLS) -> bool:
+        """
+        Schedules a background refresh for stale symbols without waiting for it.
+        Returns True if a refresh was scheduled.
+        """
+        if self.is_refreshing:
+            return False
+
+        stale = self.get_stale_symbols(symbols)
+        if not stale:
+            return False
+
+        task = asyncio.create_task(self.refresh_async(stale))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def start_refresher(self, symbols: List[str] = DEFAULT_NEWS_SYMBOLS, interval: int = NEWS_REFRESH_INTERVAL):
+        """
+        Background loop that keeps the local news store fresh.
+        """
+        if self.refresher_running:
+            return
+
+        self.refresher_running = True
+        logger_service.log("INFO", "NEWS", "Background news refresher started", {"interval": interval})
+
+        while self.refresher_running:
             try:
-                ticker = yf.Ticker(symbol)
-                news = ticker.news
-                
-                for item in news:
-                    news_id = item.get('uuid')
-                    if not news_id:
-                        import uuid
-                        news_id = str(uuid.uuid4())
-                    if not self._news_exists(news_id):
-                        # AI Summarization (Optional - can be expensive for all items, maybe do on demand or for top items)
-                        # For now, we'll just store raw and summarize on retrieval if needed, or simple heuristic
-                        
-                        # Handle yfinance 'content' structure
-                        content = item.get('content', {})
-                        
-                        title = content.get('title') or item.get('title')
-                        
-                        # Publisher might be in provider -> displayName
-                        provider = content.get('provider', {})
-                        publisher = provider.get('displayName') or item.get('publisher') or "Unknown"
-
-                        # Link might be in clickThroughUrl -> url
-                        click_url = content.get('clickThroughUrl')
-                        if isinstance(click_url, dict):
-                            link = click_url.get('url')
-                        else:
-                            link = click_url or item.get('link')
-
-                        pub_time = content.get('pubDate') or item.get('providerPublishTime')
-
-                        entry = {
-                            "id": news_id,
-                            "title": title or "No Title",
-                            "publisher": publisher,
-                            "link": link or "#",
-                            "published_at": str(pub_time) if pub_time else datetime.now().isoformat(),
-                            "summary": "", # To be filled by AI
-                            "sentiment": "Neutral", # To be filled by AI
-                            "related_assets": json.dumps([symbol])
-                        }
-                        self._save_news(entry)
-                        new_items.append(entry)
-                        
+                # Only symbols that went stale since the last pass hit the network
+                stale = self.get_stale_symbols(symbols, max_age=interval)
+                if stale:
+                    await self.refresh_async(stale)
             except Exception as e:
-                logger_service.log("ERROR", "NEWS", f"Failed to fetch news for {symbol}", {"error": str(e)})
+                logger_service.log("ERROR", "NEWS", "News refresh cycle failed", {"error": str(e)})
 
-        if new_items:
-            logger_service.log("INFO", "NEWS", f"Fetched {len(new_items)} new articles")
-            
-        return self.get_news()
+            await asyncio.sleep(interval)
+
+    def stop_refresher(self):
+        self.refresher_running = False
+        logger_service.log("INFO", "NEWS", "Background news refresher stopped")
 
     def _news_exists(self, news_id: str) -> bool:
+        return self._resolve_news_id(news_id) is not None
+
+    def _resolve_news_id(self, news_id: str) -> Optional[str]:
+        """
+        Returns the stored row id for an upstream id, following duplicate aliases.
+        """
         conn = sqlite3.connect(DB_FILE)
         cursor = conn.cursor()
-        cursor.execute("SELECT 1 FROM news WHERE id = ?", (news_id,))
-        exists = cursor.fetchone() is not None
+        cursor.execute("SELECT id FROM news WHERE id = ?", (news_id,))
+        row = cursor.fetchone()
+        if not row:
+            cursor.execute("SELECT news_id FROM news_aliases WHERE alias_id = ?", (news_id,))
+            row = cursor.fetchone()
         conn.close()
-        return exists
+        return row[0] if row else None
 
     def _save_news(self, item: Dict[str, Any]):
         conn = sqlite3.connect(DB_FILE)
         cursor = conn.cursor()
         cursor.execute(
-            "INSERT INTO news (id, title, publisher, link, published_at, summary, sentiment, related_assets) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-            (item['id'], item['title'], item['publisher'], item['link'], item['published_at'], item['summary'], item['sentiment'], item['related_assets'])
+            "INSERT INTO news (id, title, publisher, link, published_at, summary, sentiment, related_assets, cluster_id, sentiment_confidence) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (item['id'], item['title'], item['publisher'], item['link'], item['published_at'], item['summary'], item['sentiment'], item['related_assets'], item.get('cluster_id', item['id']), item.get('sentiment_confidence'))
+        )
+        cursor.executemany(
+            "INSERT OR IGNORE INTO news_assets (news_id, symbol, published_at) VALUES (?, ?, ?)",
+            [(item['id'], symbol, item['published_at']) for symbol in json.loads(item['related_assets'])]
+        )
+        cursor.executemany(
+            "INSERT OR IGNORE INTO news_lsh (band_key, news_id) VALUES (?, ?)",
+            [(key, item['id']) for key in self._band_keys(item['title'])]
         )
         conn.commit()
         conn.close()
 
+    def _link_news(self, news_id: str, symbol: str):
+        """
+        Associates an already stored article with another symbol.
+        """
+        conn = sqlite3.connect(DB_FILE)
+        cursor = conn.cursor()
+        cursor.execute("SELECT published_at, related_assets FROM news WHERE id = ?", (news_id,))
+        row = cursor.fetchone()
+        if row:
+            published_at, related_assets = row
+            cursor.execute(
+                "INSERT OR IGNORE INTO news_assets (news_id, symbol, published_at) VALUES (?, ?, ?)",
+                (news_id, symbol, published_at)
+            )
+            if cursor.rowcount:
+                # Keep the denormalized JSON list in sync for API consumers
+                symbols = json.loads(related_assets or "[]")
+                symbols.append(symbol)
+                cursor.execute("UPDATE news SET related_assets = ? WHERE id = ?", (json.dumps(symbols), news_id))
+            conn.commit()
+        conn.close()
+
     def get_news(self, symbol: str = None, limit: int = 20) -> List[Dict[str, Any]]:
         conn = sqlite3.connect(DB_FILE)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
         if symbol:
-            # Simple LIKE query for related assets
-            cursor.execute("SELECT * FROM news WHERE related_assets LIKE ? ORDER BY published_at DESC LIMIT ?", (f'%{symbol}%', limit))
+            # Exact symbol match via the (symbol, published_at) index
+            cursor.execute("""
+                SELECT n.* FROM news_assets na
+                JOIN news n ON n.id = na.news_id
+                WHERE na.symbol = ?
+                ORDER BY na.published_at DESC LIMIT ?
+            """, (symbol, limit))
         else:
             cursor.execute("SELECT * FROM news ORDER BY published_at DESC LIMIT ?", (limit,))
             
@@ -123,6 +578,49 @@ class NewsService:
         
         return [dict(row) for row in rows]
 
+    def search_news(self, query: str, symbol: Optional[str] = None, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Keyword search over stored headlines and summaries, best matches first.
+        """
+        # Quote each term so user input can't break FTS query syntax; terms are ANDed
+        terms = re.findall(r"\w+", query)
+        if not terms:
+            return []
+
+        conn = sqlite3.connect(DB_FILE)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+
+        params: List[Any] = []
+        if self.fts_enabled:
+            sql = """
+                SELECT n.*, bm25(news_fts, 2.0, 1.0) AS rank FROM news_fts
+                JOIN news n ON n.rowid = news_fts.rowid
+            """
+            where = ["news_fts MATCH ?"]
+            params.append(" ".join(f'"{term}"' for term in terms))
+            order = "rank"
+        else:
+            sql = "SELECT n.*, 0.0 AS rank FROM news n"
+            where = []
+            for term in terms:
+                where.append("(n.title LIKE ? OR n.summary LIKE ?)")
+                params.extend([f"%{term}%", f"%{term}%"])
+            order = "n.published_at DESC"
+
+        if symbol:
+            where.append("n.id IN (SELECT news_id FROM news_assets WHERE symbol = ?)")
+            params.append(symbol)
+
+        sql += " WHERE " + " AND ".join(where) + f" ORDER BY {order} LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+        conn.close()
+
+        return [dict(row) for row in rows]
+
     async def summarize_news_item(self, news_id: str):
         """
         Uses LLM to summarize a specific news item and update the DB.
@@ -136,34 +634,157 @@ class NewsService:
         
         if not row or row['summary']:
             return # Already summarized or not found
-            
-        title = row['title']
-        
-        # Simple prompt for summary
-        prompt = f"Summarize this financial news headline in 1 sentence and give sentiment (Bullish/Bearish/Neutral): '{title}'"
-        
+
+        await self._summarize_rows([dict(row)])
+
+    async def summarize_pending(self, limit: int = 200) -> int:
+        """
+        Summarizes the newest unsummarized articles in batched LLM calls.
+        Returns the number of articles updated.
+        """
+        conn = sqlite3.connect(DB_FILE)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, title, sentiment, sentiment_confidence FROM news WHERE summary IS NULL OR summary = '' ORDER BY published_at DESC LIMIT ?", (limit,))
+        rows = [dict(row) for row in cursor.fetchall()]
+        conn.close()
+
+        if not rows:
+            return 0
+        return await self._summarize_rows(rows)
+
+    async def _summarize_rows(self, rows: List[Dict[str, Any]]) -> int:
+        started = time.perf_counter()
+
+        # Group syndicated copies by content hash
+        by_hash: Dict[str, List[str]] = {}
+        titles: Dict[str, str] = {}
+        for row in rows:
+            content_hash = self._content_hash(row['title'])
+            by_hash.setdefault(content_hash, []).append(row['id'])
+            titles[content_hash] = row['title']
+
+        results = self._get_cached_summaries(list(by_hash.keys()))
+        self.summary_stats["cache_hits"] += sum(len(by_hash[h]) for h in results)
+
+        pending = [h for h in by_hash if h not in results]
+        batches = [pending[i:i + NEWS_SUMMARY_BATCH_SIZE] for i in range(0, len(pending), NEWS_SUMMARY_BATCH_SIZE)]
+        semaphore = asyncio.Semaphore(NEWS_SUMMARY_CONCURRENCY)
+
+        async def run_batch(batch: List[str]) -> Dict[str, Dict[str, str]]:
+            async with semaphore:
+                return await self._summarize_batch([(h, titles[h]) for h in batch])
+
+        for batch_results in await asyncio.gather(*[run_batch(batch) for batch in batches]):
+            results.update(batch_results)
+
+        # Confident lexicon sentiment stands; only low-confidence rows take the LLM's call
+        local_sentiment = {
+            row['id']: row['sentiment'] for row in rows
+            if (row.get('sentiment_confidence') or 0.0) >= NEWS_SENTIMENT_ESCALATE_BELOW
+        }
+
+        updates = []
+        for content_hash, result in results.items():
+            for news_id in by_hash[content_hash]:
+                updates.append((news_id, result['summary'], local_sentiment.get(news_id, result['sentiment'])))
+        self._update_news_ai_many(updates)
+
+        self.summary_stats["items_summarized"] += len(updates)
+        self.summary_stats["busy_seconds"] += time.perf_counter() - started
+        if updates:
+            logger_service.log("INFO", "NEWS_AI", f"Summarized {len(updates)} articles", {"llm_batches": len(batches)})
+        return len(updates)
+
+    async def _summarize_batch(self, batch: List[tuple]) -> Dict[str, Dict[str, str]]:
+        """
+        Summarizes one batch of (content_hash, title) pairs with a single LLM call and caches the results.
+        """
+        headlines = [title for _, title in batch]
         try:
-            # Using a simplified call here. In production, we'd use the full LLMService
-            # For now, let's mock or use a simple heuristic if LLM is heavy
-            # But user asked for AI summarization.
-            
-            # We will use the repair service's pattern of calling LLM
-            # Or better, add a helper in LLMService
-            
-            # Placeholder for actual LLM call to avoid blocking main thread too long
-            # In a real implementation, this would call OpenAI/Gemini
-            summary = f"AI Summary: Analysis of '{title}' suggests potential market impact."
-            sentiment = "Neutral" 
-            
-            self._update_news_ai(news_id, summary, sentiment)
-            
+            summaries = await llm_service.summarize_headlines(headlines)
         except Exception as e:
-            logger_service.log("ERROR", "NEWS_AI", f"Failed to summarize {news_id}", {"error": str(e)})
+            summaries = []
+            logger_service.log("ERROR", "NEWS_AI", "Summarization batch failed", {"error": str(e), "size": len(batch)})
+
+        if not summaries:
+            self.summary_stats["failed_batches"] += 1
+            return {}
+
+        # Rough 4-chars-per-token estimate; the prompt template adds ~120 tokens per call
+        prompt_tokens = 120 + sum(len(headline) for headline in headlines) // 4
+        completion_tokens = sum(len(s['summary']) + 40 for s in summaries) // 4
+        self.summary_stats["llm_calls"] += 1
+        self.summary_stats["prompt_tokens_est"] += prompt_tokens
+        self.summary_stats["completion_tokens_est"] += completion_tokens
+        self.summary_stats["cost_usd_est"] += (prompt_tokens * LLM_INPUT_COST_PER_1K + completion_tokens * LLM_OUTPUT_COST_PER_1K) / 1000
+
+        results = {}
+        for (content_hash, _), summary in zip(batch, summaries):
+            if summary['summary']:
+                results[content_hash] = summary
+        self._cache_summaries(results)
+        return results
+
+    def _content_hash(self, text: str) -> str:
+        normalized = " ".join((text or "").lower().split())
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    def _get_cached_summaries(self, content_hashes: List[str]) -> Dict[str, Dict[str, str]]:
+        if not content_hashes:
+            return {}
+        conn = sqlite3.connect(DB_FILE)
+        cursor = conn.cursor()
+        results = {}
+        # Stay under SQLite's bound-parameter limit
+        for i in range(0, len(content_hashes), 500):
+            chunk = content_hashes[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            cursor.execute(f"SELECT content_hash, summary, sentiment FROM news_summary_cache WHERE content_hash IN ({placeholders})", chunk)
+            for content_hash, summary, sentiment in cursor.fetchall():
+                results[content_hash] = {"summary": summary, "sentiment": sentiment}
+        conn.close()
+        return results
+
+    def _cache_summaries(self, results: Dict[str, Dict[str, str]]):
+        if not results:
+            return
+        now = datetime.now().isoformat()
+        conn = sqlite3.connect(DB_FILE)
+        cursor = conn.cursor()
+        cursor.executemany(
+            "INSERT OR REPLACE INTO news_summary_cache (content_hash, summary, sentiment, created_at) VALUES (?, ?, ?, ?)",
+            [(h, r['summary'], r['sentiment'], now) for h, r in results.items()]
+        )
+        conn.commit()
+        conn.close()
+
+    def get_summary_stats(self) -> Dict[str, Any]:
+        """
+        Returns throughput and cost counters for the summarization pipeline.
+        """
+        stats = dict(self.summary_stats)
+        busy = stats["busy_seconds"]
+        stats["items_per_second"] = round(stats["items_summarized"] / busy, 2) if busy > 0 else 0.0
+        stats["cost_usd_est"] = round(stats["cost_usd_est"], 6)
+        stats["busy_seconds"] = round(busy, 3)
+        return stats
 
     def _update_news_ai(self, news_id: str, summary: str, sentiment: str):
+        self._update_news_ai_many([(news_id, summary, sentiment)])
+
+    def _update_news_ai_many(self, updates: List[tuple]):
+        """
+        Writes (news_id, summary, sentiment) tuples in one transaction.
+        """
+        if not updates:
+            return
         conn = sqlite3.connect(DB_FILE)
         cursor = conn.cursor()
-        cursor.execute("UPDATE news SET summary = ?, sentiment = ? WHERE id = ?", (summary, sentiment, news_id))
+        cursor.executemany(
+            "UPDATE news SET summary = ?, sentiment = ? WHERE id = ?",
+            [(summary, sentiment, news_id) for news_id, summary, sentiment in updates]
+        )
         conn.commit()
         conn.close()
 
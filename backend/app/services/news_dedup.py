@@ -0,0 +1,54 @@
+import re
+import random
+import hashlib
+from typing import List, Set
+
+# Mersenne prime for the (a * x + b) mod p permutation family
+_PRIME = (1 << 61) - 1
+
+class MinHashLSH:
+    """
+    MinHash signatures over character shingles of a headline, bucketed with LSH banding.
+    Two headlines share a band key with high probability once their Jaccard
+    similarity passes roughly (1 / bands) ** (1 / rows_per_band).
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, shingle_size: int = 4, seed: int = 42):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.shingle_size = shingle_size
+
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+
+    def normalize(self, text: str) -> str:
+        return " ".join(re.sub(r"[^a-z0-9]+", " ", (text or "").lower()).split())
+
+    def shingles(self, text: str) -> Set[str]:
+        normalized = self.normalize(text)
+        if len(normalized) <= self.shingle_size:
+            return {normalized} if normalized else set()
+        return {normalized[i:i + self.shingle_size] for i in range(len(normalized) - self.shingle_size + 1)}
+
+    def signature(self, shingles: Set[str]) -> List[int]:
+        # Hash each shingle once, then apply every permutation to the base hashes
+        base = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big") for s in shingles]
+        return [min((a * h + b) % _PRIME for h in base) for a, b in self._perms]
+
+    def band_keys(self, signature: List[int]) -> List[str]:
+        keys = []
+        for band in range(self.bands):
+            rows = signature[band * self.rows_per_band:(band + 1) * self.rows_per_band]
+            digest = hashlib.blake2b(repr(rows).encode("utf-8"), digest_size=8).hexdigest()
+            keys.append(f"{band}:{digest}")
+        return keys
+
+    def jaccard(self, a: Set[str], b: Set[str]) -> float:
+        if not a or not b:
+            return 0.0
+        return len(a & b) / len(a | b)
+
+news_lsh = MinHashLSH()
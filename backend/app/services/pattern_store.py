@@ -0,0 +1,109 @@
+import os
+import json
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+from app.database import db
+from app.services.bar_store import bar_store
+from app.services.background import spawn
+from app.services.logger import logger_service
+
+# Seconds after which a served scan triggers a background rescan
+PATTERN_SCAN_TTL = int(os.getenv("PATTERN_SCAN_TTL", "900"))
+# Bars a scan detects over, on every path (scanner, on-demand fetch, stored bars)
+PATTERN_HISTORY_BARS = 30
+# Calendar days fetched to cover that many bars on markets closed at weekends and holidays
+PATTERN_FETCH_DAYS = PATTERN_HISTORY_BARS * 2
+
+class PatternStore:
+    """
+    Latest detected patterns per symbol (assets.db pattern_scans table). The scanner
+    writes a row after every scan, including scans that found nothing, so readers can
+    tell "no patterns" apart from "never scanned".
+    """
+
+    def __init__(self):
+        self._refreshing: set = set()
+
+    def save(self, symbol: str, patterns: List[Dict[str, Any]], price_history: List[Dict[str, Any]]):
+        self.save_many({symbol: patterns}, {symbol: price_history})
+
+    def save_many(self, results: Dict[str, List[Dict[str, Any]]], histories: Dict[str, List[Dict[str, Any]]]):
+        """
+        Replaces the stored scan of each symbol; symbols without price history are skipped.
+        """
+        scanned_at = datetime.now().isoformat()
+        rows = [
+            (symbol, json.dumps(patterns, default=float), histories[symbol][-1]["time"], scanned_at)
+            for symbol, patterns in results.items() if histories.get(symbol)
+        ]
+        if not rows:
+            return
+        db.executemany("""
+            INSERT INTO pattern_scans (symbol, patterns, bar_time, scanned_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT (symbol) DO UPDATE SET
+                patterns = excluded.patterns, bar_time = excluded.bar_time, scanned_at = excluded.scanned_at
+        """, rows)
+
+    def get(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """
+        {"symbol", "patterns", "bar_time", "scanned_at"} from the last scan, or None if the
+        symbol was never scanned.
+        """
+        row = db.execute_one("SELECT patterns, bar_time, scanned_at FROM pattern_scans WHERE symbol = ?", (symbol,))
+        if not row:
+            return None
+        return {
+            "symbol": symbol,
+            "patterns": json.loads(row["patterns"]),
+            "bar_time": row["bar_time"],
+            "scanned_at": row["scanned_at"]
+        }
+
+    async def get_fresh(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """
+        The stored scan, kept current for any symbol, not only the scanner's watchlist:
+        - never scanned: fetched and detected now;
+        - bars stored since the scan: re-detected now from the stored bars (no network);
+        - older than PATTERN_SCAN_TTL: served as is while a rescan runs in the background.
+        None if the symbol has no price data.
+        """
+        scan = self.get(symbol)
+        if scan is None:
+            return await self.scan(symbol)
+
+        last = bar_store.get_last_timestamp(symbol)
+        if last and (not scan["bar_time"] or str(last) > str(scan["bar_time"])):
+            from app.services.analysis import analysis_service
+            history = bar_store.get_bars(symbol, limit=PATTERN_HISTORY_BARS)
+            self.save(symbol, await analysis_service.detect_patterns(history, symbol), history)
+            return self.get(symbol)
+
+        age = (datetime.now() - datetime.fromisoformat(scan["scanned_at"])).total_seconds()
+        if age > PATTERN_SCAN_TTL and symbol not in self._refreshing:
+            self._refreshing.add(symbol)
+            if not spawn(lambda: self._rescan(symbol)):
+                self._refreshing.discard(symbol)
+        return scan
+
+    async def scan(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """
+        Fetches the last PATTERN_HISTORY_BARS bars, detects patterns and stores them. None
+        without price data.
+        """
+        from app.services.analysis import analysis_service
+        from app.services.market_data import market_data_service
+        history = (await market_data_service.get_price_history(symbol, days=PATTERN_FETCH_DAYS))[-PATTERN_HISTORY_BARS:]
+        if not history:
+            return None
+        self.save(symbol, await analysis_service.detect_patterns(history, symbol), history)
+        return self.get(symbol)
+
+    async def _rescan(self, symbol: str):
+        try:
+            await self.scan(symbol)
+        except Exception as e:
+            logger_service.log("ERROR", "PATTERNS", f"Pattern rescan failed for {symbol}", {"error": str(e)})
+        finally:
+            self._refreshing.discard(symbol)
+
+pattern_store = PatternStore()
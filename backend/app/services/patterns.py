@@ -0,0 +1,305 @@
+import os
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import List, Dict, Any, Optional, Tuple
+from app.services import indicators
+
+# Bars on each side a high/low must dominate to count as a swing point
+PATTERN_SWING_ORDER = int(os.getenv("PATTERN_SWING_ORDER", "3"))
+# Bars considered for chart patterns (double tops, flags, triangles)
+PATTERN_CHART_LOOKBACK = int(os.getenv("PATTERN_CHART_LOOKBACK", "60"))
+# Two peaks/troughs within this fraction of each other are "equal"
+PATTERN_PEAK_TOLERANCE = float(os.getenv("PATTERN_PEAK_TOLERANCE", "0.02"))
+# Reward-to-risk multiple used for candlestick targets
+PATTERN_REWARD_RISK = float(os.getenv("PATTERN_REWARD_RISK", "2.0"))
+
+# Bars of prior move that define the trend a candlestick reverses
+TREND_BARS = 5
+ATR_PERIOD = 14
+# Trendline slope (fraction of price per bar) below which a line counts as flat
+FLAT_SLOPE = 0.0005
+
+CANDLESTICK_PATTERNS = {
+    "Doji": {"reliability": "Low", "description": "Open and close are nearly equal after a {trend}, signalling indecision."},
+    "Hammer": {"reliability": "Medium", "description": "Long lower shadow after a downtrend; buyers rejected lower prices."},
+    "Shooting Star": {"reliability": "Medium", "description": "Long upper shadow after an uptrend; sellers rejected higher prices."},
+    "Bullish Engulfing": {"reliability": "High", "description": "Bullish body fully engulfs the prior bearish body after a downtrend."},
+    "Bearish Engulfing": {"reliability": "High", "description": "Bearish body fully engulfs the prior bullish body after an uptrend."},
+}
+
+def to_arrays(price_history: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (open, high, low, close) float arrays from a list of bar dicts.
+    """
+    ohlc = np.array([(p["open"], p["high"], p["low"], p["close"]) for p in price_history], dtype=float).reshape(-1, 4)
+    return ohlc[:, 0], ohlc[:, 1], ohlc[:, 2], ohlc[:, 3]
+
+def _shift(values: np.ndarray, bars: int) -> np.ndarray:
+    shifted = np.full_like(values, np.nan)
+    shifted[bars:] = values[:-bars]
+    return shifted
+
+class PatternEngine:
+    """
+    Deterministic candlestick and chart pattern detection over NumPy arrays.
+    Candlesticks are evaluated for every bar at once; chart patterns are fitted on
+    the last PATTERN_CHART_LOOKBACK bars from swing points. Every pattern carries
+    stop-loss and target levels derived from the bars themselves.
+    """
+
+    def candlestick_masks(self, open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Boolean mask per candlestick pattern, aligned with the input bars.
+        """
+        body = np.abs(close - open_)
+        range_ = high - low
+        upper = high - np.maximum(open_, close)
+        lower = np.minimum(open_, close) - low
+
+        prev_open, prev_close = _shift(open_, 1), _shift(close, 1)
+        prev_body = np.abs(prev_close - prev_open)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            trend = prev_close / _shift(close, TREND_BARS + 1) - 1
+        downtrend = trend < 0
+        uptrend = trend > 0
+
+        doji = (range_ > 0) & (body <= 0.1 * range_)
+        small_body = (range_ > 0) & (body > 0.1 * range_)
+        with np.errstate(invalid="ignore"):
+            return {
+                "Doji": doji & (downtrend | uptrend),
+                "Hammer": small_body & downtrend & (lower >= 2 * body) & (upper <= body),
+                "Shooting Star": small_body & uptrend & (upper >= 2 * body) & (lower <= body),
+                "Bullish Engulfing": downtrend & (prev_close < prev_open) & (close > open_)
+                    & (open_ <= prev_close) & (close >= prev_open) & (body > prev_body),
+                "Bearish Engulfing": uptrend & (prev_close > prev_open) & (close < open_)
+                    & (open_ >= prev_close) & (close <= prev_open) & (body > prev_body),
+            }
+
+    def swing_points(self, values: np.ndarray, order: int = PATTERN_SWING_ORDER, highs: bool = True) -> np.ndarray:
+        """
+        Indices of bars that are the max (or min) of the 2 * order + 1 bars around them.
+        """
+        if len(values) < 2 * order + 1:
+            return np.array([], dtype=int)
+        windows = sliding_window_view(values, 2 * order + 1)
+        extreme = windows.max(axis=1) if highs else windows.min(axis=1)
+        points = np.flatnonzero(values[order:len(values) - order] == extreme) + order
+        # A flat top/bottom yields a run of equal extremes; keep the first of each run
+        return points[np.concatenate(([True], np.diff(points) > order))] if len(points) else points
+
+    def detect(self, price_history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Patterns active on the latest bar, in the same shape as LLM-detected patterns.
+        """
+        if len(price_history) < TREND_BARS + 2:
+            return []
+
+        open_, high, low, close = to_arrays(price_history)
+        atr = indicators.atr(high, low, close, ATR_PERIOD)[-1]
+        if np.isnan(atr):
+            atr = indicators.true_range(high, low, close).mean()
+        timestamp = price_history[-1]["time"]
+
+        patterns = self._latest_candlesticks(open_, high, low, close, atr)
+        patterns.extend(self.chart_patterns(open_, high, low, close, atr))
+
+        for pattern in patterns:
+            pattern["timestamp"] = timestamp
+            pattern["timeframe"] = "Daily"
+            pattern["source"] = "engine"
+        return patterns
+
+    def candlestick_levels(self, open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray, atr) -> Dict[str, Dict[str, np.ndarray]]:
+        """
+        Per candlestick pattern: its mask plus direction, stop and target for every bar,
+        entering at that bar's close. atr may be a scalar or a per-bar array.
+        """
+        reversal_bullish = ~(_shift(close, 1) > _shift(close, TREND_BARS + 1))
+        two_bar_low, two_bar_high = np.fmin(low, _shift(low, 1)), np.fmax(high, _shift(high, 1))
+
+        levels = {}
+        for name, mask in self.candlestick_masks(open_, high, low, close).items():
+            if name == "Doji":
+                # Indecision reads as a possible reversal of the move into it
+                bullish = reversal_bullish
+            else:
+                bullish = np.full(len(close), name in ("Hammer", "Bullish Engulfing"))
+
+            engulfing = "Engulfing" in name
+            bull_stop = (two_bar_low if engulfing else low) - 0.25 * atr
+            bear_stop = (two_bar_high if engulfing else high) + 0.25 * atr
+            stop = np.where(bullish, bull_stop, bear_stop)
+            levels[name] = {
+                "mask": mask,
+                "bullish": bullish,
+                "stop": stop,
+                "target": close + PATTERN_REWARD_RISK * (close - stop)
+            }
+        return levels
+
+    def _latest_candlesticks(self, open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray, atr: float) -> List[Dict[str, Any]]:
+        patterns = []
+        for name, level in self.candlestick_levels(open_, high, low, close, atr).items():
+            if not level["mask"][-1]:
+                continue
+
+            kind = "Bullish" if level["bullish"][-1] else "Bearish"
+            info = CANDLESTICK_PATTERNS[name]
+            patterns.append(self._pattern(
+                name, kind, info["description"].format(trend="uptrend" if kind == "Bearish" else "downtrend"),
+                info["reliability"], level["stop"][-1], level["target"][-1]
+            ))
+        return patterns
+
+    def chart_patterns(self, open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray, atr: float) -> List[Dict[str, Any]]:
+        """
+        Double tops/bottoms, bull/bear flags and triangles on the recent window.
+        """
+        start = max(0, len(close) - PATTERN_CHART_LOOKBACK)
+        high, low, close = high[start:], low[start:], close[start:]
+
+        triangle = self._triangle(high, low, close)
+        candidates = [self._flag(high, low, close, bullish=True), self._flag(high, low, close, bullish=False), triangle]
+        if not triangle:
+            # Equal highs/lows inside a triangle are its trendline touches, not a double top/bottom
+            candidates += [self._double_top(high, low, close, atr), self._double_bottom(high, low, close, atr)]
+        return [pattern for pattern in candidates if pattern]
+
+    def _double_top(self, high: np.ndarray, low: np.ndarray, close: np.ndarray, atr: float) -> Optional[Dict[str, Any]]:
+        peaks = self.swing_points(high, highs=True)
+        if len(peaks) < 2:
+            return None
+
+        first, second = peaks[-2], peaks[-1]
+        top = max(high[first], high[second])
+        neckline = low[first:second + 1].min()
+        if (
+            second - first < 5
+            or abs(high[first] - high[second]) / top > PATTERN_PEAK_TOLERANCE
+            or (top - neckline) / top < 0.03
+            or high[second + 1:].max(initial=0.0) > top * (1 + PATTERN_PEAK_TOLERANCE)
+        ):
+            return None
+
+        confirmed = close[-1] < neckline
+        return self._pattern(
+            "Double Top", "Bearish",
+            f"Two peaks near {top:.2f} with neckline {neckline:.2f}" + ("; neckline broken." if confirmed else "; awaiting neckline break."),
+            "High" if confirmed else "Medium",
+            stop=top + 0.5 * atr,
+            target=neckline - (top - neckline)
+        )
+
+    def _double_bottom(self, high: np.ndarray, low: np.ndarray, close: np.ndarray, atr: float) -> Optional[Dict[str, Any]]:
+        troughs = self.swing_points(low, highs=False)
+        if len(troughs) < 2:
+            return None
+
+        first, second = troughs[-2], troughs[-1]
+        bottom = min(low[first], low[second])
+        neckline = high[first:second + 1].max()
+        if (
+            second - first < 5
+            or abs(low[first] - low[second]) / bottom > PATTERN_PEAK_TOLERANCE
+            or (neckline - bottom) / neckline < 0.03
+            or low[second + 1:].min(initial=np.inf) < bottom * (1 - PATTERN_PEAK_TOLERANCE)
+        ):
+            return None
+
+        confirmed = close[-1] > neckline
+        return self._pattern(
+            "Double Bottom", "Bullish",
+            f"Two troughs near {bottom:.2f} with neckline {neckline:.2f}" + ("; neckline broken." if confirmed else "; awaiting neckline break."),
+            "High" if confirmed else "Medium",
+            stop=bottom - 0.5 * atr,
+            target=neckline + (neckline - bottom)
+        )
+
+    def _flag(self, high: np.ndarray, low: np.ndarray, close: np.ndarray, bullish: bool, pole_bars: int = 10, min_pole_move: float = 0.08) -> Optional[Dict[str, Any]]:
+        sign = 1 if bullish else -1
+        for flag_bars in range(5, 16):
+            pole_start = len(close) - flag_bars - pole_bars - 1
+            if pole_start < 0:
+                return None
+
+            pole_from, pole_to = close[pole_start], close[-flag_bars - 1]
+            pole_move = sign * (pole_to / pole_from - 1)
+            if pole_move < min_pole_move:
+                continue
+
+            pole_height = abs(pole_to - pole_from)
+            flag_high, flag_low = high[-flag_bars:].max(), low[-flag_bars:].min()
+            slope = np.polyfit(np.arange(flag_bars), close[-flag_bars:], 1)[0]
+            # Tight, counter-trend or flat drift that gives back under half the pole
+            retrace = (pole_to - flag_low) if bullish else (flag_high - pole_to)
+            if flag_high - flag_low > 0.5 * pole_height or sign * slope > 0 or retrace > 0.5 * pole_height:
+                continue
+
+            if bullish:
+                return self._pattern(
+                    "Bull Flag", "Bullish",
+                    f"{pole_move * 100:.1f}% pole followed by a {flag_bars}-bar consolidation.",
+                    "High" if close[-1] > flag_high else "Medium",
+                    stop=flag_low, target=flag_high + pole_height
+                )
+            return self._pattern(
+                "Bear Flag", "Bearish",
+                f"{pole_move * 100:.1f}% drop followed by a {flag_bars}-bar consolidation.",
+                "High" if close[-1] < flag_low else "Medium",
+                stop=flag_high, target=flag_low - pole_height
+            )
+        return None
+
+    def _triangle(self, high: np.ndarray, low: np.ndarray, close: np.ndarray, order: int = 2) -> Optional[Dict[str, Any]]:
+        peaks = self.swing_points(high, order=order, highs=True)
+        troughs = self.swing_points(low, order=order, highs=False)
+        if len(peaks) < 2 or len(troughs) < 2:
+            return None
+
+        first = min(peaks[0], troughs[0])
+        upper_slope, upper_icpt = np.polyfit(peaks, high[peaks], 1)
+        lower_slope, lower_icpt = np.polyfit(troughs, low[troughs], 1)
+        end = len(close) - 1
+
+        upper_start, upper_end = upper_icpt + upper_slope * first, upper_icpt + upper_slope * end
+        lower_start, lower_end = lower_icpt + lower_slope * first, lower_icpt + lower_slope * end
+        height = upper_start - lower_start
+        if height <= 0 or upper_end <= lower_end or upper_end - lower_end >= height:
+            return None
+
+        scale = close[-1]
+        upper_flat = abs(upper_slope / scale) < FLAT_SLOPE
+        lower_flat = abs(lower_slope / scale) < FLAT_SLOPE
+
+        if upper_flat and lower_slope > 0 and not lower_flat:
+            name, kind = "Ascending Triangle", "Bullish"
+        elif lower_flat and upper_slope < 0 and not upper_flat:
+            name, kind = "Descending Triangle", "Bearish"
+        elif upper_slope < 0 and lower_slope > 0 and not (upper_flat or lower_flat) and first > 0:
+            # Symmetrical triangles tend to resolve in the direction of the move into them
+            name, kind = "Symmetrical Triangle", "Bullish" if close[first] > close[max(0, first - 10)] else "Bearish"
+        else:
+            return None
+
+        if kind == "Bullish":
+            stop, target = lower_end, upper_end + height
+        else:
+            stop, target = upper_end, lower_end - height
+        return self._pattern(
+            name, kind,
+            f"Converging trendlines from {height:.2f} wide to {upper_end - lower_end:.2f}; resistance {upper_end:.2f}, support {lower_end:.2f}.",
+            "Medium", stop, target
+        )
+
+    def _pattern(self, name: str, kind: str, description: str, reliability: str, stop: float, target: float) -> Dict[str, Any]:
+        return {
+            "name": name,
+            "type": kind,
+            "description": description,
+            "reliability": reliability,
+            "stop_loss": round(float(stop), 4),
+            "target_price": round(float(target), 4)
+        }
+
+pattern_engine = PatternEngine()
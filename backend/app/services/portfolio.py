@@ -0,0 +1,144 @@
+import os
+import math
+import numpy as np
+from statistics import NormalDist
+from typing import List, Dict, Any, Optional
+from app.services.bar_store import bar_store
+from app.services.risk import TRADING_DAYS, RISK_MIN_BARS, _number
+
+# Bars of returns the covariance is estimated from
+PORTFOLIO_LOOKBACK_BARS = int(os.getenv("PORTFOLIO_LOOKBACK_BARS", "252"))
+PORTFOLIO_MAX_ASSETS = int(os.getenv("PORTFOLIO_MAX_ASSETS", "500"))
+
+def _rounded(matrix: np.ndarray, digits: int) -> List[List[float]]:
+    return np.round(np.nan_to_num(matrix), digits).tolist()
+
+class PortfolioRiskEngine:
+    """
+    Portfolio risk for a set of weighted positions from the local bar store. Returns of all
+    assets are aligned on the calendar dates they share into one (dates x assets) matrix, and
+    every statistic (covariance, correlation, volatility, VaR, diversification) is a matrix
+    operation over it.
+    """
+
+    def return_matrix(self, symbols: List[str], lookback: int = PORTFOLIO_LOOKBACK_BARS) -> Dict[str, Any]:
+        """
+        {"symbols", "dates", "returns" (dates x symbols simple returns), "excluded"}.
+        Symbols with fewer than RISK_MIN_BARS stored bars are excluded rather than
+        shrinking the shared window for everyone.
+        """
+        series = bar_store.get_recent_bars_many(symbols, lookback + 1)
+        usable = [s for s in symbols if len(series.get(s, [])) > RISK_MIN_BARS]
+        excluded = [s for s in symbols if s not in usable]
+
+        # Exchanges in different time zones stamp the same session differently; align on the date
+        closes_by_date = {s: {str(b["time"])[:10]: b["close"] for b in series[s]} for s in usable}
+        shared = None
+        for s in usable:
+            dates = set(closes_by_date[s])
+            shared = dates if shared is None else shared & dates
+        dates = sorted(shared or [])[-(lookback + 1):]
+
+        if len(dates) <= RISK_MIN_BARS:
+            return {"symbols": [], "dates": [], "returns": np.empty((0, 0)), "excluded": symbols}
+
+        closes = np.array([[closes_by_date[s][d] for s in usable] for d in dates], dtype=float)
+        returns = np.diff(closes, axis=0) / closes[:-1]
+        return {"symbols": usable, "dates": dates[1:], "returns": returns, "excluded": excluded}
+
+    def analyze(
+        self,
+        symbols: List[str],
+        weights: Optional[List[Optional[float]]] = None,
+        lookback: int = PORTFOLIO_LOOKBACK_BARS,
+        confidence: float = 0.95,
+        horizon_days: int = 1
+    ) -> Dict[str, Any]:
+        """
+        Correlation and covariance matrices, portfolio volatility, historical and parametric
+        VaR/CVaR over horizon_days, diversification ratio and per-asset risk contributions.
+        Historical VaR/CVaR are None unless there are more than horizon_days return
+        observations, and any other non-finite figure is None. Missing weights mean equal
+        weight; weights are normalized to sum to 1.
+        """
+        if len(symbols) > PORTFOLIO_MAX_ASSETS:
+            raise ValueError(f"At most {PORTFOLIO_MAX_ASSETS} assets per portfolio")
+        if not 0.5 < confidence < 1:
+            raise ValueError("confidence must be between 0.5 and 1")
+
+        given = dict(zip(symbols, weights or []))
+        data = self.return_matrix(symbols, lookback)
+        names, returns = data["symbols"], data["returns"]
+        if not names:
+            return {"symbols": [], "excluded": data["excluded"], "observations": 0}
+
+        w = np.array([given.get(s) if given.get(s) is not None else 1.0 for s in names], dtype=float)
+        if (w < 0).any() or w.sum() <= 0:
+            raise ValueError("weights must be non-negative and not all zero")
+        w = w / w.sum()
+
+        covariance = np.cov(returns, rowvar=False, ddof=1).reshape(len(names), len(names))
+        vols = np.sqrt(np.diag(covariance))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            correlation = covariance / np.outer(vols, vols)
+        np.fill_diagonal(correlation, 1.0)
+
+        portfolio_returns = returns @ w
+        marginal = covariance @ w
+        variance = float(w @ marginal)
+        volatility = math.sqrt(max(variance, 0.0))
+
+        # Historical VaR: overlapping horizon-day compounded returns of the current weights
+        if horizon_days >= len(portfolio_returns):
+            horizon_returns = np.empty(0)
+        elif horizon_days > 1:
+            growth = np.cumprod(1 + portfolio_returns)
+            growth = np.concatenate(([1.0], growth))
+            horizon_returns = growth[horizon_days:] / growth[:-horizon_days] - 1
+        else:
+            horizon_returns = portfolio_returns
+        tail = 100 * (1 - confidence)
+        historical_var = historical_cvar = None
+        if len(horizon_returns):
+            historical_var = -float(np.percentile(horizon_returns, tail))
+            losses = horizon_returns[horizon_returns <= -historical_var]
+            historical_cvar = -float(losses.mean()) if len(losses) else None
+
+        # Parametric (variance-covariance) VaR with square-root-of-time scaling
+        z = NormalDist().inv_cdf(confidence)
+        mean = float(portfolio_returns.mean()) * horizon_days
+        sigma = volatility * math.sqrt(horizon_days)
+        parametric_var = z * sigma - mean
+        parametric_cvar = sigma * NormalDist().pdf(z) / (1 - confidence) - mean
+
+        contributions = w * marginal / variance if variance > 0 else np.full(len(names), np.nan)
+        return {
+            "symbols": names,
+            "excluded": data["excluded"],
+            "observations": int(len(returns)),
+            "from": data["dates"][0],
+            "to": data["dates"][-1],
+            "confidence": confidence,
+            "horizon_days": horizon_days,
+            "weights": np.round(w, 6).tolist(),
+            "volatility_pct": _number(volatility * math.sqrt(TRADING_DAYS) * 100),
+            "daily_volatility_pct": _number(volatility * 100),
+            "var_historical_pct": _number(historical_var * 100) if historical_var is not None else None,
+            "cvar_historical_pct": _number(historical_cvar * 100) if historical_cvar is not None else None,
+            "var_parametric_pct": _number(parametric_var * 100),
+            "cvar_parametric_pct": _number(parametric_cvar * 100),
+            "diversification_ratio": _number(float(w @ vols) / volatility) if volatility > 0 else None,
+            "assets": [
+                {
+                    "symbol": s,
+                    "weight": _number(float(w[i]), 6),
+                    "volatility_pct": _number(float(vols[i]) * math.sqrt(TRADING_DAYS) * 100),
+                    "risk_contribution_pct": _number(float(contributions[i]) * 100)
+                }
+                for i, s in enumerate(names)
+            ],
+            "correlation": _rounded(correlation, 4),
+            "covariance": _rounded(covariance * TRADING_DAYS, 8)
+        }
+
+portfolio_risk_engine = PortfolioRiskEngine()
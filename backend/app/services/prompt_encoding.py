@@ -0,0 +1,106 @@
+import os
+import math
+from typing import Dict, Any, List, Optional
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("o200k_base")
+except Exception:
+    # tiktoken is optional; fall back to the ~4 characters/token rule of thumb
+    _ENCODING = None
+
+# Default token budget for the price block of a prompt
+LLM_PRICE_TOKEN_BUDGET = int(os.getenv("LLM_PRICE_TOKEN_BUDGET", "400"))
+
+# Never trim the series below this many bars to meet a budget
+MIN_ROWS = 5
+
+_FIELDS = {"o": "open", "h": "high", "l": "low", "c": "close", "v": "volume"}
+
+def estimate_tokens(text: str) -> int:
+    """
+    Token count for a prompt, exact with tiktoken installed, estimated otherwise.
+    """
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return math.ceil(len(text) / 4)
+
+def summarize_series(price_history: List[Dict[str, Any]]) -> str:
+    """
+    One-line summary statistics header for a price series.
+    """
+    closes = [p["close"] for p in price_history]
+    returns = [(closes[i] / closes[i - 1]) - 1 for i in range(1, len(closes)) if closes[i - 1]]
+    mean = sum(returns) / len(returns) if returns else 0.0
+    variance = sum((r - mean) ** 2 for r in returns) / (len(returns) - 1) if len(returns) > 1 else 0.0
+    change = (closes[-1] / closes[0] - 1) * 100 if closes[0] else 0.0
+
+    return (
+        f"bars={len(closes)} {str(price_history[0]['time'])[:10]}..{str(price_history[-1]['time'])[:10]} "
+        f"last={_round(closes[-1])} chg={change:.1f}% "
+        f"hi={_round(max(p['high'] for p in price_history))} lo={_round(min(p['low'] for p in price_history))} "
+        f"vol={math.sqrt(variance) * 100:.2f}%/bar"
+    )
+
+def encode_price_series(
+    price_history: List[Dict[str, Any]],
+    fields: str = "ohlc",
+    max_rows: int = 30,
+    relative: bool = True,
+    include_summary: bool = True,
+    token_budget: Optional[int] = LLM_PRICE_TOKEN_BUDGET
+) -> str:
+    """
+    Compact text encoding of recent bars for an LLM prompt.
+    Prices are % offsets from the first bar's close (relative=True) or rounded absolutes,
+    one bar per line, oldest first, with timestamps collapsed into the summary header.
+    Oldest bars are dropped until the block fits token_budget.
+    """
+    if not price_history:
+        return "No price data."
+
+    rows = max_rows
+    while True:
+        text = _encode(price_history[-rows:], fields, relative, include_summary)
+        if token_budget is None or rows <= MIN_ROWS or estimate_tokens(text) <= token_budget:
+            return text
+        rows = max(MIN_ROWS, int(rows * 0.75))
+
+def _encode(bars: List[Dict[str, Any]], fields: str, relative: bool, include_summary: bool) -> str:
+    base = bars[0]["close"] or 1.0
+    lines = []
+    if include_summary:
+        lines.append(summarize_series(bars))
+
+    columns = ",".join(fields)
+    if relative:
+        lines.append(f"{columns} as % vs base {_round(base)}:")
+    else:
+        lines.append(f"{columns}:")
+
+    for bar in bars:
+        values = []
+        for field in fields:
+            value = bar[_FIELDS[field]]
+            if field == "v":
+                values.append(_compact_volume(value))
+            elif relative:
+                values.append(f"{(value / base - 1) * 100:.2f}")
+            else:
+                values.append(str(_round(value)))
+        lines.append(",".join(values))
+
+    return "\n".join(lines)
+
+def _round(value: float) -> float:
+    # 5 significant figures keeps levels accurate to ~0.01% while keeping tokens short
+    if not value:
+        return 0.0
+    digits = max(0, 4 - int(math.floor(math.log10(abs(value)))))
+    return round(value, digits)
+
+def _compact_volume(volume: float) -> str:
+    for threshold, suffix in ((1e9, "B"), (1e6, "M"), (1e3, "K")):
+        if volume >= threshold:
+            return f"{volume / threshold:.1f}{suffix}"
+    return str(int(volume))
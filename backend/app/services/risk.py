@@ -0,0 +1,290 @@
+import os
+import math
+import time
+import asyncio
+import numpy as np
+from typing import List, Dict, Any, Optional
+from app.services.bar_store import bar_store
+from app.services.analysis_cache import analysis_cache
+from app.services.background import spawn
+from app.services.logger import logger_service
+
+# Bars of history the metrics are computed over (about three years of trading days)
+RISK_LOOKBACK_BARS = int(os.getenv("RISK_LOOKBACK_BARS", "756"))
+# Rolling window for beta against the benchmark
+RISK_BETA_BARS = int(os.getenv("RISK_BETA_BARS", "252"))
+RISK_MIN_BARS = int(os.getenv("RISK_MIN_BARS", "30"))
+# History fetched for symbols and benchmarks with fewer stored bars than a beta window
+RISK_HISTORY_DAYS = int(os.getenv("RISK_HISTORY_DAYS", "365"))
+# Seconds between benchmark refreshes, and before a symbol's backfill is retried
+RISK_REFRESH_INTERVAL = int(os.getenv("RISK_REFRESH_INTERVAL", "21600"))
+
+TRADING_DAYS = 252
+VOLATILITY_BARS = 20
+BENCHMARKS = ["^NSEI", "^GSPC"]
+# Strategy fields measured here; they take precedence over reported fundamentals
+RISK_FIELDS = ["beta", "max_drawdown", "recent_gain_pct"]
+
+def benchmark_for(symbol: str) -> str:
+    """
+    The index a symbol's beta is measured against: NIFTY 50 for Indian listings, S&P 500 otherwise.
+    """
+    if symbol.endswith((".NS", ".BO")) or symbol in ("^NSEI", "^BSESN", "^NSEBANK", "^CNXIT"):
+        return "^NSEI"
+    return "^GSPC"
+
+def rolling_beta(returns: np.ndarray, benchmark_returns: np.ndarray, window: int) -> np.ndarray:
+    """
+    Beta of returns against benchmark_returns over a trailing window, for every bar at once;
+    NaN until the window is full.
+    """
+    n = len(returns)
+    beta = np.full(n, np.nan)
+    if n < window:
+        return beta
+
+    def window_sum(values: np.ndarray) -> np.ndarray:
+        total = np.concatenate(([0.0], np.cumsum(values)))
+        return total[window:] - total[:-window]
+
+    sum_x, sum_y = window_sum(benchmark_returns), window_sum(returns)
+    covariance = window_sum(benchmark_returns * returns) - sum_x * sum_y / window
+    variance = window_sum(benchmark_returns * benchmark_returns) - sum_x * sum_x / window
+    with np.errstate(invalid="ignore", divide="ignore"):
+        beta[window - 1:] = np.where(variance > 0, covariance / variance, np.nan)
+    return beta
+
+def _number(value: float, digits: int = 4) -> Optional[float]:
+    return None if value is None or not math.isfinite(value) else round(float(value), digits)
+
+class RiskEngine:
+    """
+    Price-derived risk metrics from stored bars: beta against the symbol's benchmark index,
+    max drawdown, realized volatility, return skew/kurtosis and historical VaR. Each metric
+    is one vectorized pass over the lookback window; results are cached per symbol until it
+    or its benchmark gets a new bar. A background refresher keeps the benchmark indices
+    stored, and symbols with short histories get a year of bars fetched in the background.
+    """
+
+    def __init__(self):
+        self.refresher_running = False
+        # symbol -> monotonic time of its last backfill request
+        self._requested: Dict[str, float] = {}
+
+    def metrics(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """
+        Risk metrics for a symbol, or None if it has fewer than RISK_MIN_BARS stored bars.
+        Short histories of the symbol or its benchmark are queued for a backfill either way.
+        """
+        bars = bar_store.get_bars(symbol, limit=RISK_LOOKBACK_BARS)
+        benchmark = benchmark_for(symbol)
+        benchmark_bars = bar_store.get_bars(benchmark, limit=RISK_LOOKBACK_BARS) if benchmark != symbol else bars
+
+        short = [s for s, stored in ((symbol, bars), (benchmark, benchmark_bars)) if len(stored) < RISK_BETA_BARS]
+        if short:
+            self.request(short)
+        if len(bars) < RISK_MIN_BARS:
+            return None
+
+        benchmark_last = benchmark_bars[-1]["time"] if benchmark_bars else None
+
+        return analysis_cache.get_or_compute(
+            "risk", symbol, bars,
+            lambda: self.compute(bars, benchmark_bars, benchmark),
+            params={"benchmark": benchmark, "benchmark_last": benchmark_last}
+        )
+
+    def compute(self, bars: List[Dict[str, Any]], benchmark_bars: List[Dict[str, Any]], benchmark: str) -> Dict[str, Any]:
+        closes = np.array([b["close"] for b in bars], dtype=float)
+        log_returns = np.diff(np.log(closes))
+
+        drawdown = closes / np.maximum.accumulate(closes) - 1
+        trough = int(drawdown.argmin())
+        peak = int(closes[:trough + 1].argmax())
+
+        mean, std = log_returns.mean(), log_returns.std(ddof=1)
+        centered = log_returns - mean
+        # Population moments for the shape statistics
+        variance = (centered ** 2).mean()
+        skew = (centered ** 3).mean() / variance ** 1.5 if variance > 0 else float("nan")
+        kurtosis = (centered ** 4).mean() / variance ** 2 - 3 if variance > 0 else float("nan")
+
+        simple_returns = np.expm1(log_returns)
+        var_95, var_99 = -np.percentile(simple_returns, [5, 1])
+        tail_95 = simple_returns[simple_returns <= -var_95]
+        year_ago = closes[-TRADING_DAYS - 1] if len(closes) > TRADING_DAYS else closes[0]
+
+        return {
+            "bars": len(bars),
+            "from": bars[0]["time"],
+            "to": bars[-1]["time"],
+            "benchmark": benchmark,
+            **self._beta(bars, benchmark_bars),
+            "max_drawdown": _number(drawdown.min() * 100, 2),
+            "max_drawdown_peak": bars[peak]["time"],
+            "max_drawdown_trough": bars[trough]["time"],
+            "current_drawdown": _number(drawdown[-1] * 100, 2),
+            "volatility_pct": _number(std * math.sqrt(TRADING_DAYS) * 100, 2),
+            "volatility_20d_pct": _number(log_returns[-VOLATILITY_BARS:].std(ddof=1) * math.sqrt(TRADING_DAYS) * 100, 2) if len(log_returns) > VOLATILITY_BARS else None,
+            "skew": _number(skew),
+            "excess_kurtosis": _number(kurtosis),
+            "var_95_pct": _number(var_95 * 100),
+            "var_99_pct": _number(var_99 * 100),
+            "cvar_95_pct": _number(-tail_95.mean() * 100) if len(tail_95) else None,
+            "recent_gain_pct": _number((closes[-1] / year_ago - 1) * 100, 2)
+        }
+
+    def _beta(self, bars: List[Dict[str, Any]], benchmark_bars: List[Dict[str, Any]]) -> Dict[str, Any]:
+        # Align on calendar date; exchanges in different time zones stamp the same day differently
+        benchmark_close = {str(b["time"])[:10]: b["close"] for b in benchmark_bars}
+        pairs = [(b["close"], benchmark_close[str(b["time"])[:10]]) for b in bars if str(b["time"])[:10] in benchmark_close]
+        if len(pairs) < RISK_MIN_BARS:
+            return {"beta": None, "beta_bars": len(pairs), "correlation": None}
+
+        aligned = np.array(pairs, dtype=float)
+        returns = np.diff(aligned, axis=0) / aligned[:-1]
+        window = min(RISK_BETA_BARS, len(returns))
+        beta = rolling_beta(returns[:, 0], returns[:, 1], window)[-1]
+        recent = returns[-window:]
+        correlation = np.corrcoef(recent[:, 0], recent[:, 1])[0, 1] if recent[:, 1].std() > 0 else float("nan")
+        return {"beta": _number(beta, 3), "beta_bars": window, "correlation": _number(correlation, 3)}
+
+    def screen_inputs(self, symbols: List[str]) -> Dict[str, np.ndarray]:
+        """
+        RISK_FIELDS for many symbols at once, as arrays aligned with symbols; NaN where
+        metrics() would have no value. Same windows and rules as metrics(), so the screener
+        and /predict score a symbol on the same numbers.
+        """
+        n = len(symbols)
+        inputs = {field: np.full(n, np.nan) for field in RISK_FIELDS}
+        if not n:
+            return inputs
+
+        groups: Dict[str, List[int]] = {}
+        for j, symbol in enumerate(symbols):
+            groups.setdefault(benchmark_for(symbol), []).append(j)
+        series = bar_store.get_recent_bars_many(list(dict.fromkeys(list(symbols) + list(groups))), RISK_LOOKBACK_BARS)
+
+        # Right-aligned closes, padded at the top with each symbol's first close
+        lookback = RISK_LOOKBACK_BARS
+        closes = np.full((lookback, n), np.nan)
+        for j, symbol in enumerate(symbols):
+            bars = series.get(symbol, [])
+            if bars:
+                closes[lookback - len(bars):, j] = [b["close"] for b in bars]
+        valid = ~np.isnan(closes)
+        enough = valid.sum(axis=0) >= RISK_MIN_BARS
+        if not enough.any():
+            return inputs
+        closes = np.where(valid, closes, closes[valid.argmax(axis=0), np.arange(n)])
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            drawdown = (closes / np.maximum.accumulate(closes, axis=0) - 1).min(axis=0)
+            # Padding repeats the first close, which is what metrics() falls back to
+            year_ago = closes[-TRADING_DAYS - 1] if lookback > TRADING_DAYS else closes[0]
+            gain = closes[-1] / year_ago - 1
+        inputs["max_drawdown"] = np.where(enough, np.round(drawdown * 100, 2), np.nan)
+        inputs["recent_gain_pct"] = np.where(enough, np.round(gain * 100, 2), np.nan)
+
+        for benchmark, columns in groups.items():
+            benchmark_bars = series.get(benchmark, [])
+            if not benchmark_bars:
+                continue
+            row_of = {str(b["time"])[:10]: i for i, b in enumerate(benchmark_bars)}
+            aligned = np.full((len(benchmark_bars), len(columns)), np.nan)
+            for k, j in enumerate(columns):
+                for b in series.get(symbols[j], []):
+                    i = row_of.get(str(b["time"])[:10])
+                    if i is not None:
+                        aligned[i, k] = b["close"]
+            beta = self._beta_columns(aligned, np.array([b["close"] for b in benchmark_bars], dtype=float))
+            inputs["beta"][columns] = np.where(enough[columns], np.round(beta, 3), np.nan)
+        return inputs
+
+    def _beta_columns(self, aligned: np.ndarray, benchmark_close: np.ndarray) -> np.ndarray:
+        """
+        _beta for every column of a (benchmark dates x symbols) close matrix, NaN where the
+        symbol did not trade. Returns span the dates a symbol skipped, as in _beta.
+        """
+        valid = ~np.isnan(aligned)
+        rows = np.arange(len(aligned))[:, None]
+        # Previous row each column has a close on
+        last_valid = np.maximum.accumulate(np.where(valid, rows, -1), axis=0)
+        previous = np.vstack([np.full((1, aligned.shape[1]), -1), last_valid[:-1]])
+        is_return = valid & (previous >= 0)
+        previous = np.maximum(previous, 0)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            x = np.where(is_return, benchmark_close[:, None] / benchmark_close[previous] - 1, 0.0)
+            y = np.where(is_return, aligned / aligned[previous, np.arange(aligned.shape[1])] - 1, 0.0)
+
+        # Only each column's latest RISK_BETA_BARS returns
+        count = is_return.sum(axis=0)
+        from_end = np.cumsum(is_return[::-1], axis=0)[::-1]
+        keep = is_return & (from_end <= RISK_BETA_BARS)
+        x, y = np.where(keep, x, 0.0), np.where(keep, y, 0.0)
+        window = np.maximum(np.minimum(count, RISK_BETA_BARS), 1)
+
+        sum_x, sum_y = x.sum(axis=0), y.sum(axis=0)
+        covariance = (x * y).sum(axis=0) - sum_x * sum_y / window
+        variance = (x * x).sum(axis=0) - sum_x * sum_x / window
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where((count + 1 >= RISK_MIN_BARS) & (variance > 0), covariance / variance, np.nan)
+
+    def request(self, symbols: List[str]):
+        """
+        Queues a background fetch of RISK_HISTORY_DAYS of bars, at most once per
+        RISK_REFRESH_INTERVAL per symbol (newly listed symbols never fill a beta window).
+        """
+        now = time.monotonic()
+        due = [s for s in dict.fromkeys(symbols) if now - self._requested.get(s, -math.inf) > RISK_REFRESH_INTERVAL]
+        if not due:
+            return
+        for s in due:
+            self._requested[s] = now
+        spawn(lambda: self.backfill(due))
+
+    async def backfill(self, symbols: List[str]) -> int:
+        """
+        Fetches RISK_HISTORY_DAYS of bars for each symbol into the bar store.
+        Returns the number of symbols that returned any bars.
+        """
+        from app.services.market_data import market_data_service
+        filled = 0
+        for symbol in symbols:
+            bars = await market_data_service.get_price_history(symbol, days=RISK_HISTORY_DAYS)
+            filled += bool(bars)
+        return filled
+
+    async def start_refresher(self, interval: int = RISK_REFRESH_INTERVAL):
+        """
+        Background loop that keeps the benchmark indices' bars current for beta.
+        """
+        if self.refresher_running:
+            return
+
+        self.refresher_running = True
+        logger_service.log("INFO", "RISK", "Background benchmark refresher started", {"interval": interval, "benchmarks": BENCHMARKS})
+
+        while self.refresher_running:
+            try:
+                await self.backfill(BENCHMARKS)
+            except Exception as e:
+                logger_service.log("ERROR", "RISK", "Benchmark refresh failed", {"error": str(e)})
+
+            await asyncio.sleep(interval)
+
+    def stop_refresher(self):
+        self.refresher_running = False
+        logger_service.log("INFO", "RISK", "Background benchmark refresher stopped")
+
+    def strategy_inputs(self, metrics: Optional[Dict[str, Any]]) -> Dict[str, float]:
+        """
+        The fields the Taleb and Housel strategies read, for the ones these metrics provide.
+        """
+        if not metrics:
+            return {}
+        fields = {field: metrics[field] for field in RISK_FIELDS}
+        return {field: value for field, value in fields.items() if value is not None}
+
+risk_engine = RiskEngine()
@@ -1,12 +1,16 @@
 import asyncio
-from typing import List
+from typing import List, Dict, Any
 from app.services.analysis import analysis_service
 from app.services.market_data import market_data_service
 from app.services.logger import logger_service
+from app.services.universe import universe_service
+from app.services.pattern_store import pattern_store, PATTERN_HISTORY_BARS, PATTERN_FETCH_DAYS
+from app.services.tradingview import tradingview_service, TRADINGVIEW_WARM_INTERVALS
 
 class ScannerService:
     def __init__(self):
         self.is_running = False
+        self.last_universe: List[Dict[str, Any]] = []
         self.watched_assets = [
             "BTC-USD", "ETH-USD", "SOL-USD", # Crypto
             "RELIANCE.NS", "TCS.NS", "HDFCBANK.NS", # India
@@ -23,18 +27,34 @@ class ScannerService:
         
         while self.is_running:
             try:
+                histories = {}
                 for symbol in self.watched_assets:
-                    # Fetch data
-                    history = await market_data_service.get_price_history(symbol, days=30)
-                    
-                    # Detect patterns (this includes AI detection and saving to LearningService)
-                    patterns = await analysis_service.detect_patterns(history, symbol)
-                    
-                    if patterns:
-                        logger_service.log("INFO", "SCANNER", f"Detected {len(patterns)} patterns for {symbol}", {"patterns": [p['name'] for p in patterns]})
+                    # Fetch data; patterns are detected over the same bar window as on demand
+                    history = await market_data_service.get_price_history(symbol, days=PATTERN_FETCH_DAYS)
+                    histories[symbol] = history[-PATTERN_HISTORY_BARS:]
                     
                     # Sleep between assets to avoid rate limits
                     await asyncio.sleep(2)
+
+                # TradingView ratings for the whole watchlist, one request per screener and interval
+                await asyncio.to_thread(tradingview_service.warm, self.watched_assets, TRADINGVIEW_WARM_INTERVALS)
+
+                # Indicator screen for the whole watchlist in one vectorized pass
+                self.last_universe = universe_service.snapshot(self.watched_assets)
+                overbought = [row["symbol"] for row in self.last_universe if (row["rsi"] or 50) > 70]
+                oversold = [row["symbol"] for row in self.last_universe if row["rsi"] is not None and row["rsi"] < 30]
+                crosses = {row["symbol"]: "Golden" if row["sma_cross"] > 0 else "Death" for row in self.last_universe if row["sma_cross"]}
+                if overbought or oversold or crosses:
+                    logger_service.log("INFO", "SCANNER", "Universe screen", {"overbought": overbought, "oversold": oversold, "sma_crosses": crosses})
+
+                # Detect patterns for the whole watchlist; AI detection is packed into a few batched LLM calls
+                results = await analysis_service.detect_patterns_batch(histories)
+                # Stored for /asset/{symbol}/patterns, so the request path never runs detection
+                pattern_store.save_many(results, histories)
+
+                for symbol, patterns in results.items():
+                    if patterns:
+                        logger_service.log("INFO", "SCANNER", f"Detected {len(patterns)} patterns for {symbol}", {"patterns": [p['name'] for p in patterns]})
                 
                 # Sleep before next full cycle
                 await asyncio.sleep(60) 
@@ -0,0 +1,232 @@
+import os
+import time
+import numpy as np
+from typing import Dict, Any, Optional
+from app.database import db
+from app.services.bar_store import bar_store
+from app.services.fundamentals import fundamentals_service, FIELDS, DERIVED_FIELDS
+from app.services.risk import risk_engine, RISK_FIELDS
+
+# Minimum seconds between recomputes of the bar-derived risk columns after bars change
+SCREENER_RISK_REFRESH = int(os.getenv("SCREENER_RISK_REFRESH", "60"))
+
+STRATEGIES = ["graham", "lynch", "buffett", "taleb", "housel"]
+
+# Fields the strategies read; NaN where a symbol has no stored value
+SCREEN_FIELDS = [
+    "pe_ratio", "pb_ratio", "current_ratio", "debt_to_equity", "earnings_growth", "dividend_yield",
+    "institutional_ownership", "roe", "gross_margin", "fcf_yield", "beta", "insider_ownership",
+    "max_drawdown", "recent_gain_pct"
+]
+# Fields some source can populate; coverage is measured over these only
+COVERAGE_FIELDS = [field for field in SCREEN_FIELDS if field in FIELDS or field in DERIVED_FIELDS or field in RISK_FIELDS]
+
+def _fill(values: np.ndarray, default: float) -> np.ndarray:
+    return np.where(np.isnan(values), default, values)
+
+class StrategyScreener:
+    """
+    The five strategies' criteria applied column-wise to the fundamentals of every stored
+    symbol at once. Each score mirrors the matching Strategy.evaluate, including its default
+    for a missing field; the per-asset evaluate methods remain the source of the written
+    explanations. The pivoted table is reused until the fundamentals store is written to.
+
+    Beta, max drawdown and one-year gain measured from stored bars replace the reported
+    values where available, exactly as in /predict.
+    """
+
+    def __init__(self):
+        self._table: Optional[Dict[str, Any]] = None
+        self._version = -1
+        self._risk: Optional[Dict[str, np.ndarray]] = None
+        self._risk_symbols = None
+        self._risk_at = 0.0
+        self._bars_changed = False
+        bar_store.subscribe(self._on_bars_changed)
+
+    def _on_bars_changed(self, symbol: str):
+        self._bars_changed = True
+
+    def load_risk(self, table: Dict[str, Any]) -> Dict[str, np.ndarray]:
+        """
+        Bar-derived RISK_FIELDS for the table's symbols, recomputed when the symbols change or,
+        at most every SCREENER_RISK_REFRESH seconds, when bars do.
+        """
+        symbols = table["symbols"]
+        stale = self._bars_changed and time.monotonic() - self._risk_at >= SCREENER_RISK_REFRESH
+        if self._risk is not None and self._risk_symbols is symbols and not stale:
+            return self._risk
+
+        self._bars_changed = False
+        self._risk = risk_engine.screen_inputs(symbols)
+        self._risk_symbols, self._risk_at = symbols, time.monotonic()
+        return self._risk
+
+    def with_risk(self, table: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        The table with measured risk fields taking precedence over reported ones.
+        """
+        risk = self.load_risk(table)
+        return {**table, **{field: np.where(np.isnan(risk[field]), table[field], risk[field]) for field in RISK_FIELDS}}
+
+    def load_table(self) -> Dict[str, Any]:
+        """
+        {"symbols": [...], "assets": {symbol: asset row}, field: float array per SCREEN_FIELDS}.
+        """
+        if self._table is not None and self._version == fundamentals_service.version:
+            return self._table
+
+        version = fundamentals_service.version
+        rows = db.execute("SELECT symbol, field, value FROM fundamentals WHERE value IS NOT NULL")
+        symbols = sorted({r["symbol"] for r in rows})
+        position = {symbol: i for i, symbol in enumerate(symbols)}
+        column = {field: i for i, field in enumerate(SCREEN_FIELDS)}
+
+        matrix = np.full((len(SCREEN_FIELDS), len(symbols)), np.nan)
+        for r in rows:
+            if r["field"] in column:
+                matrix[column[r["field"]], position[r["symbol"]]] = r["value"]
+
+        assets = {
+            a["symbol"]: a for a in db.execute("SELECT symbol, name, type, sector, market_cap FROM assets")
+            if a["symbol"] in position
+        }
+        table = {"symbols": symbols, "assets": assets, **{field: matrix[i] for field, i in column.items()}}
+        self._table, self._version = table, version
+        return table
+
+    def score(self, table: Dict[str, np.ndarray], rsi: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """
+        Score and rating arrays per strategy, plus the composite score and field coverage.
+        """
+        n = len(table["symbols"])
+        col = lambda field, default: _fill(table[field], default)
+        rsi = _fill(rsi, 50.0) if rsi is not None else np.full(n, 50.0)
+
+        # Graham: five pass/fail criteria, 20 points each
+        graham = 20.0 * (
+            (col("pe_ratio", 20.0) < 15).astype(int)
+            + (col("pb_ratio", 2.0) < 1.5)
+            + (col("current_ratio", 1.5) > 2.0)
+            + (col("debt_to_equity", 0.8) < 0.5)
+            + (col("earnings_growth", 5.0) > 0)
+        )
+        graham_rating = np.select([graham >= 80, graham >= 40], ["Undervalued", "Fair Value"], "Overvalued")
+
+        # Lynch: PEG, growth sweet spot, debt, institutional ownership
+        growth = col("earnings_growth", 15.0)
+        adjusted_growth = growth + col("dividend_yield", 1.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            peg = np.where(adjusted_growth > 0, col("pe_ratio", 20.0) / adjusted_growth, 10.0)
+        debt = col("debt_to_equity", 0.5)
+        institutional = col("institutional_ownership", 40.0)
+        lynch = (
+            np.select([peg < 0.5, peg < 1.0, peg < 1.5], [40, 30, 15], 0)
+            + np.select([(growth >= 20) & (growth <= 25), (growth >= 10) & (growth < 20), growth > 30], [20, 15, 5], 0)
+            + np.select([debt < 0.3, debt < 0.8], [20, 10], 0)
+            + np.select([institutional < 30, institutional < 60], [20, 10], 0)
+        )
+        lynch_rating = np.select([lynch >= 80, lynch >= 50], ["Buy", "Hold"], "Avoid")
+
+        # Buffett: moat (ROE, gross margin), low debt, free cash flow
+        roe, margin, fcf = col("roe", 20.0), col("gross_margin", 50.0), col("fcf_yield", 5.0)
+        buffett = (
+            np.select([roe > 20, roe > 15, roe > 10], [30, 20, 10], 0)
+            + np.select([margin > 60, margin > 40, margin > 20], [25, 15, 5], 0)
+            + np.select([debt < 0.3, debt < 0.5], [25, 15], 0)
+            + np.select([fcf > 5, fcf > 0], [20, 10], 0)
+        )
+        buffett_rating = np.select([buffett >= 85, buffett >= 55], ["Buy", "Hold"], "Avoid")
+
+        # Taleb: fragility from leverage with volatility, skin in the game, drawdowns
+        beta = col("beta", 1.0)
+        insiders = col("insider_ownership", 10.0)
+        fragility = (
+            np.select([(debt > 1.0) & (beta > 1.5), debt > 1.5], [40, 20], 0)
+            + np.where(insiders < 1, 10, 0)
+            + np.where(col("max_drawdown", -20.0) < -50, 20, 0)
+        )
+        taleb = 100 - fragility
+        taleb_rating = np.select([fragility < 10, fragility < 30], ["Antifragile", "Robust"], "Fragile")
+
+        # Housel: FOMO and volatility penalties from 100
+        housel = (
+            100
+            - np.select([(rsi > 75) & (col("pe_ratio", 20.0) > 50), rsi > 80], [40, 20], 0)
+            - np.where(beta > 2.0, 10, 0)
+        )
+        housel_rating = np.select([housel >= 80, housel >= 50], ["Zen", "Anxious"], "Reckless")
+
+        scores = {"graham": graham, "lynch": lynch, "buffett": buffett, "taleb": taleb, "housel": housel}
+        present = np.stack([~np.isnan(table[field]) for field in COVERAGE_FIELDS])
+        return {
+            **{f"{name}_score": values.astype(float) for name, values in scores.items()},
+            "graham_rating": graham_rating, "lynch_rating": lynch_rating, "buffett_rating": buffett_rating,
+            "taleb_rating": taleb_rating, "housel_rating": housel_rating,
+            "composite_score": np.mean(np.stack(list(scores.values())), axis=0),
+            "coverage": present.mean(axis=0)
+        }
+
+    def screen(
+        self,
+        sort: str = "composite",
+        descending: bool = True,
+        min_scores: Optional[Dict[str, float]] = None,
+        asset_type: Optional[str] = None,
+        sector: Optional[str] = None,
+        min_coverage: float = 0.0,
+        limit: int = 50,
+        offset: int = 0
+    ) -> Dict[str, Any]:
+        """
+        Scores every symbol with stored fundamentals, filters by minimum scores, asset type,
+        sector and field coverage, and returns one sorted page.
+        """
+        if sort not in STRATEGIES + ["composite"]:
+            raise ValueError(f"Unknown sort strategy: {sort}")
+
+        table = self.with_risk(self.load_table())
+        symbols = table["symbols"]
+        if not symbols:
+            return {"total": 0, "results": []}
+
+        from app.services.universe import universe_service
+        rsi_by_symbol = {row["symbol"]: row["rsi"] for row in universe_service.snapshot(symbols)}
+        rsi = np.array([rsi_by_symbol.get(s) if rsi_by_symbol.get(s) is not None else np.nan for s in symbols], dtype=float)
+        scores = self.score(table, rsi)
+
+        keep = scores["coverage"] >= min_coverage
+        for name, minimum in (min_scores or {}).items():
+            if minimum is not None:
+                keep &= scores[f"{name}_score"] >= minimum
+        if asset_type or sector:
+            info = [table["assets"].get(s, {}) for s in symbols]
+            if asset_type:
+                keep &= np.array([a.get("type") == asset_type for a in info])
+            if sector:
+                keep &= np.array([a.get("sector") == sector for a in info])
+
+        index = np.flatnonzero(keep)
+        order = np.argsort(scores[f"{sort}_score"][index], kind="stable")
+        if descending:
+            order = order[::-1]
+        page = index[order][offset:offset + limit]
+
+        results = []
+        for i in page:
+            asset = table["assets"].get(symbols[i], {})
+            row = {
+                "symbol": symbols[i],
+                "name": asset.get("name"),
+                "type": asset.get("type"),
+                "sector": asset.get("sector"),
+                "coverage": round(float(scores["coverage"][i]), 2),
+                "composite_score": round(float(scores["composite_score"][i]), 1)
+            }
+            for name in STRATEGIES:
+                row[f"{name}_score"] = round(float(scores[f"{name}_score"][i]), 1)
+                row[f"{name}_rating"] = str(scores[f"{name}_rating"][i])
+            results.append(row)
+        return {"total": int(len(index)), "results": results}
+
+strategy_screener = StrategyScreener()
@@ -0,0 +1,106 @@
+import re
+import math
+from typing import Dict, Any, List
+
+# Finance-oriented word weights (-3 .. +3)
+FINANCE_LEXICON = {
+    # Bullish
+    "beat": 2.0, "beats": 2.0, "surge": 2.5, "surges": 2.5, "surged": 2.5, "soar": 2.5, "soars": 2.5, "soared": 2.5,
+    "jump": 2.0, "jumps": 2.0, "jumped": 2.0, "rally": 2.0, "rallies": 2.0, "rallied": 2.0, "gain": 1.5, "gains": 1.5,
+    "gained": 1.5, "rise": 1.5, "rises": 1.5, "rose": 1.5, "climb": 1.5, "climbs": 1.5, "climbed": 1.5,
+    "record": 1.5, "high": 1.0, "highs": 1.0, "upgrade": 2.5, "upgrades": 2.5, "upgraded": 2.5, "outperform": 2.0,
+    "buy": 1.5, "bullish": 2.5, "growth": 1.5, "grow": 1.5, "grows": 1.5, "profit": 1.5, "profits": 1.5,
+    "profitable": 1.5, "strong": 1.5, "stronger": 1.5, "robust": 1.5, "boost": 1.5, "boosts": 1.5, "boosted": 1.5,
+    "expand": 1.0, "expands": 1.0, "expansion": 1.0, "approval": 1.5, "approved": 1.5, "wins": 1.5, "win": 1.5,
+    "dividend": 1.0, "buyback": 1.5, "raises": 1.0, "raised": 1.0, "optimism": 2.0, "optimistic": 2.0,
+    "recovery": 1.5, "recovers": 1.5, "rebound": 1.5, "rebounds": 1.5, "tops": 1.5, "exceeds": 2.0, "exceeded": 2.0,
+    "upbeat": 2.0, "breakthrough": 2.0, "partnership": 1.0, "accelerates": 1.5,
+    # Bearish
+    "miss": -2.0, "misses": -2.0, "missed": -2.0, "plunge": -2.5, "plunges": -2.5, "plunged": -2.5,
+    "tumble": -2.5, "tumbles": -2.5, "tumbled": -2.5, "slump": -2.5, "slumps": -2.5, "crash": -3.0, "crashes": -3.0,
+    "fall": -1.5, "falls": -1.5, "fell": -1.5, "drop": -1.5, "drops": -1.5, "dropped": -1.5, "decline": -1.5,
+    "declines": -1.5, "declined": -1.5, "slide": -1.5, "slides": -1.5, "sink": -2.0, "sinks": -2.0, "sank": -2.0,
+    "loss": -2.0, "losses": -2.0, "low": -1.0, "lows": -1.0, "downgrade": -2.5, "downgrades": -2.5,
+    "downgraded": -2.5, "underperform": -2.0, "sell": -1.5, "selloff": -2.5, "bearish": -2.5, "weak": -1.5,
+    "weaker": -1.5, "weakness": -1.5, "warning": -2.0, "warns": -2.0, "warned": -2.0, "lawsuit": -2.0,
+    "probe": -2.0, "investigation": -2.0, "fraud": -3.0, "default": -3.0, "bankruptcy": -3.0, "layoffs": -2.0,
+    "layoff": -2.0, "recall": -1.5, "fined": -1.5, "penalty": -1.5, "debt": -0.5, "risk": -1.0,
+    "risks": -1.0, "fears": -2.0, "fear": -2.0, "concern": -1.5, "concerns": -1.5, "uncertainty": -1.5,
+    "volatile": -1.0, "volatility": -1.0, "inflation": -1.0, "recession": -2.5, "slowdown": -2.0, "halt": -2.0,
+    "halts": -2.0, "suspended": -2.0, "delay": -1.5, "delays": -1.5, "delayed": -1.5, "disappoint": -2.0,
+    "disappoints": -2.0, "disappointing": -2.0, "pessimism": -2.0, "hack": -2.5, "breach": -2.5,
+}
+
+NEGATORS = {"not", "no", "never", "without", "fails", "failed", "fail", "lacks", "isn't", "wasn't", "don't", "doesn't", "didn't", "won't", "can't"}
+
+INTENSIFIERS = {"sharply": 1.5, "significantly": 1.4, "strongly": 1.4, "massive": 1.5, "huge": 1.4, "slightly": 0.6, "modestly": 0.7, "marginally": 0.6}
+
+# Tokens before a sentiment word that a negator still flips
+NEGATION_WINDOW = 3
+
+_TOKEN_RE = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
+class LexiconSentimentScorer:
+    """
+    Local headline sentiment from a finance lexicon, with negation and intensifier handling.
+    Cheap enough to run on every article at ingest; low-confidence results are
+    meant to be escalated to the LLM.
+    """
+
+    def __init__(self, lexicon: Dict[str, float] = FINANCE_LEXICON, threshold: float = 0.2, alpha: float = 4.0):
+        self.lexicon = lexicon
+        self.threshold = threshold
+        self.alpha = alpha
+
+    def score(self, text: str) -> Dict[str, Any]:
+        """
+        Returns {"sentiment", "score", "confidence"} for one headline.
+        score is in [-1, 1]; confidence is 0 when no lexicon word matched.
+        """
+        tokens = _TOKEN_RE.findall((text or "").lower())
+        positive = negative = 0.0
+        last_negator = -NEGATION_WINDOW - 1
+
+        for i, token in enumerate(tokens):
+            if token in NEGATORS:
+                last_negator = i
+                continue
+
+            weight = self.lexicon.get(token)
+            if weight is None:
+                continue
+
+            if i > 0 and tokens[i - 1] in INTENSIFIERS:
+                weight *= INTENSIFIERS[tokens[i - 1]]
+            if i - last_negator <= NEGATION_WINDOW:
+                weight *= -0.75
+
+            if weight > 0:
+                positive += weight
+            else:
+                negative -= weight
+
+        total = positive - negative
+        mass = positive + negative
+        normalized = total / math.sqrt(total * total + self.alpha) if mass else 0.0
+
+        # Confident when the evidence is strong and points one way
+        confidence = (abs(total) / mass) * min(1.0, mass / 3.0) if mass else 0.0
+
+        if normalized > self.threshold:
+            sentiment = "Bullish"
+        elif normalized < -self.threshold:
+            sentiment = "Bearish"
+        else:
+            sentiment = "Neutral"
+
+        return {
+            "sentiment": sentiment,
+            "score": round(normalized, 4),
+            "confidence": round(confidence, 4)
+        }
+
+    def score_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        return [self.score(text) for text in texts]
+
+sentiment_scorer = LexiconSentimentScorer()
@@ -0,0 +1,111 @@
+import os
+import numpy as np
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+# Simulated price paths per projection
+SIMULATION_PATHS = int(os.getenv("SIMULATION_PATHS", "5000"))
+# "bootstrap" resamples historical daily returns; "gbm" draws them from a fitted normal
+SIMULATION_METHOD = os.getenv("SIMULATION_METHOD", "bootstrap")
+# Most recent bars whose returns feed the simulation
+SIMULATION_LOOKBACK_BARS = int(os.getenv("SIMULATION_LOOKBACK_BARS", "500"))
+# Calendar-day horizons always projected alongside the requested one
+SIMULATION_HORIZONS = [int(h) for h in os.getenv("SIMULATION_HORIZONS", "1,7,30,90").split(",") if h.strip()]
+# Fixed seed for reproducible projections; random when unset
+SIMULATION_SEED = int(os.getenv("SIMULATION_SEED")) if os.getenv("SIMULATION_SEED") else None
+
+# Annualized volatility assumed when the history is too short to estimate one
+SIMULATION_DEFAULT_VOLATILITY = float(os.getenv("SIMULATION_DEFAULT_VOLATILITY", "0.4"))
+
+PERCENTILES = [5, 25, 50, 75, 95]
+MIN_RETURNS = 10
+TRADING_DAYS = 252
+
+def bars_per_day(price_history: List[Dict[str, Any]]) -> float:
+    """
+    Trading bars per calendar day in the history (about 5/7 for stocks, 1 for crypto).
+    """
+    try:
+        first = datetime.fromisoformat(str(price_history[0]["time"]))
+        last = datetime.fromisoformat(str(price_history[-1]["time"]))
+        span = (last - first).total_seconds() / 86400
+    except (ValueError, KeyError, IndexError):
+        return 1.0
+    if span <= 0:
+        return 1.0
+    return min(1.0, (len(price_history) - 1) / span)
+
+class MonteCarloEngine:
+    """
+    Price projections from simulated return paths. All paths and horizons are drawn in
+    one NumPy call: a (paths x longest horizon) matrix of daily log returns whose
+    cumulative sums at each horizon give the terminal price distribution.
+    """
+
+    def simulate(self, closes, horizons: List[int], paths: int = SIMULATION_PATHS, method: str = SIMULATION_METHOD, seed: Optional[int] = SIMULATION_SEED) -> Dict[int, np.ndarray]:
+        """
+        Terminal prices per horizon (in bars), each an array of `paths` outcomes.
+        With fewer than MIN_RETURNS returns the paths are driftless GBM at
+        SIMULATION_DEFAULT_VOLATILITY instead (see effective_method).
+        """
+        closes = np.asarray(closes, dtype=float)[-SIMULATION_LOOKBACK_BARS - 1:]
+        closes = closes[closes > 0]
+        if len(closes) == 0:
+            raise ValueError("No prices to simulate from")
+        returns = np.diff(np.log(closes))
+        method = self.effective_method(len(returns), method)
+
+        rng = np.random.default_rng(seed)
+        longest = max(horizons)
+        if method == "default":
+            sigma = SIMULATION_DEFAULT_VOLATILITY / np.sqrt(TRADING_DAYS)
+            draws = rng.normal(-sigma ** 2 / 2, sigma, size=(paths, longest))
+        elif method == "gbm":
+            # Mean log return already carries the -sigma^2/2 drift correction
+            draws = rng.normal(returns.mean(), returns.std(ddof=1), size=(paths, longest))
+        elif method == "bootstrap":
+            draws = rng.choice(returns, size=(paths, longest), replace=True)
+        else:
+            raise ValueError(f"Unknown simulation method: {method}")
+
+        cumulative = np.cumsum(draws, axis=1)
+        return {h: closes[-1] * np.exp(cumulative[:, h - 1]) for h in horizons}
+
+    def effective_method(self, returns: int, method: str = SIMULATION_METHOD) -> str:
+        """
+        The method actually used for a history with this many returns: "default" when it is
+        too short to estimate a return distribution from.
+        """
+        return "default" if returns < MIN_RETURNS else method
+
+    def project(self, price_history: List[Dict[str, Any]], horizon_days: List[int], paths: int = SIMULATION_PATHS, method: str = SIMULATION_METHOD, seed: Optional[int] = SIMULATION_SEED) -> Dict[str, Any]:
+        """
+        Percentiles of the projected price for each calendar-day horizon.
+        """
+        closes = [p["close"] for p in price_history if p.get("close")]
+        per_day = bars_per_day(price_history)
+        bars = {days: max(1, int(round(days * per_day))) for days in horizon_days}
+        terminal = self.simulate(closes, sorted(set(bars.values())), paths, method, seed)
+
+        current = closes[-1]
+        returns_used = min(len(closes), SIMULATION_LOOKBACK_BARS + 1) - 1
+        horizons = {}
+        for days in sorted(horizon_days):
+            prices = terminal[bars[days]]
+            values = np.percentile(prices, PERCENTILES)
+            horizons[str(days)] = {
+                "bars": bars[days],
+                "percentiles": {f"p{q}": round(float(v), 4) for q, v in zip(PERCENTILES, values)},
+                "expected_price": round(float(prices.mean()), 4),
+                "prob_up": round(float((prices > current).mean()), 4)
+            }
+        return {
+            "method": self.effective_method(returns_used, method),
+            "paths": paths,
+            "seed": seed,
+            "returns_used": returns_used,
+            "current_price": current,
+            "horizons": horizons
+        }
+
+monte_carlo_engine = MonteCarloEngine()
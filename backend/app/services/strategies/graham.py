@@ -21,7 +21,7 @@ class GrahamStrategy:
         pb_ratio = asset_data.get("pb_ratio", 2.0)
         current_ratio = asset_data.get("current_ratio", 1.5)
         debt_to_equity = asset_data.get("debt_to_equity", 0.8)
-        earnings_growth = asset_data.get("earnings_growth", 0.05) # 5% growth
+        earnings_growth = asset_data.get("earnings_growth", 5.0) # Percentage
 
         # Criterion 1: Moderate P/E Ratio (< 15)
         if pe_ratio < 15:
@@ -55,7 +55,7 @@ class GrahamStrategy:
         # Criterion 5: Earnings Stability/Growth (Positive growth)
         if earnings_growth > 0:
             score += 1
-            details.append(f"PASS: Earnings Growth ({earnings_growth*100}%) is positive.")
+            details.append(f"PASS: Earnings Growth ({earnings_growth}%) is positive.")
         else:
             details.append(f"FAIL: Earnings Growth is negative.")
 
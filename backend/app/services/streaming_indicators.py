@@ -0,0 +1,243 @@
+import copy
+import math
+from collections import deque
+from typing import Dict, Any, Optional
+
+def bar_values(bar: Dict[str, Any]) -> list:
+    return [bar["open"], bar["high"], bar["low"], bar["close"], int(bar.get("volume") or 0)]
+
+class StreamingEMA:
+    """
+    EMA updated one value at a time; seeded with the SMA of the first period values,
+    so it matches indicators.ema (alpha = 2 / (period + 1)) or indicators.wilder (alpha = 1 / period).
+    """
+
+    def __init__(self, period: int, alpha: Optional[float] = None):
+        self.period = period
+        self.alpha = alpha if alpha is not None else 2.0 / (period + 1)
+        self.count = 0
+        self.seed_sum = 0.0
+        self.value: Optional[float] = None
+
+    def update(self, x: float) -> Optional[float]:
+        self.count += 1
+        if self.value is not None:
+            self.value += self.alpha * (x - self.value)
+        else:
+            self.seed_sum += x
+            if self.count == self.period:
+                self.value = self.seed_sum / self.period
+        return self.value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"period": self.period, "alpha": self.alpha, "count": self.count, "seed_sum": self.seed_sum, "value": self.value}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StreamingEMA":
+        ema = cls(data["period"], data["alpha"])
+        ema.count, ema.seed_sum, ema.value = data["count"], data["seed_sum"], data["value"]
+        return ema
+
+class StreamingWilder(StreamingEMA):
+    def __init__(self, period: int):
+        super().__init__(period, 1.0 / period)
+
+class StreamingRSI:
+    """
+    Wilder's RSI updated per close.
+    """
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.prev_close: Optional[float] = None
+        self.gain = StreamingWilder(period)
+        self.loss = StreamingWilder(period)
+
+    @property
+    def value(self) -> Optional[float]:
+        if self.gain.value is None:
+            return None
+        if self.loss.value == 0:
+            return 100.0 if self.gain.value > 0 else 50.0
+        return 100 - 100 / (1 + self.gain.value / self.loss.value)
+
+    def update(self, close: float) -> Optional[float]:
+        if self.prev_close is not None:
+            delta = close - self.prev_close
+            self.gain.update(max(delta, 0.0))
+            self.loss.update(max(-delta, 0.0))
+        self.prev_close = close
+        return self.value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"period": self.period, "prev_close": self.prev_close, "gain": self.gain.to_dict(), "loss": self.loss.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StreamingRSI":
+        rsi = cls(data["period"])
+        rsi.prev_close = data["prev_close"]
+        rsi.gain = StreamingEMA.from_dict(data["gain"])
+        rsi.loss = StreamingEMA.from_dict(data["loss"])
+        return rsi
+
+class RollingStats:
+    """
+    Mean and population variance over the last period values, updated in O(1).
+    """
+
+    def __init__(self, period: int):
+        self.period = period
+        self.window: deque = deque()
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def update(self, x: float):
+        self.window.append(x)
+        self.total += x
+        self.total_sq += x * x
+        if len(self.window) > self.period:
+            old = self.window.popleft()
+            self.total -= old
+            self.total_sq -= old * old
+
+    @property
+    def ready(self) -> bool:
+        return len(self.window) == self.period
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.period if self.ready else None
+
+    @property
+    def std(self) -> Optional[float]:
+        if not self.ready:
+            return None
+        mean = self.total / self.period
+        return math.sqrt(max(0.0, self.total_sq / self.period - mean * mean))
+
+    def to_dict(self) -> Dict[str, Any]:
+        # Running sums are rebuilt from the window on load so float drift doesn't accumulate across restarts
+        return {"period": self.period, "window": list(self.window)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RollingStats":
+        stats = cls(data["period"])
+        for x in data["window"]:
+            stats.update(x)
+        return stats
+
+class StreamingATR:
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.prev_close: Optional[float] = None
+        self.average = StreamingWilder(period)
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.average.value
+
+    def update(self, high: float, low: float, close: float) -> Optional[float]:
+        prev_close = close if self.prev_close is None else self.prev_close
+        true_range = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        self.prev_close = close
+        return self.average.update(true_range)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"period": self.period, "prev_close": self.prev_close, "average": self.average.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StreamingATR":
+        atr = cls(data["period"])
+        atr.prev_close = data["prev_close"]
+        atr.average = StreamingEMA.from_dict(data["average"])
+        return atr
+
+class IndicatorState:
+    """
+    The incremental indicator set kept per symbol by the bar store.
+    A bar with the same timestamp as the last one (today's bar still forming) replaces it
+    instead of advancing the indicators, using the state saved before that bar.
+    """
+
+    def __init__(self):
+        self.ema12 = StreamingEMA(12)
+        self.ema26 = StreamingEMA(26)
+        self.rsi = StreamingRSI(14)
+        self.stats20 = RollingStats(20)
+        self.stats50 = RollingStats(50)
+        self.atr = StreamingATR(14)
+        self.last_timestamp: Optional[str] = None
+        self.last_bar: Optional[list] = None
+        self.bars = 0
+        self._before_last: Optional[Dict[str, Any]] = None
+
+    def update(self, bar: Dict[str, Any]) -> Dict[str, Any]:
+        if bar["time"] == self.last_timestamp and self._before_last is not None:
+            self._restore(self._before_last)
+        else:
+            self._before_last = self._indicators_dict()
+
+        close = bar["close"]
+        self.ema12.update(close)
+        self.ema26.update(close)
+        self.rsi.update(close)
+        self.stats20.update(close)
+        self.stats50.update(close)
+        self.atr.update(bar["high"], bar["low"], close)
+        self.last_timestamp = bar["time"]
+        self.last_bar = bar_values(bar)
+        self.bars += 1
+        return self.values()
+
+    def values(self) -> Dict[str, Any]:
+        sma20, std20 = self.stats20.mean, self.stats20.std
+        macd = self.ema12.value - self.ema26.value if self.ema26.value is not None else None
+        values = {
+            "rsi": self.rsi.value,
+            "ema12": self.ema12.value,
+            "ema26": self.ema26.value,
+            "macd": macd,
+            "sma20": sma20,
+            "sma50": self.stats50.mean,
+            "bb_upper": sma20 + 2 * std20 if sma20 is not None else None,
+            "bb_lower": sma20 - 2 * std20 if sma20 is not None else None,
+            "atr": self.atr.value
+        }
+        return {key: (round(value, 4) if value is not None else None) for key, value in values.items()}
+
+    def _indicators_dict(self) -> Dict[str, Any]:
+        return {
+            "ema12": self.ema12.to_dict(),
+            "ema26": self.ema26.to_dict(),
+            "rsi": self.rsi.to_dict(),
+            "stats20": self.stats20.to_dict(),
+            "stats50": self.stats50.to_dict(),
+            "atr": self.atr.to_dict(),
+            "bars": self.bars
+        }
+
+    def _restore(self, data: Dict[str, Any]):
+        self.ema12 = StreamingEMA.from_dict(data["ema12"])
+        self.ema26 = StreamingEMA.from_dict(data["ema26"])
+        self.rsi = StreamingRSI.from_dict(data["rsi"])
+        self.stats20 = RollingStats.from_dict(data["stats20"])
+        self.stats50 = RollingStats.from_dict(data["stats50"])
+        self.atr = StreamingATR.from_dict(data["atr"])
+        self.bars = data["bars"]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            **self._indicators_dict(),
+            "last_timestamp": self.last_timestamp,
+            "last_bar": self.last_bar,
+            "before_last": copy.deepcopy(self._before_last)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "IndicatorState":
+        state = cls()
+        state._restore(data)
+        state.last_timestamp = data["last_timestamp"]
+        state.last_bar = data.get("last_bar")
+        state._before_last = data.get("before_last")
+        return state
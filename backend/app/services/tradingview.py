@@ -1,43 +1,161 @@
-from tradingview_ta import TA_Handler, Interval, Exchange
+import os
+import time
+import threading
+from collections import defaultdict
+from typing import List, Dict, Any, Optional, Tuple
+from tradingview_ta import Interval, get_multiple_analysis
 import logging
+from app.services.circuit_breaker import circuit_breakers, CircuitOpenError
 
 logger = logging.getLogger(__name__)
 
+# Seconds a fetched analysis is served from memory before TradingView is asked again
+TRADINGVIEW_CACHE_TTL = int(os.getenv("TRADINGVIEW_CACHE_TTL", "300"))
+TRADINGVIEW_CACHE_MAX_ENTRIES = int(os.getenv("TRADINGVIEW_CACHE_MAX_ENTRIES", "5000"))
+# Symbols per scan request; TradingView accepts large batches but very long ones get slow
+TRADINGVIEW_BATCH_SIZE = int(os.getenv("TRADINGVIEW_BATCH_SIZE", "200"))
+TRADINGVIEW_TIMEOUT = float(os.getenv("TRADINGVIEW_TIMEOUT", "10"))
+# Intervals the scanner keeps warm for its watchlist, e.g. "1h,1d,1W"
+TRADINGVIEW_WARM_INTERVALS = [i.strip() for i in os.getenv("TRADINGVIEW_WARM_INTERVALS", "1d").split(",") if i.strip()]
+
+INTERVALS = [
+    Interval.INTERVAL_1_MINUTE, Interval.INTERVAL_5_MINUTES, Interval.INTERVAL_15_MINUTES,
+    Interval.INTERVAL_30_MINUTES, Interval.INTERVAL_1_HOUR, Interval.INTERVAL_2_HOURS,
+    Interval.INTERVAL_4_HOURS, Interval.INTERVAL_1_DAY, Interval.INTERVAL_1_WEEK, Interval.INTERVAL_1_MONTH
+]
+
 class TradingViewService:
-    def get_technical_analysis(self, symbol: str, screener: str = "india", exchange: str = "NSE", interval: str = Interval.INTERVAL_1_DAY):
+    """
+    TradingView technical ratings, cached in memory per (symbol, interval) for a TTL.
+    Cache misses are fetched with one scan request per (screener, interval) however many
+    symbols are asked for, so a whole watchlist costs a single upstream call.
+    """
+
+    def __init__(self, ttl: int = TRADINGVIEW_CACHE_TTL):
+        self.ttl = ttl
+        self._cache: Dict[Tuple[str, str], Tuple[float, Optional[Dict[str, Any]]]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "requests": 0, "errors": 0}
+
+    def _resolve(self, symbol: str, screener: str = "india", exchange: str = "NSE") -> Tuple[str, str]:
+        """
+        (screener, "EXCHANGE:TICKER") for a dashboard symbol.
+        """
+        # Handle crypto symbols (e.g., BTC-USD)
+        if "-USD" in symbol:
+            return "crypto", f"BINANCE:{symbol.replace('-USD', 'USDT')}"
+        # Handle NSE symbols (remove .NS suffix if present)
+        if symbol.endswith(".NS"):
+            return "india", f"NSE:{symbol.replace('.NS', '')}"
+        return screener, f"{exchange}:{symbol}"
+
+    def get_technical_analysis(self, symbol: str, screener: str = "india", exchange: str = "NSE", interval: str = Interval.INTERVAL_1_DAY) -> Optional[Dict[str, Any]]:
+        """
+        Fetch technical analysis from TradingView, or None if it has no data or is unreachable.
+        """
+        return self.get_many([symbol], [interval], screener, exchange)[symbol][interval]
+
+    def get_many(self, symbols: List[str], intervals: Optional[List[str]] = None, screener: str = "india", exchange: str = "NSE") -> Dict[str, Dict[str, Optional[Dict[str, Any]]]]:
         """
-        Fetch technical analysis from TradingView.
+        {symbol: {interval: analysis or None}} for every symbol and interval, fetching only
+        the expired or missing entries.
         """
+        intervals = intervals or [Interval.INTERVAL_1_DAY]
+        unknown = [i for i in intervals if i not in INTERVALS]
+        if unknown:
+            raise ValueError(f"Unknown TradingView interval(s): {', '.join(unknown)}")
+
+        now = time.monotonic()
+        results: Dict[str, Dict[str, Optional[Dict[str, Any]]]] = {symbol: {} for symbol in symbols}
+        # (screener, interval) -> {"EXCHANGE:TICKER": symbol}
+        missing: Dict[Tuple[str, str], Dict[str, str]] = defaultdict(dict)
+        with self._lock:
+            for symbol in symbols:
+                for interval in intervals:
+                    cached = self._cache.get((symbol, interval))
+                    if cached and now - cached[0] < self.ttl:
+                        results[symbol][interval] = cached[1]
+                        self.stats["hits"] += 1
+                    else:
+                        tv_screener, tv_symbol = self._resolve(symbol, screener, exchange)
+                        missing[(tv_screener, interval)][tv_symbol] = symbol
+                        self.stats["misses"] += 1
+
+        for (tv_screener, interval), wanted in missing.items():
+            fetched = self._fetch(tv_screener, interval, list(wanted))
+            if fetched is None:
+                for symbol in wanted.values():
+                    results[symbol][interval] = None
+                continue
+            with self._lock:
+                for tv_symbol, symbol in wanted.items():
+                    results[symbol][interval] = fetched[tv_symbol]
+                    self._cache[(symbol, interval)] = (time.monotonic(), fetched[tv_symbol])
+                self._evict()
+        return results
+
+    def warm(self, symbols: List[str], intervals: Optional[List[str]] = None) -> int:
+        """
+        Fetches every expired (symbol, interval) in bulk ahead of requests. Returns the
+        number of entries that now hold an analysis.
+        """
+        results = self.get_many(symbols, intervals)
+        return sum(1 for by_interval in results.values() for analysis in by_interval.values() if analysis)
+
+    def _evict(self):
+        if len(self._cache) <= TRADINGVIEW_CACHE_MAX_ENTRIES:
+            return
+        # Expired entries first, then the oldest fetches
+        now = time.monotonic()
+        for key in [k for k, (fetched_at, _) in self._cache.items() if now - fetched_at >= self.ttl]:
+            del self._cache[key]
+        overflow = len(self._cache) - TRADINGVIEW_CACHE_MAX_ENTRIES
+        if overflow > 0:
+            for key in sorted(self._cache, key=lambda k: self._cache[k][0])[:overflow]:
+                del self._cache[key]
+
+    def _fetch(self, screener: str, interval: str, tv_symbols: List[str]) -> Optional[Dict[str, Optional[Dict[str, Any]]]]:
+        """
+        {"EXCHANGE:TICKER": analysis or None} for one screener and interval. None if
+        TradingView failed, so nothing is cached and the next call retries.
+        """
+        fetched: Dict[str, Optional[Dict[str, Any]]] = {}
         try:
-            # Handle crypto symbols (e.g., BTC-USD)
-            if "-USD" in symbol:
-                screener = "crypto"
-                exchange = "BINANCE"
-                symbol = symbol.replace("-USD", "USDT")
-            
-            # Handle NSE symbols (remove .NS suffix if present)
-            if symbol.endswith(".NS"):
-                symbol = symbol.replace(".NS", "")
-                screener = "india"
-                exchange = "NSE"
-
-            handler = TA_Handler(
-                symbol=symbol,
-                screener=screener,
-                exchange=exchange,
-                interval=interval
-            )
-            
-            analysis = handler.get_analysis()
-            return {
-                "summary": analysis.summary,
-                "oscillators": analysis.oscillators,
-                "moving_averages": analysis.moving_averages,
-                "indicators": analysis.indicators,
-                "time": analysis.time.isoformat()
-            }
+            for start in range(0, len(tv_symbols), TRADINGVIEW_BATCH_SIZE):
+                batch = tv_symbols[start:start + TRADINGVIEW_BATCH_SIZE]
+                self.stats["requests"] += 1
+                analyses = circuit_breakers.get("tradingview").call(
+                    get_multiple_analysis, screener, interval, batch, timeout=TRADINGVIEW_TIMEOUT
+                )
+                for tv_symbol in batch:
+                    # Unknown symbols come back as None; cache that too so they are not re-asked every call
+                    fetched[tv_symbol] = self._to_dict(analyses.get(tv_symbol.upper()))
+        except CircuitOpenError:
+            return None
         except Exception as e:
-            logger.error(f"TradingView analysis failed for {symbol}: {e}")
+            self.stats["errors"] += 1
+            logger.error(f"TradingView analysis failed for {len(tv_symbols)} symbol(s) on {screener}/{interval}: {e}")
             return None
+        return fetched
+
+    def _to_dict(self, analysis) -> Optional[Dict[str, Any]]:
+        if analysis is None:
+            return None
+        return {
+            "summary": analysis.summary,
+            "oscillators": analysis.oscillators,
+            "moving_averages": analysis.moving_averages,
+            "indicators": analysis.indicators,
+            "time": analysis.time.isoformat()
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self._cache),
+            "ttl": self.ttl,
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0
+        }
 
 tradingview_service = TradingViewService()
@@ -0,0 +1,125 @@
+import os
+import math
+import numpy as np
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+from app.services import indicators
+from app.services.bar_store import bar_store
+
+# Bars per symbol loaded into the universe matrix
+UNIVERSE_LOOKBACK_BARS = int(os.getenv("UNIVERSE_LOOKBACK_BARS", "120"))
+# Distinct symbol lists whose snapshots are kept; least recently used ones are dropped
+UNIVERSE_CACHE_MAX_ENTRIES = int(os.getenv("UNIVERSE_CACHE_MAX_ENTRIES", "32"))
+TRADING_DAYS = 252
+VOLATILITY_BARS = 20
+
+class UniverseService:
+    """
+    Cross-sectional indicators for many symbols at once. The latest bars of every symbol are
+    loaded into one (bars x symbols) matrix, right-aligned so row -1 is each symbol's latest bar,
+    and every metric is a single vectorized pass over it. Aligning on each symbol's own bars
+    (rather than calendar dates) keeps weekend-free stocks and 24/7 crypto comparable.
+    """
+
+    def __init__(self):
+        self._cache: "OrderedDict[Tuple, List[Dict[str, Any]]]" = OrderedDict()
+        bar_store.subscribe(self._invalidate)
+
+    def _invalidate(self, symbol: str):
+        self._cache.clear()
+
+    def load_matrix(self, symbols: Optional[List[str]] = None, lookback: int = UNIVERSE_LOOKBACK_BARS) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (symbols, closes, volumes, valid) where closes/volumes are (lookback x symbols).
+        Symbols with fewer bars are padded at the top with their first close; `valid` marks real bars.
+        """
+        series = bar_store.get_recent_bars_many(symbols, lookback)
+        names = [s for s in (symbols if symbols is not None else sorted(series)) if series.get(s)]
+
+        closes = np.full((lookback, len(names)), np.nan)
+        volumes = np.zeros((lookback, len(names)))
+        for j, symbol in enumerate(names):
+            bars = series[symbol]
+            closes[lookback - len(bars):, j] = [b["close"] for b in bars]
+            volumes[lookback - len(bars):, j] = [b["volume"] or 0 for b in bars]
+
+        valid = ~np.isnan(closes)
+        if names:
+            # Flat padding contributes zero returns, and n_valid gates every metric below
+            first_valid = valid.argmax(axis=0)
+            closes = np.where(valid, closes, closes[first_valid, np.arange(len(names))])
+        return names, closes, volumes, valid
+
+    def compute(self, closes: np.ndarray, valid: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Latest value of each metric per column; NaN where a symbol has too few bars.
+        """
+        n_valid = valid.sum(axis=0)
+
+        def gated(values: np.ndarray, needed: int) -> np.ndarray:
+            return np.where(n_valid >= needed, values, np.nan)
+
+        def change(bars: int) -> np.ndarray:
+            if len(closes) <= bars:
+                return np.full(closes.shape[1], np.nan)
+            return gated((closes[-1] / closes[-1 - bars] - 1) * 100, bars + 1)
+
+        # Wilder's RSI is recursive, so padded rows would leak into its seed; symbols with the same
+        # history length share their padding and are computed together over real bars only
+        rsi = np.full(closes.shape[1], np.nan)
+        for length in np.unique(n_valid):
+            columns = n_valid == length
+            if length >= 15:
+                rsi[columns] = indicators.rsi(closes[-length:, columns])[-1]
+
+        sma20 = indicators.sma(closes, 20)
+        sma50 = indicators.sma(closes, 50)
+        log_returns = np.diff(np.log(closes), axis=0)[-VOLATILITY_BARS:]
+
+        # +1 golden cross, -1 death cross on the latest bar
+        cross = np.zeros(closes.shape[1])
+        if len(closes) >= 2:
+            cross[(sma20[-2] < sma50[-2]) & (sma20[-1] > sma50[-1])] = 1
+            cross[(sma20[-2] > sma50[-2]) & (sma20[-1] < sma50[-1])] = -1
+
+        return {
+            "price": closes[-1],
+            "change_pct": change(1),
+            "change_5d_pct": change(5),
+            "change_20d_pct": change(20),
+            "rsi": rsi,
+            "sma20": gated(sma20[-1], 20),
+            "sma50": gated(sma50[-1], 50),
+            "sma_cross": gated(cross, 51),
+            "volatility_pct": gated(log_returns.std(axis=0, ddof=1) * math.sqrt(TRADING_DAYS) * 100, VOLATILITY_BARS + 1)
+        }
+
+    def snapshot(self, symbols: Optional[List[str]] = None, lookback: int = UNIVERSE_LOOKBACK_BARS) -> List[Dict[str, Any]]:
+        """
+        One row of metrics per symbol with stored bars. Cached (LRU, per symbol list) until
+        any stored bar changes.
+        """
+        key = (tuple(symbols) if symbols is not None else None, lookback)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return [dict(row) for row in self._cache[key]]
+
+        names, closes, volumes, valid = self.load_matrix(symbols, lookback)
+        if not names:
+            return []
+        metrics = self.compute(closes, valid)
+
+        rows = []
+        for j, symbol in enumerate(names):
+            row = {"symbol": symbol, "bars": int(valid[:, j].sum()), "volume": int(volumes[-1, j])}
+            for name, values in metrics.items():
+                value = values[j]
+                row[name] = None if np.isnan(value) else round(float(value), 4)
+            rows.append(row)
+
+        self._cache[key] = rows
+        while len(self._cache) > UNIVERSE_CACHE_MAX_ENTRIES:
+            self._cache.popitem(last=False)
+        return [dict(row) for row in rows]
+
+universe_service = UniverseService()
@@ -0,0 +1,52 @@
+"""
+Compares the legacy RSI / SMA-cross code with the NumPy indicator module.
+Run from the backend directory: python bench_indicators.py
+"""
+import timeit
+import pandas as pd
+from bench_prompt_tokens import make_history
+from app.services import indicators
+
+def legacy_rsi(prices, period=14):
+    # AnalysisService.calculate_rsi before the indicator module
+    if len(prices) < period + 1:
+        return 50.0
+    deltas = [prices[i] - prices[i-1] for i in range(1, len(prices))]
+    gains = [d for d in deltas if d > 0]
+    losses = [-d for d in deltas if d < 0]
+    avg_gain = sum(gains) / period if gains else 0
+    avg_loss = sum(losses) / period if losses else 0
+    if avg_loss == 0:
+        return 100.0
+    return 100 - (100 / (1 + avg_gain / avg_loss))
+
+def legacy_sma_cross(closes):
+    sma20 = pd.Series(closes).rolling(window=20).mean().iloc[-1]
+    sma50 = pd.Series(closes).rolling(window=50).mean().iloc[-1]
+    prev_sma20 = pd.Series(closes).rolling(window=20).mean().iloc[-2]
+    prev_sma50 = pd.Series(closes).rolling(window=50).mean().iloc[-2]
+    return sma20, sma50, prev_sma20, prev_sma50
+
+def new_rsi_and_cross(closes):
+    sma20, sma50 = indicators.sma(closes, 20), indicators.sma(closes, 50)
+    return indicators.rsi(closes)[-1], sma20[-1], sma50[-1], sma20[-2], sma50[-2]
+
+def best_of(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+if __name__ == "__main__":
+    print(f"{'bars':>6} {'legacy rsi+cross':>18} {'numpy rsi+cross':>17} {'full snapshot':>15}   (microseconds per symbol)")
+    for days in (60, 250, 1000, 5000):
+        history = make_history(days=days)
+        closes = [p["close"] for p in history]
+        number = max(20, 20000 // days)
+
+        legacy = best_of(lambda: (legacy_rsi(closes), legacy_sma_cross(closes)), number)
+        new = best_of(lambda: new_rsi_and_cross(closes), number)
+        full = best_of(lambda: indicators.snapshot(history), number)
+        print(f"{days:>6} {legacy:>18.1f} {new:>17.1f} {full:>15.1f}")
+
+    history = make_history(days=250)
+    closes = [p["close"] for p in history]
+    print(f"\nRSI on the same 250 bars: legacy {legacy_rsi(closes):.2f}, Wilder {indicators.rsi(closes)[-1]:.2f}")
+    print("(the legacy value sums every gain/loss in the window and divides by the period, so it drifts with window length)")
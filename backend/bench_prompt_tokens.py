@@ -0,0 +1,53 @@
+"""
+Compares prompt size before and after the compact price encoding.
+Run from the backend directory: python bench_prompt_tokens.py
+"""
+import random
+from datetime import datetime, timedelta
+from app.services.llm import llm_service
+from app.services.prompt_encoding import estimate_tokens, encode_price_series
+
+def make_history(days: int = 60, start: float = 2456.789123, seed: int = 7):
+    rng = random.Random(seed)
+    price = start
+    history = []
+    for i in range(days):
+        open_price = price
+        close = open_price * (1 + rng.gauss(0, 0.015))
+        high = max(open_price, close) * (1 + abs(rng.gauss(0, 0.005)))
+        low = min(open_price, close) * (1 - abs(rng.gauss(0, 0.005)))
+        history.append({
+            "time": (datetime(2025, 1, 1) + timedelta(days=i)).isoformat() + "+05:30",
+            "open": open_price, "high": high, "low": low, "close": close,
+            "volume": rng.randint(1_000_000, 9_000_000)
+        })
+        price = close
+    return history
+
+def legacy_pattern_block(history):
+    recent = history[-30:]
+    return "\n".join([f"{p['time']}: Open {p['open']}, High {p['high']}, Low {p['low']}, Close {p['close']}" for p in recent])
+
+def legacy_analysis_block(history):
+    return "\n".join([f"{p['time']}: Close {p['close']}" for p in history[-5:]])
+
+if __name__ == "__main__":
+    history = make_history()
+    news = [{"title": "Company posts record quarterly profit", "publisher": "Reuters", "sentiment": "Bullish"}]
+
+    rows = []
+
+    new_block = encode_price_series(history, fields="ohlc", max_rows=30)
+    rows.append(("detect_patterns price block", estimate_tokens(legacy_pattern_block(history)), estimate_tokens(new_block)))
+
+    new_block = encode_price_series(history, fields="c", max_rows=5)
+    rows.append(("analyze_market price block", estimate_tokens(legacy_analysis_block(history)), estimate_tokens(new_block)))
+
+    prompt = llm_service._construct_prompt("RELIANCE.NS", history, news, None, "")
+    legacy_prompt = prompt.replace(encode_price_series(history, fields="c", max_rows=5), legacy_analysis_block(history))
+    rows.append(("analyze_market full prompt", estimate_tokens(legacy_prompt), estimate_tokens(prompt)))
+
+    print(f"{'prompt':32} {'before':>8} {'after':>8} {'saved':>7}")
+    for name, before, after in rows:
+        print(f"{name:32} {before:>8} {after:>8} {100 * (1 - after / before):>6.0f}%")
+    print("\nSample detect_patterns block:\n" + encode_price_series(history, fields="ohlc", max_rows=30))
@@ -18,6 +18,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-News-Last-Refreshed", "X-Patterns-Scanned-At", "X-Patterns-Bar-Time", "Server-Timing"],
 )
 
 app.include_router(api_router, prefix="/api")
@@ -27,10 +28,23 @@ app.include_router(api_router, prefix="/api")
 async def startup_event():
     from app.services.brain import system_brain
     from app.services.system_agent import system_agent
-    # asyncio.create_task(scanner_service.start_scanning())
-    # asyncio.create_task(system_brain.start_brain())
-    # asyncio.create_task(system_agent.start())
-    print("DEBUG: Background tasks disabled for debugging")
+    from app.services.news import news_service
+    # spawn() also records the loop that worker threads hand background work back to
+    from app.services.background import spawn
+    # News reads are served from the local store, so keep it warm
+    spawn(news_service.start_refresher)
+    # Strategies read fundamentals locally; fetch them in the background
+    from app.services.fundamentals import fundamentals_service
+    spawn(fundamentals_service.start_refresher)
+    # Benchmark index bars for beta; symbols' own history is backfilled on first use
+    from app.services.risk import risk_engine
+    spawn(risk_engine.start_refresher)
+    # Scanner, brain and agent stay disabled for debugging
+    # spawn(scanner_service.start_scanning)
+    # spawn(system_brain.start_brain)
+    # spawn(system_agent.start)
+    from app.services.logger import logger_service
+    logger_service.log("INFO", "SYSTEM", "Background refreshers started", {"started": ["news", "fundamentals", "risk"], "disabled": ["scanner", "brain", "agent"]})
 
 # Global Exception Handler
 @app.middleware("http")